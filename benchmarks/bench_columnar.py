@@ -0,0 +1,66 @@
+"""
+Compare query_kumquat (Row objects) with query_kumquat_columnar (typed arrays).
+
+    python benchmarks/bench_columnar.py --rows 1000000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from aidb.db_columnar import query_kumquat_columnar
+from aidb.db_kumquat import query_kumquat
+
+SQL = "SELECT id, yrmo, views, score FROM youtube"
+
+
+def make_db(path: str, rows: int) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER, views INTEGER, score REAL)"
+        )
+        conn.executemany(
+            "INSERT INTO youtube (yrmo, views, score) VALUES (?, ?, ?)",
+            ((202001 + i % 48, i * 7, i / 3.0) for i in range(rows)),
+        )
+
+
+def measure(func: Callable[[], Any]) -> tuple[float, int]:
+    """Wall time of a plain run, peak traced memory of a second run."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "bench.db")
+        make_db(path, args.rows)
+        url = f"sqlite:///{path}"
+        query_kumquat(url, "SELECT 1")  # warm the engine
+        print(f"{args.rows} rows x 4 numeric columns")
+        for name, func in (
+            ("rows", lambda: query_kumquat(url, SQL)),
+            ("columnar", lambda: query_kumquat_columnar(url, SQL)),
+        ):
+            elapsed, peak = measure(func)
+            print(f"  {name:<9} {elapsed:7.2f}s  peak {peak / 1e6:8.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
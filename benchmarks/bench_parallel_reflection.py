@@ -0,0 +1,62 @@
+"""
+Benchmark serial vs parallel SQLAlchemy reflection on a high-latency link.
+
+Latency is simulated by sleeping before every statement the engine sends, which
+is what a remote database costs per round trip.
+
+    python benchmarks/bench_parallel_reflection.py --tables 200 --latency-ms 20
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any
+
+from sqlalchemy import Engine, event
+
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+
+
+def make_db(path: str, tables: int) -> None:
+    with sqlite3.connect(path) as conn:
+        for i in range(tables):
+            conn.execute(
+                f"CREATE TABLE t{i} (id INTEGER PRIMARY KEY, yrmo INTEGER, name TEXT)"
+            )
+            conn.execute(f"CREATE INDEX ix_t{i}_yrmo ON t{i} (yrmo)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000.0
+
+    def add_latency(*_: Any) -> None:
+        time.sleep(latency)
+
+    event.listen(Engine, "before_cursor_execute", add_latency)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "bench.db")
+        make_db(path, args.tables)
+        url = f"sqlite:///{path}"
+        baseline = None
+        print(f"{args.tables} tables, {args.latency_ms:.1f} ms simulated latency")
+        for workers in args.workers:
+            start = time.perf_counter()
+            db_dump_table_schema_json(url, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"  workers={workers:<3} {elapsed:8.2f}s  speedup {baseline / elapsed:5.2f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
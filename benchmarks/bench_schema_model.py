@@ -0,0 +1,81 @@
+"""
+Memory and walk time of a schema as nested dicts versus a Catalog.
+
+The dict version is loaded from json, like the schema cache, so every string is
+its own object as it would be after reflection.
+
+    python benchmarks/bench_schema_model.py --tables 2500 --columns 40
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from bench_schema_prompt import make_schema
+
+from aidb.schema_model import Catalog
+
+
+def measure(build: Callable[[], Any]) -> tuple[Any, int, float]:
+    """(result, bytes allocated and still alive, seconds)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def walk_dicts(schema: dict[str, Any]) -> int:
+    count = 0
+    for table_info in schema["tables"].values():
+        for column in table_info["columns"]:
+            count += column["is_nullable"] == "YES" and len(column["data_type"]) > 0
+    return count
+
+
+def walk_catalog(catalog: Catalog) -> int:
+    count = 0
+    for table in catalog:
+        for column in table.columns:
+            count += column.nullable and len(column.data_type) > 0
+    return count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=2500)
+    parser.add_argument("--columns", type=int, default=40)
+    args = parser.parse_args()
+
+    text = json.dumps(make_schema(args.tables, args.columns))
+    schema, dict_bytes, dict_load = measure(lambda: json.loads(text))
+    catalog, catalog_bytes, catalog_build = measure(lambda: Catalog.from_dict(schema))
+
+    start = time.perf_counter()
+    walk_dicts(schema)
+    dict_walk = time.perf_counter() - start
+    start = time.perf_counter()
+    walk_catalog(catalog)
+    catalog_walk = time.perf_counter() - start
+
+    print(f"{args.tables} tables x {args.columns} columns")
+    print(
+        f"  dicts    {dict_bytes / 2**20:8.1f} MiB  load  {dict_load * 1000:8.1f} ms"
+        f"  walk {dict_walk * 1000:7.1f} ms"
+    )
+    print(
+        f"  catalog  {catalog_bytes / 2**20:8.1f} MiB  build {catalog_build * 1000:8.1f} ms"
+        f"  walk {catalog_walk * 1000:7.1f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Compare the size and build time of the json and compact schema prompts.
+
+    python benchmarks/bench_schema_prompt.py --tables 500 --columns 40
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Any
+
+from aidb.schema_prompt import BYTES_PER_TOKEN, render_compact_schema
+
+
+def make_schema(tables: int, columns: int) -> dict[str, Any]:
+    """Synthetic schema in the db_dump_table_schema_json shape."""
+    out: dict[str, Any] = {}
+    for t in range(tables):
+        name = f"table_{t:04d}"
+        cols = [
+            {
+                "column_name": "id",
+                "data_type": "INTEGER",
+                "is_nullable": "NO",
+                "default": None,
+                "is_primary_key": True,
+                "comment": None,
+            },
+            {
+                "column_name": "yrmo",
+                "data_type": "INTEGER",
+                "is_nullable": "YES",
+                "default": None,
+                "is_primary_key": False,
+                "comment": "year * 100 + month",
+            },
+        ]
+        cols += [
+            {
+                "column_name": f"column_{c:03d}",
+                "data_type": "VARCHAR(255)",
+                "is_nullable": "YES",
+                "default": None,
+                "is_primary_key": False,
+                "comment": None,
+            }
+            for c in range(columns - 2)
+        ]
+        fks = (
+            [
+                {
+                    "column": "column_000",
+                    "references": {"table": f"table_{t - 1:04d}", "column": "id"},
+                }
+            ]
+            if t
+            else []
+        )
+        out[name] = {
+            "columns": cols,
+            "primary_key": ["id"],
+            "indexes": [
+                {"name": f"ix_{name}_yrmo", "unique": False, "columns": ["yrmo"]}
+            ],
+            "foreign_keys": fks,
+            "check_constraints": [],
+            "table_comment": None,
+            "partitions": [],
+        }
+    return {"tables": out}
+
+
+def timed(func: Any, repeat: int) -> tuple[float, str]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=16_000, help="Token budget")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    schema = make_schema(args.tables, args.columns)
+    cases = {
+        "json indent=2": lambda: json.dumps(schema, indent=2),
+        "compact, no limit": lambda: render_compact_schema(schema, max_tokens=None),
+        f"compact, {args.budget} tokens": lambda: render_compact_schema(
+            schema, max_tokens=args.budget
+        ),
+    }
+    print(f"{args.tables} tables x {args.columns} columns")
+    for label, func in cases.items():
+        elapsed, text = timed(func, args.repeat)
+        size = len(text.encode("utf-8"))
+        print(
+            f"  {label:<24} {size / 1024:9.1f} KiB  ~{size // BYTES_PER_TOKEN:8d} tokens"
+            f"  {elapsed * 1000:8.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Wall time of aidb commands that shouldn't touch the database, and the modules
+that dominate their import time.
+
+    python benchmarks/bench_startup.py --repeat 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+_CODE = (
+    "import sys; from aidb.main import main; "
+    "sys.argv = ['aidb'] + sys.argv[1:]; sys.exit(main())"
+)
+
+COMMANDS = {
+    "--help": ["--help"],
+    "--set": ["--set", "sqlite:///unused.db"],
+}
+
+
+def run(args: list[str], importtime: bool = False) -> subprocess.CompletedProcess:
+    # The null backend keeps --set from writing to the real keyring.
+    env = {**os.environ, "PYTHON_KEYRING_BACKEND": "keyring.backends.null.Keyring"}
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run(
+        [sys.executable, *flags, "-c", _CODE, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+def top_imports(stderr: str, count: int) -> list[tuple[int, str]]:
+    """Slowest top-level imports by cumulative time."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):  # direct imports only
+            out.append((int(cumulative), name.strip()))
+    return sorted(out, reverse=True)[:count]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, cmd in COMMANDS.items():
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run(cmd)
+            times.append(time.perf_counter() - start)
+        print(
+            f"aidb {label:<7} median {statistics.median(times) * 1000:7.1f} ms"
+            f"  min {min(times) * 1000:7.1f} ms"
+        )
+        for cumulative, name in top_imports(run(cmd, importtime=True).stderr, args.top):
+            print(f"    {cumulative / 1000:7.1f} ms  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
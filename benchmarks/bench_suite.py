@@ -0,0 +1,232 @@
+"""
+Reproducible benchmark suite over generated schemas.
+
+Builds a database per scale with the given number of tables, columns, indexes
+and foreign keys, then measures reflection (cold and through the schema cache),
+json serialization, compact prompt building and query_kumquat throughput.
+Results are printed and can be saved as JSON and compared with a saved baseline:
+
+    python benchmarks/bench_suite.py --output baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --tolerance 0.25
+
+SQLite files are used by default. Pass --mysql-url to run against a scratch
+MySQL database (e.g. a local container) instead. Every table named bench_* in it
+is dropped first.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable
+
+import sqlalchemy
+from sqlalchemy import text
+
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.db_engine import dispose_all, get_engine
+from aidb.db_kumquat import query_kumquat
+from aidb.schema_cache import CACHE_DIR_ENV
+from aidb.schema_prompt import render_compact_schema
+
+# name: (tables, columns per table, indexes per table, foreign keys per table)
+SCALES: dict[str, tuple[int, int, int, int]] = {
+    "small": (20, 10, 2, 1),
+    "medium": (200, 20, 3, 2),
+    "large": (1000, 40, 4, 3),
+}
+
+FACT_ROWS = 100_000
+POINT_QUERIES = 2_000
+
+
+def schema_ddl(tables: int, columns: int, indexes: int, fks: int) -> list[str]:
+    """CREATE statements that work on SQLite and MySQL alike."""
+    statements = []
+    for t in range(tables):
+        name = f"bench_{t:04d}"
+        cols = ["id INTEGER PRIMARY KEY", "yrmo INTEGER"]
+        cols += [f"c{c:03d} VARCHAR(64)" for c in range(max(0, columns - 2))]
+        targets = [f"bench_{t - n:04d}" for n in range(1, fks + 1) if t - n >= 0]
+        cols += [f"{target}_id INTEGER" for target in targets]
+        cols += [
+            f"FOREIGN KEY ({target}_id) REFERENCES {target} (id)" for target in targets
+        ]
+        statements.append(f"CREATE TABLE {name} ({', '.join(cols)})")
+        indexed = ["yrmo"] + [f"c{c:03d}" for c in range(max(0, columns - 2))]
+        for i, column in enumerate(indexed[:indexes]):
+            statements.append(f"CREATE INDEX ix_{name}_{i} ON {name} ({column})")
+    statements.append(
+        "CREATE TABLE bench_facts (id INTEGER PRIMARY KEY, yrmo INTEGER, views INTEGER, label VARCHAR(64))"
+    )
+    return statements
+
+
+def build_database(url: str, scale: tuple[int, int, int, int]) -> None:
+    engine = get_engine(url)
+    with engine.begin() as conn:
+        existing = [
+            name
+            for name in sqlalchemy.inspect(conn).get_table_names()
+            if name.startswith("bench_")
+        ]
+        if engine.dialect.name == "mysql":
+            conn.execute(text("SET FOREIGN_KEY_CHECKS = 0"))
+        for name in existing:
+            conn.execute(text(f"DROP TABLE {name}"))
+        if engine.dialect.name == "mysql":
+            conn.execute(text("SET FOREIGN_KEY_CHECKS = 1"))
+        for statement in schema_ddl(*scale):
+            conn.execute(text(statement))
+        conn.execute(
+            text(
+                "INSERT INTO bench_facts (id, yrmo, views, label) VALUES (:id, :yrmo, :views, :label)"
+            ),
+            [
+                {"id": i, "yrmo": 202001 + i % 48, "views": i * 7, "label": f"row {i}"}
+                for i in range(FACT_ROWS)
+            ],
+        )
+
+
+def median_time(func: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def run_scale(url: str, repeat: int) -> dict[str, float]:
+    """Metrics ending in _s are seconds (lower is better), _per_s are rates."""
+    results: dict[str, float] = {}
+    results["reflect_cold_s"] = median_time(
+        lambda: db_dump_table_schema_json(url), repeat
+    )
+    db_dump_table_schema_json(url, use_cache=True, refresh=True)
+    results["reflect_cached_s"] = median_time(
+        lambda: db_dump_table_schema_json(url, use_cache=True), repeat
+    )
+    schema = db_dump_table_schema_json(url, use_cache=True)
+    results["serialize_json_s"] = median_time(
+        lambda: json.dumps(schema, indent=2), repeat
+    )
+    results["prompt_compact_s"] = median_time(
+        lambda: render_compact_schema(schema, max_tokens=None), repeat
+    )
+    results["prompt_budgeted_s"] = median_time(
+        lambda: render_compact_schema(schema), repeat
+    )
+    results["json_bytes"] = float(len(json.dumps(schema, indent=2)))
+    results["prompt_bytes"] = float(len(render_compact_schema(schema)))
+
+    elapsed = median_time(
+        lambda: query_kumquat(url, "SELECT * FROM bench_facts"), repeat
+    )
+    results["scan_rows_per_s"] = FACT_ROWS / elapsed
+
+    def point_queries() -> None:
+        for i in range(POINT_QUERIES):
+            query_kumquat(
+                url, "SELECT * FROM bench_facts WHERE id = :id", params={"id": i}
+            )
+
+    results["point_queries_per_s"] = POINT_QUERIES / median_time(point_queries, repeat)
+    return results
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Print a comparison, return the metrics that regressed beyond tolerance."""
+    regressions = []
+    for scale, metrics in current["results"].items():
+        base_metrics = baseline.get("results", {}).get(scale)
+        if not base_metrics:
+            continue
+        print(f"\n{scale} vs baseline")
+        for name, value in metrics.items():
+            base = base_metrics.get(name)
+            if not base or name.endswith("_bytes"):
+                continue
+            ratio = value / base
+            # Rates regress when they go down, durations when they go up.
+            worse = (
+                ratio < 1 - tolerance
+                if name.endswith("_per_s")
+                else ratio > 1 + tolerance
+            )
+            flag = "  REGRESSION" if worse else ""
+            print(f"  {name:<22} {base:>14.4g} -> {value:<14.4g} x{ratio:5.2f}{flag}")
+            if worse:
+                regressions.append(f"{scale}.{name}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scales", nargs="+", choices=list(SCALES), default=["small", "medium"]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mysql-url", type=str, default=None)
+    parser.add_argument("--output", type=str, help="Write results as JSON here")
+    parser.add_argument("--baseline", type=str, help="Compare with a saved run")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative slowdown before a metric counts as a regression",
+    )
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ[CACHE_DIR_ENV] = os.path.join(tmpdir, "cache")
+    report: dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "backend": "mysql" if args.mysql_url else "sqlite",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scales": {name: SCALES[name] for name in args.scales},
+        "results": {},
+    }
+    try:
+        for name in args.scales:
+            url = args.mysql_url or f"sqlite:///{os.path.join(tmpdir, name + '.db')}"
+            build_database(url, SCALES[name])
+            dispose_all()
+            results = run_scale(url, args.repeat)
+            report["results"][name] = results
+            print(f"{name} {SCALES[name]}")
+            for metric, value in results.items():
+                print(f"  {metric:<22} {value:>14.4g}")
+            dispose_all()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
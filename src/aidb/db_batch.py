@@ -0,0 +1,140 @@
+"""
+Run many independent queries with bounded concurrency.
+
+Each query gets its own pooled connection from the shared engine, results come
+back in input order and a failing or slow query only affects its own slot.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Mapping, Sequence, Union
+
+from sqlalchemy import Row
+
+from aidb.db_engine import DEFAULT_CONNECT_TIMEOUT, POOL_SIZE
+from aidb.db_kumquat import query_kumquat
+
+BatchQuery = Union[str, tuple[str, Mapping[str, Any]]]
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one query in a batch, exactly one of rows or error is set."""
+
+    sql: str
+    params: Mapping[str, Any] | None
+    rows: Sequence[Row[Any]] | None = None
+    error: BaseException | None = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _split(query: BatchQuery) -> tuple[str, Mapping[str, Any] | None]:
+    if isinstance(query, str):
+        return query, None
+    return query[0], query[1]
+
+
+def _run_one(
+    db_url: str, sql: str, params: Mapping[str, Any] | None, timeout: int | None
+) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        rows = query_kumquat(db_url, sql, timeout=timeout, params=params)
+        return BatchResult(sql, params, rows=rows, elapsed=time.perf_counter() - start)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return BatchResult(sql, params, error=e, elapsed=time.perf_counter() - start)
+
+
+def query_kumquat_batch(
+    db_url: str,
+    queries: Sequence[BatchQuery],
+    max_workers: int = POOL_SIZE,
+    query_timeout: float | None = None,
+    timeout: int | None = DEFAULT_CONNECT_TIMEOUT,
+) -> list[BatchResult]:
+    """Run queries (SQL strings or (sql, params) pairs) concurrently.
+
+    At most max_workers queries run at once and results are in input order. A
+    query still running query_timeout seconds after it started is reported as a
+    TimeoutError in its slot; the statement itself finishes in the background
+    since DBAPI calls can't be interrupted from another thread. Any other error
+    is likewise captured in its own BatchResult.
+    """
+    split = [_split(query) for query in queries]
+    started: dict[int, float] = {}
+
+    def task(index: int, sql: str, params: Mapping[str, Any] | None) -> BatchResult:
+        started[index] = time.monotonic()
+        return _run_one(db_url, sql, params, timeout)
+
+    results: list[BatchResult] = []
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = [
+            executor.submit(task, index, sql, params)
+            for index, (sql, params) in enumerate(split)
+        ]
+        for index, ((sql, params), future) in enumerate(zip(split, futures)):
+            if query_timeout is None:
+                wait([future])
+            while query_timeout is not None and not future.done():
+                # The clock for a query starts when a worker picks it up.
+                start = started.get(index)
+                remaining = (
+                    query_timeout
+                    if start is None
+                    else start + query_timeout - time.monotonic()
+                )
+                wait([future], timeout=max(0.0, remaining))
+                if start is not None and remaining <= 0:
+                    break
+            if future.done():
+                results.append(future.result())
+            else:
+                future.cancel()
+                results.append(
+                    BatchResult(
+                        sql, params, error=TimeoutError(f"Query timed out: {sql}")
+                    )
+                )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+async def query_kumquat_batch_async(
+    db_url: str,
+    queries: Sequence[BatchQuery],
+    max_workers: int = POOL_SIZE,
+    query_timeout: float | None = None,
+    timeout: int | None = DEFAULT_CONNECT_TIMEOUT,
+) -> list[BatchResult]:
+    """asyncio variant of query_kumquat_batch for embedding in services.
+
+    Like there, a timed out query keeps running in its thread, and keeps its
+    slot until it finishes so at most max_workers statements run at once.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def run(query: BatchQuery) -> BatchResult:
+        sql, params = _split(query)
+        await semaphore.acquire()
+        worker = asyncio.ensure_future(
+            asyncio.to_thread(_run_one, db_url, sql, params, timeout)
+        )
+        worker.add_done_callback(lambda _: semaphore.release())
+        try:
+            # shield() so the timeout only stops waiting, not the worker.
+            return await asyncio.wait_for(asyncio.shield(worker), timeout=query_timeout)
+        except asyncio.TimeoutError:
+            return BatchResult(
+                sql, params, error=TimeoutError(f"Query timed out: {sql}")
+            )
+
+    return list(await asyncio.gather(*(run(query) for query in queries)))
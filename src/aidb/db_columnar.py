@@ -0,0 +1,279 @@
+"""
+Columnar result mode for query_kumquat.
+
+Rows are read straight from the DBAPI cursor in batches and appended to one typed
+array per column, so a million-row numeric result costs 8 bytes per cell instead
+of a Row object per row plus a Python object per cell. Strings are packed into a
+single buffer with an offsets array. DECIMAL columns stay exact Decimal objects
+unless decimals_as_float asks for the (lossy) float64 array.
+"""
+
+import decimal
+import itertools
+from array import array
+from typing import Any, Iterable, Mapping, Sequence
+
+from aidb.db_engine import DEFAULT_CONNECT_TIMEOUT, connect_timeout_args, get_engine
+from aidb.db_kumquat import compiled_text
+
+# PyMySQL FIELD_TYPE codes, other drivers (e.g. sqlite3) report None and the
+# kind is inferred from the first non-null value instead.
+_INT_TYPE_CODES = frozenset({1, 2, 3, 8, 9, 13})
+_FLOAT_TYPE_CODES = frozenset({4, 5})
+_DECIMAL_TYPE_CODES = frozenset({0, 246})
+
+
+class StringColumn:
+    """Strings (or bytes) packed into one buffer, row i is data[offsets[i]:offsets[i + 1]]."""
+
+    __slots__ = ("offsets", "data", "binary")
+
+    def __init__(self, binary: bool = False) -> None:
+        self.offsets = array("q", [0])
+        self.data = bytearray()
+        self.binary = binary
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str | bytes:
+        if index < 0:
+            index += len(self)
+        raw = bytes(self.data[self.offsets[index] : self.offsets[index + 1]])
+        return raw if self.binary else raw.decode("utf-8")
+
+    def extend(self, values: Iterable[Any]) -> None:
+        if self.binary:
+            encoded = [b"" if value is None else bytes(value) for value in values]
+        else:
+            encoded = [
+                b"" if value is None else str(value).encode("utf-8") for value in values
+            ]
+        ends = itertools.accumulate(
+            (len(item) for item in encoded), initial=self.offsets[-1]
+        )
+        self.offsets.extend(itertools.islice(ends, 1, None))
+        self.data += b"".join(encoded)
+
+    def to_list(self) -> list[str | bytes]:
+        return [self[i] for i in range(len(self))]
+
+
+class _ColumnBuilder:
+    __slots__ = ("kind", "values", "nulls", "length", "decimals_as_float")
+
+    def __init__(self, type_code: Any, decimals_as_float: bool = False) -> None:
+        self.kind: str | None = None
+        self.decimals_as_float = decimals_as_float
+        if type_code in _INT_TYPE_CODES:
+            self.kind = "q"
+        elif type_code in _FLOAT_TYPE_CODES:
+            self.kind = "d"
+        elif type_code in _DECIMAL_TYPE_CODES:
+            self.kind = "d" if decimals_as_float else "object"
+        self.values: Any = None
+        if self.kind == "object":
+            self.values = []
+        elif self.kind is not None:
+            self.values = array(self.kind)
+        self.nulls: bytearray | None = None
+        self.length = 0
+
+    def _infer(self, values: Sequence[Any]) -> None:
+        sample = next((value for value in values if value is not None), None)
+        if sample is None:
+            return
+        if isinstance(sample, bool):
+            self.kind = "object"
+        elif isinstance(sample, int):
+            self.kind = "q"
+        elif isinstance(sample, float):
+            self.kind = "d"
+        elif isinstance(sample, decimal.Decimal) and self.decimals_as_float:
+            self.kind = "d"
+        elif isinstance(sample, str):
+            self.kind = "str"
+        elif isinstance(sample, (bytes, bytearray)):
+            self.kind = "bytes"
+        else:
+            self.kind = "object"
+        if self.kind in ("q", "d"):
+            self.values = array(self.kind, bytes(8 * self.length))
+        elif self.kind in ("str", "bytes"):
+            self.values = StringColumn(binary=self.kind == "bytes")
+            self.values.extend([None] * self.length)
+        else:
+            self.values = [None] * self.length
+
+    def _demote(self) -> None:
+        """Fall back to a plain list when values don't fit the typed array."""
+        values = (
+            self.values.to_list()
+            if self.kind in ("str", "bytes")
+            else list(self.values)
+        )
+        if self.nulls is not None:
+            values = [
+                None if null else value for value, null in zip(values, self.nulls)
+            ]
+        self.kind, self.values, self.nulls = "object", values, None
+
+    def extend(self, values: Sequence[Any]) -> None:
+        if self.kind is None:
+            self._infer(values)
+            if self.kind is None:
+                # All nulls so far, nothing to infer from yet.
+                self.nulls = (self.nulls or bytearray()) + b"\x01" * len(values)
+                self.length += len(values)
+                return
+        if self.kind == "object":
+            self.values.extend(values)
+            self.length += len(values)
+            return
+        has_nulls = None in values
+        if has_nulls or self.nulls is not None:
+            if self.nulls is None:
+                self.nulls = bytearray(self.length)
+            self.nulls += bytes(value is None for value in values)
+        try:
+            if self.kind in ("str", "bytes"):
+                self.values.extend(values)
+            elif has_nulls:
+                self.values.extend(0 if value is None else value for value in values)
+            else:
+                self.values.extend(values)
+        except (TypeError, OverflowError) as e:
+            if isinstance(self.values, array):
+                del self.values[self.length :]
+            # An int beyond int64 would lose digits as a float, floats would not.
+            self._widen(values, to_float=isinstance(e, TypeError))
+        self.length += len(values)
+
+    def _widen(self, values: Sequence[Any], to_float: bool = True) -> None:
+        """Retry a batch that didn't fit: with to_float ints become floats,
+        anything else a list."""
+        if self.kind == "q" and to_float:
+            try:
+                widened = array("d", self.values)
+                widened.extend(0.0 if value is None else value for value in values)
+                self.kind, self.values = "d", widened
+                return
+            except (TypeError, OverflowError):
+                pass
+        if self.nulls is not None:
+            del self.nulls[self.length :]
+        self._demote()
+        self.values.extend(values)
+
+    def finish(self) -> Any:
+        if self.kind is None:
+            return [None] * self.length
+        return self.values
+
+
+class ColumnarResult:
+    """Query result stored column by column.
+
+    columns maps each name to an array.array ("q" ints, "d" floats), a
+    StringColumn or, for anything else, a list. nulls holds a byte mask
+    (1 = NULL) for typed columns that contained NULLs.
+    """
+
+    __slots__ = ("names", "columns", "nulls", "num_rows")
+
+    def __init__(
+        self,
+        names: list[str],
+        columns: dict[str, Any],
+        nulls: dict[str, bytearray],
+        num_rows: int,
+    ) -> None:
+        self.names = names
+        self.columns = columns
+        self.nulls = nulls
+        self.num_rows = num_rows
+
+    def to_numpy(self) -> dict[str, Any]:
+        """Convert to NumPy arrays without copying numeric data; requires numpy."""
+        import numpy as np  # pylint: disable=import-outside-toplevel,import-error
+
+        out: dict[str, Any] = {}
+        for name in self.names:
+            column = self.columns[name]
+            if isinstance(column, array):
+                values = np.frombuffer(
+                    column, dtype=np.int64 if column.typecode == "q" else np.float64
+                )
+                if name in self.nulls:
+                    values = np.ma.masked_array(
+                        values, mask=np.frombuffer(self.nulls[name], dtype=np.bool_)
+                    )
+            elif isinstance(column, StringColumn):
+                values = np.array(column.to_list(), dtype=object)
+            else:
+                values = np.array(column, dtype=object)
+            out[name] = values
+        return out
+
+
+def query_kumquat_columnar(
+    db_url: str,
+    sql: str,
+    params: Mapping[str, Any] | None = None,
+    batch_size: int = 10_000,
+    timeout: int | None = DEFAULT_CONNECT_TIMEOUT,
+    *,
+    decimals_as_float: bool = False,
+) -> ColumnarResult:
+    """Run a query and return its result column by column, see ColumnarResult.
+
+    Rows are fetched from the DBAPI cursor batch_size at a time (a server-side
+    SSCursor on MySQL), so no Row objects are created and at most one batch of
+    row tuples is alive at a time. DECIMAL columns are lists of Decimal, with
+    decimals_as_float they are float64 arrays and lose precision.
+    """
+    engine = get_engine(db_url, connect_timeout_args(db_url, timeout))
+    compiled = compiled_text(sql).compile(dialect=engine.dialect)
+    bound = compiled.construct_params(params or {})
+    args: Any = (
+        tuple(bound[name] for name in compiled.positiontup or ())
+        if compiled.positional
+        else bound
+    )
+    with engine.connect() as conn:
+        dbapi_conn: Any = conn.connection.dbapi_connection
+        if engine.dialect.name == "mysql":
+            from pymysql.cursors import (  # pylint: disable=import-outside-toplevel
+                SSCursor,
+            )
+
+            cursor = dbapi_conn.cursor(SSCursor)
+        else:
+            cursor = dbapi_conn.cursor()
+        try:
+            cursor.execute(compiled.string, args)
+            names = [column[0] for column in cursor.description or ()]
+            builders = [
+                _ColumnBuilder(column[1], decimals_as_float)
+                for column in cursor.description or ()
+            ]
+            num_rows = 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for builder, values in zip(builders, zip(*rows)):
+                    builder.extend(values)
+                num_rows += len(rows)
+        finally:
+            cursor.close()
+    return ColumnarResult(
+        names,
+        {name: builder.finish() for name, builder in zip(names, builders)},
+        {
+            name: builder.nulls
+            for name, builder in zip(names, builders)
+            if builder.nulls is not None and builder.kind != "object"
+        },
+        num_rows,
+    )
@@ -1,99 +1,475 @@
 # flake8: noqa: W503
+# SQLAlchemy (and the modules built on it) are imported where they are used so
+# that importing this module, or running it with --help, stays fast.
+# pylint: disable=import-outside-toplevel
+
+from __future__ import annotations
 
 import argparse
 import json
-from typing import Any
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, TYPE_CHECKING, Any, Iterable, Iterator
 
-from sqlalchemy import CheckConstraint, MetaData, create_engine, inspect
+from aidb.profiling import profile_to, span
+from aidb.schema_diff import diff_schemas, format_schema_diff
 
+if TYPE_CHECKING:
+    from sqlalchemy import Engine, Inspector, Table
 
-def db_dump_table_schema_json(
-    connection_string: str,
-    tables: list[str] | None = None,
+# Smaller chunks than one per worker keep the pool busy when table sizes vary.
+_CHUNKS_PER_WORKER = 4
+# Tables reflected per round trip when streaming, see iter_table_schemas.
+DEFAULT_STREAM_CHUNK_SIZE = 50
+
+
+def _table_info(table: Table, inspector: Inspector) -> dict[str, Any]:
+    from sqlalchemy import CheckConstraint
+
+    table_info: dict[str, Any] = {
+        "columns": [],
+        "primary_key": [col.name for col in table.primary_key.columns],
+        "indexes": [],
+        "foreign_keys": [],
+        "check_constraints": [],
+        "table_comment": table.comment if hasattr(table, "comment") else None,
+        "partitions": [],
+    }
+
+    # Add column information
+    for column in table.columns:
+        column_info = {
+            "column_name": column.name,
+            "data_type": str(column.type),
+            "is_nullable": "YES" if column.nullable else "NO",
+            "default": (
+                str(column.server_default.arg)  # type: ignore[attr-defined]
+                if column.server_default is not None
+                else (
+                    str(column.default.arg)  # type: ignore[attr-defined]
+                    if column.default is not None
+                    else None
+                )
+            ),
+            "is_primary_key": column.primary_key,
+            "comment": column.comment if hasattr(column, "comment") else None,
+        }
+        table_info["columns"].append(column_info)
+
+    # Add index information
+    for index in sorted(table.indexes, key=lambda index: index.name or ""):
+        index_info = {
+            "name": index.name,
+            "unique": index.unique,
+            "columns": [col.name for col in index.columns],
+        }
+        table_info["indexes"].append(index_info)
+
+    # Add foreign key information
+    for fk in sorted(table.foreign_keys, key=lambda fk: fk.parent.name):
+        # From the spec rather than fk.column, the target may not be reflected.
+        ref_table, ref_column = fk.target_fullname.split(".")[-2:]
+        fk_info = {
+            "column": fk.parent.name,
+            "references": {"table": ref_table, "column": ref_column},
+        }
+        table_info["foreign_keys"].append(fk_info)
+
+    # Add check constraints
+    for constraint in table.constraints:
+        if isinstance(constraint, CheckConstraint):
+            check_info = {
+                "name": constraint.name,
+                "sqltext": str(constraint.sqltext),
+            }
+            table_info["check_constraints"].append(check_info)
+
+    # Add partition information if available
+    if hasattr(inspector, "get_partitions"):
+        partitions = inspector.get_partitions(table.name)
+        if partitions:
+            table_info["partitions"] = partitions
+
+    return table_info
+
+
+def _reflect_chunk(
+    engine: Engine, tables: list[str] | None, resolve_fks: bool = True
 ) -> dict[str, dict[str, Any]]:
-    """Dump the schema of the specified tables in the database using a bulk operation."""
-    engine = create_engine(connection_string)
+    from sqlalchemy import MetaData, inspect
+
     metadata = MetaData()
-    metadata.reflect(engine, only=tables)
+    with engine.connect() as conn:
+        with span("reflect.metadata") as s:
+            metadata.reflect(conn, only=tables, resolve_fks=resolve_fks)
+            s.set(tables=len(metadata.tables))
+        inspector = inspect(conn)
+        out = {}
+        for table_name, table in metadata.tables.items():
+            with span("reflect.table", table=table_name):
+                out[table_name] = _table_info(table, inspector)
+        return out
+
+
+def _reflect_chunks(
+    executor: ThreadPoolExecutor, engine: Engine, names: list[str], workers: int
+) -> dict[str, dict[str, Any]]:
+    """Reflect exactly names, split in chunks over executor's threads."""
+    chunk_size = max(1, math.ceil(len(names) / (workers * _CHUNKS_PER_WORKER)))
+    chunks = [names[i : i + chunk_size] for i in range(0, len(names), chunk_size)]
+    out: dict[str, dict[str, Any]] = {}
+    for chunk_out in executor.map(
+        lambda chunk: _reflect_chunk(engine, chunk, resolve_fks=False), chunks
+    ):
+        out.update(chunk_out)
+    return out
+
+
+def _reflect_sqlalchemy(
+    engine: Engine, tables: list[str] | None, workers: int | None = None
+) -> dict[str, dict[str, Any]]:
+    """Reflect tables through MetaData.reflect(), works for any dialect.
 
+    With workers > 1 the tables are split into chunks that are reflected
+    concurrently on the engine's connection pool, the output order is the same.
+    workers is capped at the pool's capacity, more threads would only wait for
+    a connection.
+    """
+    from sqlalchemy import inspect
+
+    from aidb.db_engine import MAX_OVERFLOW, POOL_SIZE
+
+    names = inspect(engine).get_table_names()
+    available = set(names)
     if tables is not None:
-        missing_tables = [table for table in tables if table not in metadata.tables]
+        missing_tables = [table for table in tables if table not in available]
         if missing_tables:
             raise ValueError(
                 f"Requested table(s) not available in the database: {', '.join(missing_tables)}"
             )
+        names = list(dict.fromkeys(tables))
 
-    out: dict[str, dict[str, Any]] = {"tables": {}}
-
-    for table_name, table in metadata.tables.items():
-        table_info: dict[str, Any] = {
-            "columns": [],
-            "primary_key": [col.name for col in table.primary_key.columns],
-            "indexes": [],
-            "foreign_keys": [],
-            "check_constraints": [],
-            "table_comment": table.comment if hasattr(table, "comment") else None,
-            "partitions": [],
-        }
+    workers = min(workers or 1, POOL_SIZE + MAX_OVERFLOW)
+    if workers <= 1 or len(names) <= 1:
+        out = _reflect_chunk(engine, tables)
+    else:
+        # Chunks don't follow foreign keys, the referenced tables are reflected
+        # once in a later round instead of again in every chunk that needs them.
+        out = {}
+        pending = names
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while pending:
+                out.update(_reflect_chunks(executor, engine, pending, workers))
+                referenced = {
+                    fk["references"]["table"]
+                    for name in pending
+                    for fk in out[name]["foreign_keys"]
+                }
+                pending = sorted((referenced & available) - set(out))
 
-        # Add column information
-        for column in table.columns:
-            column_info = {
-                "column_name": column.name,
-                "data_type": str(column.type),
-                "is_nullable": "YES" if column.nullable else "NO",
-                "default": (
-                    str(column.server_default.arg)  # type: ignore[attr-defined]
-                    if column.server_default is not None
-                    else (
-                        str(column.default.arg)  # type: ignore[attr-defined]
-                        if column.default is not None
-                        else None
-                    )
-                ),
-                "is_primary_key": column.primary_key,
-                "comment": column.comment if hasattr(column, "comment") else None,
-            }
-            table_info["columns"].append(column_info)
-
-        # Add index information
-        for index in table.indexes:
-            index_info = {
-                "name": index.name,
-                "unique": index.unique,
-                "columns": [col.name for col in index.columns],
-            }
-            table_info["indexes"].append(index_info)
+    # Requested tables in request order, then the ones pulled in by foreign keys.
+    ordered = {name: out[name] for name in names if name in out}
+    for table_name in sorted(out):
+        ordered.setdefault(table_name, out[table_name])
+    return ordered
 
-        # Add foreign key information
-        for fk in table.foreign_keys:
-            fk_info = {
-                "column": fk.parent.name,
-                "references": {"table": fk.column.table.name, "column": fk.column.name},
-            }
-            table_info["foreign_keys"].append(fk_info)
-
-        # Add check constraints
-        for constraint in table.constraints:
-            if isinstance(constraint, CheckConstraint):
-                check_info = {
-                    "name": constraint.name,
-                    "sqltext": str(constraint.sqltext),
-                }
-                table_info["check_constraints"].append(check_info)
 
-        # Add partition information if available
-        inspector = inspect(engine)
-        if hasattr(inspector, "get_partitions"):
-            partitions = inspector.get_partitions(table_name)
-            if partitions:
-                table_info["partitions"] = partitions
+def _reflect(
+    engine: Engine, tables: list[str] | None, workers: int | None = None
+) -> dict[str, dict[str, Any]]:
+    from sqlalchemy import exc
 
-        out["tables"][table_name] = table_info
+    from aidb.db_reflect_mysql import reflect_mysql_schema
 
+    if engine.dialect.name == "mysql":
+        # Connecting happens outside the try, an unreachable server should fail
+        # once instead of timing out a second time in the fallback.
+        with span("reflect.mysql_bulk") as s, engine.connect() as conn:
+            try:
+                out = reflect_mysql_schema(conn, tables)
+                s.set(tables=len(out))
+                return out
+            except exc.DBAPIError as e:
+                if e.connection_invalidated:
+                    raise
+    with span("reflect.sqlalchemy", workers=workers or 1) as s:
+        out = _reflect_sqlalchemy(engine, tables, workers)
+        s.set(tables=len(out))
+        return out
+
+
+def _refresh_changed_tables(
+    engine: Engine,
+    tables: list[str] | None,
+    old_tables: dict[str, dict[str, Any]],
+    old_fingerprints: dict[str, str],
+    fingerprints: dict[str, str],
+    *,
+    workers: int | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Re-reflect only the tables whose fingerprint changed and merge the rest."""
+    if tables is not None:
+        missing_tables = [table for table in tables if table not in fingerprints]
+        if missing_tables:
+            raise ValueError(
+                f"Requested table(s) not available in the database: {', '.join(missing_tables)}"
+            )
+        scope = list(old_tables) + [name for name in tables if name not in old_tables]
+    else:
+        scope = list(fingerprints)
+
+    stale = [
+        name
+        for name in scope
+        if name in fingerprints
+        and (name not in old_tables or old_fingerprints.get(name) != fingerprints[name])
+    ]
+    reflected = _reflect(engine, stale, workers) if stale else {}
+
+    out: dict[str, dict[str, Any]] = {}
+    for name in scope:
+        if name not in fingerprints:
+            continue  # dropped since the last snapshot
+        out[name] = reflected[name] if name in reflected else old_tables[name]
+    # Tables newly pulled in through foreign keys of the re-reflected ones.
+    for name, table_info in reflected.items():
+        out.setdefault(name, table_info)
     return out
 
 
+def db_refresh_schema_snapshot(
+    connection_string: str,
+    tables: list[str] | None = None,
+    refresh: bool = False,
+    workers: int | None = None,
+) -> tuple[dict[str, Any] | None, dict[str, Any]]:
+    """Bring the cached schema snapshot up to date, return (previous, current).
+
+    Only tables whose per-table fingerprint changed since the last snapshot are
+    reflected again, refresh discards the snapshot and reflects everything.
+    previous is None when there was no usable snapshot.
+    """
+    from aidb.db_engine import connect_timeout_args, get_engine
+    from aidb.schema_cache import (
+        cache_key,
+        load_cached_entry,
+        schema_fingerprint,
+        store_cached_schema,
+        table_fingerprints,
+    )
+
+    engine = get_engine(connection_string, connect_timeout_args(connection_string))
+    with span("schema.fingerprint"):
+        fingerprint = schema_fingerprint(engine)
+    if fingerprint is None:
+        return None, {"tables": _reflect(engine, tables, workers)}
+
+    key = cache_key(connection_string, tables)
+    with span("schema.cache_load") as s:
+        entry = None if refresh else load_cached_entry(key)
+        s.set(hits=int(entry is not None))
+    previous: dict[str, Any] | None = entry.get("schema") if entry else None
+    if entry is not None and previous is not None:
+        if entry.get("fingerprint") == fingerprint:
+            return previous, previous
+
+    with span("schema.table_fingerprints"):
+        fingerprints = table_fingerprints(engine)
+    old_fingerprints = entry.get("table_fingerprints") if entry else None
+    if previous is None or fingerprints is None or old_fingerprints is None:
+        current = {"tables": _reflect(engine, tables, workers)}
+    else:
+        current = {
+            "tables": _refresh_changed_tables(
+                engine,
+                tables,
+                previous["tables"],
+                old_fingerprints,
+                fingerprints,
+                workers=workers,
+            )
+        }
+
+    scope_fingerprints = None
+    if fingerprints is not None:
+        scope_fingerprints = {
+            name: fingerprints[name]
+            for name in current["tables"]
+            if name in fingerprints
+        }
+    with span("schema.cache_store"):
+        store_cached_schema(key, fingerprint, current, scope_fingerprints)
+    return previous, current
+
+
+def db_dump_table_schema_json(
+    connection_string: str,
+    tables: list[str] | None = None,
+    *,
+    use_cache: bool = False,
+    refresh: bool = False,
+    workers: int | None = None,
+    stats: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Dump the schema of the specified tables in the database using a bulk operation.
+
+    MySQL databases are reflected with a few bulk information_schema queries, other
+    dialects (or a MySQL server that refuses those queries) go through SQLAlchemy.
+    With use_cache the result is stored on disk and kept up to date incrementally,
+    see db_refresh_schema_snapshot, refresh forces a new reflection. workers > 1
+    reflects tables concurrently when going through SQLAlchemy. stats adds size
+    estimates to each table, see table_stats.
+    """
+    from aidb.db_engine import connect_timeout_args, get_engine
+    from aidb.table_stats import attach_table_stats, load_table_stats
+
+    with span("db_dump_table_schema_json", cached=use_cache) as s:
+        if use_cache:
+            _, current = db_refresh_schema_snapshot(
+                connection_string, tables=tables, refresh=refresh, workers=workers
+            )
+        else:
+            engine = get_engine(
+                connection_string, connect_timeout_args(connection_string)
+            )
+            current = {"tables": _reflect(engine, tables, workers)}
+        if stats:
+            # Kept out of the schema cache, the estimates go stale much sooner.
+            attach_table_stats(current, load_table_stats(connection_string, refresh))
+        s.set(tables=len(current["tables"]))
+        return current
+
+
+def iter_table_schemas(
+    connection_string: str,
+    tables: list[str] | None = None,
+    chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+    workers: int | None = None,
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield (table name, table info) reflecting chunk_size tables at a time.
+
+    Only one chunk is held in memory, so a catalog of any size can be written out
+    as it is reflected. Requested tables come first in request order, then the
+    tables their foreign keys reference, like db_dump_table_schema_json. The
+    on-disk cache is not used since it would need the whole schema at once.
+    chunk_size below 1 is treated as 1.
+    """
+    from aidb.db_engine import connect_timeout_args, get_engine
+
+    chunk_size = max(1, chunk_size)
+    engine = get_engine(connection_string, connect_timeout_args(connection_string))
+    with span("schema.table_names"):
+        comments = _mysql_table_comments(engine)
+        names = list(comments) if comments is not None else _table_names(engine)
+    available = set(names)
+    if tables is None:
+        pending = names
+    else:
+        missing_tables = [table for table in tables if table not in available]
+        if missing_tables:
+            raise ValueError(
+                f"Requested table(s) not available in the database: {', '.join(missing_tables)}"
+            )
+        pending = list(dict.fromkeys(tables))
+
+    emitted: set[str] = set()
+    while pending:
+        referenced: set[str] = set()
+        for i in range(0, len(pending), chunk_size):
+            chunk = pending[i : i + chunk_size]
+            with span("stream.chunk", tables=len(chunk)):
+                reflected = _reflect_tables(engine, chunk, comments, workers)
+            for name in chunk:
+                emitted.add(name)
+                yield name, reflected[name]
+                # Only the names are kept, referenced tables are reflected in turn.
+                referenced.update(
+                    fk["references"]["table"] for fk in reflected[name]["foreign_keys"]
+                )
+        pending = sorted((referenced & available) - emitted)
+
+
+def _mysql_table_comments(engine: Engine) -> dict[str, str | None] | None:
+    """Table comments by name on MySQL, None elsewhere or without information_schema."""
+    from sqlalchemy import exc
+
+    from aidb.db_reflect_mysql import table_comments
+
+    if engine.dialect.name != "mysql":
+        return None
+    with engine.connect() as conn:
+        try:
+            return table_comments(conn)
+        except exc.DBAPIError as e:
+            if e.connection_invalidated:
+                raise
+            return None
+
+
+def _table_names(engine: Engine) -> list[str]:
+    from sqlalchemy import inspect
+
+    return inspect(engine).get_table_names()
+
+
+def _reflect_tables(
+    engine: Engine,
+    tables: list[str],
+    comments: dict[str, str | None] | None,
+    workers: int | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Reflect exactly tables, which are known to exist, without their foreign keys.
+
+    comments comes from _mysql_table_comments, None goes through SQLAlchemy.
+    """
+    from aidb.db_engine import MAX_OVERFLOW, POOL_SIZE
+    from aidb.db_reflect_mysql import reflect_mysql_schema
+
+    if comments is not None:
+        with span("reflect.mysql_bulk", tables=len(tables)), engine.connect() as conn:
+            return reflect_mysql_schema(
+                conn, tables, comments=comments, follow_fks=False
+            )
+    workers = min(workers or 1, POOL_SIZE + MAX_OVERFLOW)
+    with span("reflect.sqlalchemy", workers=workers, tables=len(tables)):
+        if workers <= 1 or len(tables) <= 1:
+            return _reflect_chunk(engine, tables, resolve_fks=False)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return _reflect_chunks(executor, engine, tables, workers)
+
+
+def write_schema_json(items: Iterable[tuple[str, dict[str, Any]]], out: IO[str]) -> int:
+    """Write items as the indented {"tables": ...} document, one table at a time.
+
+    The output is identical to json.dumps(schema, indent=2). Returns the number
+    of tables written.
+    """
+    count = 0
+    for name, table_info in items:
+        out.write('{\n  "tables": {\n' if count == 0 else ",\n")
+        # json.dumps escapes newlines inside strings, so this only re-indents.
+        body = json.dumps(table_info, indent=2).replace("\n", "\n    ")
+        out.write(f"    {json.dumps(name)}: {body}")
+        count += 1
+    out.write("\n  }\n}\n" if count else '{\n  "tables": {}\n}\n')
+    return count
+
+
+def write_schema_ndjson(
+    items: Iterable[tuple[str, dict[str, Any]]], out: IO[str]
+) -> int:
+    """Write one {"table": name, **table_info} object per line, for jq and friends.
+
+    Returns the number of tables written.
+    """
+    count = 0
+    for name, table_info in items:
+        out.write(json.dumps({"table": name, **table_info}) + "\n")
+        count += 1
+    return count
+
+
 def create_args() -> argparse.Namespace:
     """Create an argument parser."""
     parser = argparse.ArgumentParser(
@@ -103,7 +479,6 @@ def create_args() -> argparse.Namespace:
         "connection_string",
         type=str,
         help="Database connection string",
-        required=True,
     )
     parser.add_argument(
         "--tables",
@@ -115,22 +490,112 @@ def create_args() -> argparse.Namespace:
         action="store_true",
         help="Dump schema for all tables in the database.",
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore the cached schema and reflect the database again.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the on-disk schema cache.",
+    )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="Print the tables and columns that changed since the cached snapshot.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Reflect tables concurrently on this many connections (non-MySQL).",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Add estimated row counts, data size and index cardinality per table.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write each table as soon as it is reflected instead of building the "
+        "whole schema first, skips the cache.",
+    )
+    parser.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="Stream one json object per table per line, implies --stream.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_STREAM_CHUNK_SIZE,
+        help="Tables reflected at a time when streaming.",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        metavar="PATH",
+        help="Write the schema to PATH instead of stdout.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="PATH",
+        help="Write a Chrome trace of where the time went to PATH and print a summary.",
+    )
     return parser.parse_args()
 
 
+def _serialize(schema: dict[str, Any]) -> str:
+    with span("serialize") as s:
+        schema_str = json.dumps(schema, indent=2)
+        s.set(bytes=len(schema_str))
+        return schema_str
+
+
 def main() -> int:
     """Return 0 for success."""
     args = create_args()
+    with profile_to(args.profile):
+        return _dump(args)
+
+
+def _stream(args: argparse.Namespace, tables: list[str] | None) -> None:
+    items = iter_table_schemas(
+        args.connection_string,
+        tables=tables,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    )
+    write = write_schema_ndjson if args.ndjson else write_schema_json
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            write(items, f)
+    else:
+        write(items, sys.stdout)
+
+
+def _dump(args: argparse.Namespace) -> int:
     connection_string = args.connection_string
-    schema_str = ""
+    use_cache = not args.no_cache
     try:
-        if args.tables:
-            table_names = [name.strip() for name in args.tables.split(",")]
-            schema = db_dump_table_schema_json(
-                connection_string=connection_string, tables=table_names
+        if args.diff:
+            tables = (
+                [name.strip() for name in args.tables.split(",")]
+                if args.tables
+                else None
             )
-            schema_str = json.dumps(schema, indent=2)
-
+            previous, current = db_refresh_schema_snapshot(
+                connection_string=connection_string,
+                tables=tables,
+                workers=args.workers,
+            )
+            print(format_schema_diff(diff_schemas(previous, current)))
+            return 0
+        if args.tables:
+            tables = [name.strip() for name in args.tables.split(",")]
         else:
             user_input = input(
                 "Enter the table names to dump (comma-separated) or '*' for all tables: "
@@ -138,11 +603,28 @@ def main() -> int:
             if user_input == "":
                 raise ValueError("No table names provided.")
             tables = user_input.split(",") if user_input != "*" else None
-            schema = db_dump_table_schema_json(
-                connection_string=connection_string, tables=tables
-            )
-            schema_str = json.dumps(schema, indent=2)
-        print(schema_str)
+        if args.stream or args.ndjson:
+            try:
+                _stream(args, tables)
+            except ValueError as e:
+                # stdout may already hold part of the document.
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+            return 0
+        schema = db_dump_table_schema_json(
+            connection_string=connection_string,
+            tables=tables,
+            use_cache=use_cache,
+            refresh=args.refresh,
+            workers=args.workers,
+            stats=args.stats,
+        )
+        schema_str = _serialize(schema)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(schema_str + "\n")
+        else:
+            print(schema_str)
         return 0
     except ValueError as e:
         print(f"Error: {e}")
@@ -0,0 +1,79 @@
+"""
+Process-wide registry of pooled SQLAlchemy engines.
+
+Creating an engine per query means a new TCP/TLS/auth handshake every time, so
+engines are shared by sanitized url and connect args and disposed at exit.
+"""
+
+import atexit
+import threading
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, make_url
+
+# Shared by reflection and queries so both land on the same engine.
+DEFAULT_CONNECT_TIMEOUT = 5 * 60
+POOL_SIZE = 5
+MAX_OVERFLOW = 5
+# MySQL drops idle connections after wait_timeout (8h default, often far less
+# behind proxies), so recycle well before that.
+POOL_RECYCLE = 30 * 60
+
+_ENGINES: dict[tuple[str, tuple[tuple[str, Any], ...]], Engine] = {}
+_LOCK = threading.Lock()
+
+
+def sanitize_db_url(db_url: str) -> str:
+    db_url = db_url.replace("?ssl-mode=REQUIRED", "")
+    # Only the scheme, "mysql+pymysql://" ends in "mysql://" as well.
+    if db_url.startswith("mysql://"):
+        db_url = "mysql+pymysql://" + db_url[len("mysql://") :]
+    return db_url
+
+
+def connect_timeout_args(
+    db_url: str, timeout: int | None = DEFAULT_CONNECT_TIMEOUT
+) -> dict[str, Any]:
+    """Connect args that apply a connect timeout for the url's driver."""
+    if timeout is None:
+        return {}
+    backend = make_url(sanitize_db_url(db_url)).get_backend_name()
+    if backend == "sqlite":
+        return {"timeout": timeout}
+    if backend in ("mysql", "mariadb", "postgresql"):
+        return {"connect_timeout": timeout}
+    return {}
+
+
+def get_engine(db_url: str, connect_args: dict[str, Any] | None = None) -> Engine:
+    """Return the shared engine for db_url, creating it on first use."""
+    db_url = sanitize_db_url(db_url)
+    connect_args = connect_args or {}
+    key = (db_url, tuple(sorted(connect_args.items())))
+    with _LOCK:
+        engine = _ENGINES.get(key)
+        if engine is None:
+            kwargs: dict[str, Any] = {
+                "connect_args": connect_args,
+                "pool_pre_ping": True,
+                "pool_recycle": POOL_RECYCLE,
+            }
+            if make_url(db_url).get_backend_name() != "sqlite":
+                # SQLite picks its own pool class, which may not take these.
+                kwargs["pool_size"] = POOL_SIZE
+                kwargs["max_overflow"] = MAX_OVERFLOW
+            engine = create_engine(db_url, **kwargs)
+            _ENGINES[key] = engine
+        return engine
+
+
+def dispose_all() -> None:
+    """Close every pooled connection and forget all engines."""
+    with _LOCK:
+        engines = list(_ENGINES.values())
+        _ENGINES.clear()
+    for engine in engines:
+        engine.dispose()
+
+
+atexit.register(dispose_all)
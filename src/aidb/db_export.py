@@ -0,0 +1,254 @@
+"""
+Parallel, resumable table export.
+
+The table is split into primary key ranges that are pulled concurrently with
+keyset pagination (WHERE pk > :last ORDER BY pk LIMIT :n), so every query is an
+index range scan and memory is bounded by one chunk per worker. Each chunk is
+written to its own CSV/JSONL file and progress is recorded in a manifest so an
+interrupted export picks up where it stopped, exporting without resume removes
+the chunk files of the earlier run. Keys in the manifest are encoded with
+row_codec, a datetime or bytes key resumes as the same type. Bytes values are
+written as base64 in both formats.
+"""
+
+# Row._mapping and Row._fields are public SQLAlchemy API despite the underscore.
+# pylint: disable=protected-access
+
+import argparse
+import base64
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Sequence
+
+from sqlalchemy import Row
+
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.db_engine import connect_timeout_args, get_engine
+from aidb.db_kumquat import query_kumquat
+from aidb.row_codec import decode_value, encode_value
+
+FORMATS = ("csv", "jsonl")
+
+
+def _atomic_write(path: str, write: Any) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _text(value: Any) -> Any:
+    """value for a chunk file, bytes as base64 like row_codec writes them."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode()
+    return value
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _text(value)
+    return str(value)
+
+
+def _write_chunk(path: str, fmt: str, rows: Sequence[Row[Any]]) -> None:
+    def write(f: Any) -> None:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(rows[0]._fields)
+            writer.writerows([_text(value) for value in row] for row in rows)
+        else:
+            for row in rows:
+                f.write(json.dumps(dict(row._mapping), default=_json_default) + "\n")
+
+    _atomic_write(path, write)
+
+
+def _remove_chunks(out_dir: str, table: str) -> None:
+    """Delete the chunk files of an earlier export of table."""
+    pattern = re.compile(
+        rf"^{re.escape(table)}\.p\d{{4}}\.c\d{{6}}\.(?:{'|'.join(FORMATS)})$"
+    )
+    for name in os.listdir(out_dir):
+        if pattern.match(name):
+            os.unlink(os.path.join(out_dir, name))
+
+
+def _plan_partitions(
+    db_url: str, quoted_table: str, quoted_pk: str, partitions: int
+) -> list[dict[str, Any]]:
+    low, high = query_kumquat(
+        db_url, f"SELECT MIN({quoted_pk}), MAX({quoted_pk}) FROM {quoted_table}"
+    )[0]
+    if low is None:
+        return []
+    if not isinstance(low, int) or not isinstance(high, int):
+        # Non-integer keys can't be split by value, page through them in one go.
+        bounds: list[tuple[Any, Any]] = [(None, None)]
+    else:
+        step = max(1, -(-(high - low + 1) // partitions))
+        bounds = [
+            (start - 1, min(start + step - 1, high))
+            for start in range(low, high + 1, step)
+        ]
+    return [
+        {
+            "index": index,
+            "last_key": last_key,
+            "high": part_high,
+            "chunks": 0,
+            "rows": 0,
+            "done": False,
+        }
+        for index, (last_key, part_high) in enumerate(bounds)
+    ]
+
+
+def export_table(
+    db_url: str,
+    table: str,
+    out_dir: str,
+    *,
+    fmt: str = "jsonl",
+    partitions: int = 4,
+    chunk_rows: int = 50_000,
+    workers: int = 4,
+    resume: bool = True,
+) -> dict[str, Any]:
+    """Export table into chunk files under out_dir and return the manifest.
+
+    Requires a single-column primary key. With resume, partitions recorded as
+    done in an existing manifest are skipped and unfinished ones continue after
+    their last exported key.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}, expected one of {FORMATS}")
+    schema = db_dump_table_schema_json(db_url, tables=[table], use_cache=True)
+    primary_key = schema["tables"][table]["primary_key"]
+    if len(primary_key) != 1:
+        raise ValueError(
+            f"Table {table} needs a single-column primary key to export, has {primary_key}"
+        )
+    pk = primary_key[0]
+    engine = get_engine(db_url, connect_timeout_args(db_url))
+    quote = engine.dialect.identifier_preparer.quote
+    quoted_table, quoted_pk = quote(table), quote(pk)
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, f"{table}.manifest.json")
+    manifest: dict[str, Any] | None = None
+    if resume and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest is not None and (
+            manifest.get("primary_key") != pk or manifest.get("format") != fmt
+        ):
+            raise ValueError(
+                f"{manifest_path} was written for a different key or format, "
+                "remove it or export without resume"
+            )
+    if manifest is None:
+        # Starting over, chunks of an earlier run would otherwise be left behind.
+        _remove_chunks(out_dir, table)
+        manifest = {
+            "table": table,
+            "primary_key": pk,
+            "format": fmt,
+            "partitions": _plan_partitions(db_url, quoted_table, quoted_pk, partitions),
+        }
+    lock = threading.Lock()
+
+    def save_manifest() -> None:
+        _atomic_write(manifest_path, lambda f: json.dump(manifest, f, indent=2))
+
+    def export_partition(part: dict[str, Any]) -> None:
+        while not part["done"]:
+            conditions = []
+            params: dict[str, Any] = {"limit": chunk_rows}
+            if part["last_key"] is not None:
+                conditions.append(f"{quoted_pk} > :last_key")
+                params["last_key"] = decode_value(part["last_key"])
+            if part["high"] is not None:
+                conditions.append(f"{quoted_pk} <= :high")
+                params["high"] = decode_value(part["high"])
+            where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+            rows = query_kumquat(
+                db_url,
+                f"SELECT * FROM {quoted_table} {where}ORDER BY {quoted_pk} LIMIT :limit",
+                params=params,
+            )
+            if rows:
+                chunk_path = os.path.join(
+                    out_dir,
+                    f"{table}.p{part['index']:04d}.c{part['chunks']:06d}.{fmt}",
+                )
+                _write_chunk(chunk_path, fmt, rows)
+            with lock:
+                if rows:
+                    part["last_key"] = encode_value(rows[-1]._mapping[pk])
+                    part["chunks"] += 1
+                    part["rows"] += len(rows)
+                part["done"] = len(rows) < chunk_rows
+                save_manifest()
+
+    pending = [part for part in manifest["partitions"] if not part["done"]]
+    save_manifest()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        list(executor.map(export_partition, pending))
+    return manifest
+
+
+def create_args() -> argparse.Namespace:
+    """Create an argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Export a table into chunked CSV/JSONL files in parallel."
+    )
+    parser.add_argument(
+        "connection_string", type=str, help="Database connection string"
+    )
+    parser.add_argument("table", type=str, help="Table to export")
+    parser.add_argument("--out-dir", type=str, default=".", help="Output directory")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--partitions", type=int, default=4)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Start over instead of continuing from an existing manifest.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Return 0 for success."""
+    args = create_args()
+    try:
+        manifest = export_table(
+            args.connection_string,
+            args.table,
+            args.out_dir,
+            fmt=args.format,
+            partitions=args.partitions,
+            chunk_rows=args.chunk_rows,
+            workers=args.workers,
+            resume=not args.no_resume,
+        )
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("\nAborted, run again to resume.")
+        return 1
+    rows = sum(part["rows"] for part in manifest["partitions"])
+    print(f"Exported {rows} rows from {args.table} to {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,10 +2,31 @@
 DB Access functions.
 """
 
-from typing import Any, Sequence
+import functools
+from typing import TYPE_CHECKING, Any, Generator, Mapping, Sequence
 
-import sqlalchemy
-from sqlalchemy import Row, text
+from sqlalchemy import Row, TextClause, text
+
+from aidb.db_engine import DEFAULT_CONNECT_TIMEOUT, connect_timeout_args, get_engine
+from aidb.profiling import span
+from aidb.query_cache import QueryCache
+
+if TYPE_CHECKING:
+    from aidb.query_guard import QueryGuard
+    from aidb.rollup import RollupStore
+
+# Number of distinct SQL strings whose text() construct is kept around.
+TEXT_CACHE_SIZE = 512
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def compiled_text(sql: str) -> TextClause:
+    """Return a shared text() construct for sql.
+
+    Reusing the same construct skips reparsing the bind parameters, and lets
+    SQLAlchemy's compiled-statement cache hit for repeated query shapes.
+    """
+    return text(sql)
 
 
 # Example SQL query
@@ -14,17 +35,95 @@ from sqlalchemy import Row, text
 #    FROM youtube
 #    LEFT JOIN youtube_details ON youtube.id = youtube_details.youtube_id
 #    WHERE youtube_details.youtube_id IS NULL
-#    LIMIT {limit};
+#    LIMIT :limit;
 #    """
+#    rows = query_kumquat(db_url, sql, params={"limit": limit})
 def query_kumquat(
-    db_url: str, sql: str, timeout: int | None = 5 * 60
+    db_url: str,
+    sql: str,
+    timeout: int | None = DEFAULT_CONNECT_TIMEOUT,
+    *,
+    params: Mapping[str, Any] | None = None,
+    cache: QueryCache | None = None,
+    guard: "QueryGuard | None" = None,
+    rollups: "RollupStore | None" = None,
 ) -> Sequence[Row[Any]]:
-    """Query the kumquat database."""
-    # xTODO: make query_kumquat use params: dict[str, Any] = {} instead of string interpolation
-    engine = sqlalchemy.create_engine(
-        url=db_url, connect_args={"connect_timeout": timeout}
-    )
+    """Query the kumquat database, binding :name placeholders from params.
+
+    When a QueryCache is given, results are served from and stored in it. A
+    QueryGuard checks the query against its catalog and then its plan first
+    and may reject it, see query_guard. Per-yrmo counts are answered from a
+    RollupStore when one is given, see rollup.
+    """
+    with span("query_kumquat") as s:
+        if cache is not None:
+            cached = cache.get(db_url, sql, params)
+            if cached is not None:
+                s.set(rows=len(cached), cache_hits=1)
+                return cached
+        if rollups is not None:
+            answered = rollups.answer(db_url, sql, params)
+            if answered is not None:
+                s.set(rows=len(answered), rollup_hits=1)
+                return answered
+        if guard is not None:
+            guard.validate(sql)
+        engine = get_engine(db_url, connect_timeout_args(db_url, timeout))
+        with span("db.connect"):
+            conn = engine.connect()
+        with conn:
+            if guard is not None:
+                guard.check(conn, db_url, sql, params)
+            result = conn.execute(compiled_text(sql), params)
+            rows = result.fetchall()
+        s.set(rows=len(rows))
+        if cache is not None:
+            cache.put(db_url, sql, params, rows)
+        return rows
+
+
+def execute_many_kumquat(
+    db_url: str,
+    sql: str,
+    params_list: Sequence[Mapping[str, Any]],
+    timeout: int | None = DEFAULT_CONNECT_TIMEOUT,
+) -> int:
+    """Run one statement over many parameter sets (executemany) in a transaction.
+
+    Returns the total number of affected rows.
+    """
+    if not params_list:
+        return 0
+    engine = get_engine(db_url, connect_timeout_args(db_url, timeout))
+    with engine.begin() as conn:
+        result = conn.execute(compiled_text(sql), list(params_list))
+        return result.rowcount
+
+
+def query_kumquat_stream(
+    db_url: str,
+    sql: str,
+    batch_size: int = 1000,
+    timeout: int | None = DEFAULT_CONNECT_TIMEOUT,
+    params: Mapping[str, Any] | None = None,
+) -> Generator[Sequence[Row[Any]], None, None]:
+    """Query the kumquat database, yielding rows in batches of batch_size.
+
+    Rows come from a server-side cursor (SSCursor on PyMySQL) so memory stays flat
+    regardless of the result size. Stopping early (break or close()) shuts the
+    cursor down; the connection is dropped rather than drained of unread rows.
+    """
+    engine = get_engine(db_url, connect_timeout_args(db_url, timeout))
     with engine.connect() as conn:
-        sql_text = text(sql)
-        result = conn.execute(sql_text)
-        return result.fetchall()
+        result = conn.execution_options(
+            stream_results=True, max_row_buffer=batch_size
+        ).execute(compiled_text(sql), params)
+        exhausted = False
+        try:
+            yield from result.partitions(batch_size)
+            exhausted = True
+        finally:
+            if not exhausted:
+                # Closing an unbuffered cursor would read every remaining row.
+                conn.invalidate()
+            result.close()
@@ -0,0 +1,262 @@
+"""
+Bulk MySQL schema reflection.
+
+Pulls the whole schema for a set of tables out of information_schema in a handful
+of queries instead of the several-queries-per-table that MetaData.reflect() does.
+The output matches the "tables" mapping produced by db_dump_table_schema_json.
+"""
+
+# flake8: noqa: W503
+
+import re
+from typing import Any, Iterable
+
+from sqlalchemy import Connection, bindparam, exc, text
+
+_TABLES_SQL = text("""
+    SELECT TABLE_NAME, TABLE_COMMENT
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+    ORDER BY TABLE_NAME
+    """)
+
+_COLUMNS_SQL = text("""
+    SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_DEFAULT,
+           COLUMN_KEY, EXTRA, COLUMN_COMMENT
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tables
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """).bindparams(bindparam("tables", expanding=True))
+
+_STATISTICS_SQL = text("""
+    SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tables
+    ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """).bindparams(bindparam("tables", expanding=True))
+
+_KEY_COLUMN_USAGE_SQL = text("""
+    SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME,
+           REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+    FROM information_schema.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tables
+      AND (CONSTRAINT_NAME = 'PRIMARY' OR REFERENCED_TABLE_NAME IS NOT NULL)
+    ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION
+    """).bindparams(bindparam("tables", expanding=True))
+
+_CHECK_CONSTRAINTS_SQL = text("""
+    SELECT tc.TABLE_NAME, cc.CONSTRAINT_NAME, cc.CHECK_CLAUSE
+    FROM information_schema.TABLE_CONSTRAINTS tc
+    JOIN information_schema.CHECK_CONSTRAINTS cc
+      ON cc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA
+     AND cc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+    WHERE tc.TABLE_SCHEMA = DATABASE() AND tc.CONSTRAINT_TYPE = 'CHECK'
+      AND tc.TABLE_NAME IN :tables
+    ORDER BY tc.TABLE_NAME, cc.CONSTRAINT_NAME
+    """).bindparams(bindparam("tables", expanding=True))
+
+_PARTITIONS_SQL = text("""
+    SELECT TABLE_NAME, PARTITION_NAME, PARTITION_METHOD, PARTITION_EXPRESSION,
+           PARTITION_DESCRIPTION
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tables
+      AND PARTITION_NAME IS NOT NULL
+    ORDER BY TABLE_NAME, PARTITION_ORDINAL_POSITION
+    """).bindparams(bindparam("tables", expanding=True))
+
+# information_schema spells a few types differently from SQLAlchemy's rendering.
+_TYPE_ALIASES = {
+    "INT": "INTEGER",
+    "BOOL": "BOOLEAN",
+}
+
+# Base type, optional parenthesized arguments, trailing modifiers (UNSIGNED ...).
+_TYPE_RE = re.compile(r"^(\w+)(\(.*\))?([^()]*)$", re.DOTALL)
+
+# Numeric type arguments, rendered "(10, 2)" by SQLAlchemy but "(10,2)" here.
+_NUMERIC_ARGS_RE = re.compile(r"^\(\s*\d+(?:\s*,\s*\d+)*\s*\)$")
+
+# Defaults that are expressions rather than literals, so must not be quoted.
+_EXPRESSION_DEFAULT_RE = re.compile(
+    r"^(CURRENT_TIMESTAMP|NOW|LOCALTIME|LOCALTIMESTAMP|NULL)\b", re.IGNORECASE
+)
+
+
+def mysql_type_string(column_type: str) -> str:
+    """Render an information_schema COLUMN_TYPE the way str(column.type) does.
+
+    Enum and set values are kept verbatim, numeric arguments are spaced like
+    SQLAlchemy spaces them.
+    """
+    match = _TYPE_RE.match(column_type.strip())
+    if match is None:
+        return column_type
+    base, args, modifiers = match.groups()
+    base = base.upper()
+    base = _TYPE_ALIASES.get(base, base)
+    if args and _NUMERIC_ARGS_RE.match(args):
+        args = "(" + ", ".join(arg.strip() for arg in args[1:-1].split(",")) + ")"
+    return f"{base}{args or ''}{modifiers.upper()}"
+
+
+def _mysql_default(default: str | None, extra: str | None) -> str | None:
+    if default is None:
+        return None
+    if extra and "DEFAULT_GENERATED" in extra.upper():
+        return default
+    if _EXPRESSION_DEFAULT_RE.match(default):
+        return default
+    if len(default) >= 2 and default[0] == default[-1] == "'":
+        return default  # MariaDB reports string defaults already quoted
+    return "'" + default.replace("'", "''") + "'"
+
+
+def _empty_table_info(comment: str | None) -> dict[str, Any]:
+    return {
+        "columns": [],
+        "primary_key": [],
+        "indexes": [],
+        "foreign_keys": [],
+        "check_constraints": [],
+        "table_comment": comment or None,
+        "partitions": [],
+    }
+
+
+def _fetch(conn: Connection, sql: Any, tables: list[str]) -> list[Any]:
+    return list(conn.execute(sql, {"tables": tables}))
+
+
+def _reflect_batch(
+    conn: Connection, tables: list[str], comments: dict[str, str | None]
+) -> dict[str, dict[str, Any]]:
+    out = {name: _empty_table_info(comments.get(name)) for name in tables}
+
+    for (
+        table_name,
+        column_name,
+        column_type,
+        is_nullable,
+        default,
+        column_key,
+        extra,
+        comment,
+    ) in _fetch(conn, _COLUMNS_SQL, tables):
+        out[table_name]["columns"].append(
+            {
+                "column_name": column_name,
+                "data_type": mysql_type_string(column_type),
+                "is_nullable": is_nullable,
+                "default": _mysql_default(default, extra),
+                "is_primary_key": column_key == "PRI",
+                "comment": comment or None,
+            }
+        )
+
+    indexes: dict[tuple[str, str], dict[str, Any]] = {}
+    for table_name, index_name, non_unique, column_name in _fetch(
+        conn, _STATISTICS_SQL, tables
+    ):
+        if index_name == "PRIMARY":
+            continue
+        key = (table_name, index_name)
+        if key not in indexes:
+            indexes[key] = {
+                "name": index_name,
+                "unique": not bool(int(non_unique)),
+                "columns": [],
+            }
+            out[table_name]["indexes"].append(indexes[key])
+        indexes[key]["columns"].append(column_name)
+
+    for (
+        table_name,
+        constraint_name,
+        column_name,
+        referenced_table,
+        referenced_column,
+    ) in _fetch(conn, _KEY_COLUMN_USAGE_SQL, tables):
+        if constraint_name == "PRIMARY":
+            out[table_name]["primary_key"].append(column_name)
+            continue
+        out[table_name]["foreign_keys"].append(
+            {
+                "column": column_name,
+                "references": {"table": referenced_table, "column": referenced_column},
+            }
+        )
+    # In column order like the SQLAlchemy path, not by constraint name.
+    for table_info in out.values():
+        table_info["foreign_keys"].sort(key=lambda fk: fk["column"])
+
+    try:
+        for table_name, constraint_name, check_clause in _fetch(
+            conn, _CHECK_CONSTRAINTS_SQL, tables
+        ):
+            out[table_name]["check_constraints"].append(
+                {"name": constraint_name, "sqltext": check_clause}
+            )
+    except exc.ProgrammingError:
+        # CHECK_CONSTRAINTS only exists on MySQL 8.0.16+ / MariaDB 10.2+.
+        conn.rollback()
+
+    for table_name, name, method, expression, description in _fetch(
+        conn, _PARTITIONS_SQL, tables
+    ):
+        out[table_name]["partitions"].append(
+            {
+                "name": name,
+                "method": method,
+                "expression": expression,
+                "description": description,
+            }
+        )
+
+    return out
+
+
+def table_comments(conn: Connection) -> dict[str, str | None]:
+    """The comment of every base table in the database, by table name."""
+    return dict(conn.execute(_TABLES_SQL).tuples().all())
+
+
+def reflect_mysql_schema(
+    conn: Connection,
+    tables: Iterable[str] | None = None,
+    *,
+    comments: dict[str, str | None] | None = None,
+    follow_fks: bool = True,
+) -> dict[str, dict[str, Any]]:
+    """Reflect the given tables (or all tables) using bulk information_schema queries.
+
+    Like MetaData.reflect(), tables referenced by foreign keys are pulled in as well
+    unless follow_fks is False. Raises ValueError if any requested table does not
+    exist. comments, from table_comments, saves listing the tables again when
+    reflecting a database a few tables at a time.
+    """
+    if comments is None:
+        comments = table_comments(conn)
+    if tables is None:
+        pending = list(comments)
+    else:
+        pending = list(dict.fromkeys(tables))
+        missing_tables = [table for table in pending if table not in comments]
+        if missing_tables:
+            raise ValueError(
+                f"Requested table(s) not available in the database: {', '.join(missing_tables)}"
+            )
+
+    out: dict[str, dict[str, Any]] = {}
+    while pending:
+        out.update(_reflect_batch(conn, pending, comments))
+        if not follow_fks:
+            break
+        referenced = {
+            fk["references"]["table"]
+            for name in pending
+            for fk in out[name]["foreign_keys"]
+        }
+        pending = sorted(
+            name for name in referenced if name not in out and name in comments
+        )
+    return out
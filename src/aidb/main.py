@@ -1,3 +1,9 @@
+# Database drivers, SQLAlchemy and keyring are imported where they are used so
+# that --help and --set don't pay for them, see tests/test_startup.py.
+# pylint: disable=import-outside-toplevel
+
+from __future__ import annotations
+
 import argparse
 import atexit
 import json
@@ -8,15 +14,25 @@ import sys
 import time
 from getpass import getpass
 from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING
 
-import pymysql
-
-from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.profiling import profile_to, span
+from aidb.schema_index import DEFAULT_TOP_K
+from aidb.schema_prompt import (
+    COMPACT_SCHEMA_LEGEND,
+    DEFAULT_TOKEN_BUDGET,
+    format_row_count,
+    render_compact_schema,
+)
 from aidb.secrets import load_connection_url, store_connection_url
 
+if TYPE_CHECKING:
+    from aidb.prefetch import SchemaPrefetch
+    from aidb.schema_index import SchemaIndex
+
 AI_PROMPT = """
 You are an expert SQL engineer.
-Ingest the following db schema in json format and use this for your answers.
+Ingest the following db schema and use this for your answers.
 If someone asks for a year and month, see if there is a YRMO column in the table
 and if so, attempt to use the YRMO column in your query, because that is indexed.
 
@@ -29,6 +45,18 @@ ask for this, if they did ask to group by yrmo then DON'T ASK THE QUESTION.
 Then based on that response generating the SQL query.
 """
 
+SESSION_PROMPT = """
+The schema of the tables relevant to each question is sent along with the
+question, it stays valid for later questions until a new one is sent.
+"""
+
+
+def sanitize_db_url(db_url: str) -> str:
+    """See db_engine.sanitize_db_url, kept here for existing imports."""
+    from aidb.db_engine import sanitize_db_url as sanitize
+
+    return sanitize(db_url)
+
 
 def create_args() -> argparse.Namespace:
     """Create an argument parser."""
@@ -38,28 +66,95 @@ def create_args() -> argparse.Namespace:
     parser.add_argument(
         "--set", type=str, help="Set the connection string and exit", required=False
     )
+    parser.add_argument(
+        "--db",
+        type=str,
+        metavar="NAME",
+        help="Use (or with --set, store) the named connection profile, "
+        "see python -m aidb.multi_catalog for several at once",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore the cached schema and reflect the database again",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the on-disk schema cache",
+    )
+    parser.add_argument(
+        "--prompt-budget",
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help="Approximate token budget for the schema in the prompt, 0 for no limit",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=None,
+        help="With '*', ask for the question up front and only send the K most "
+        f"relevant tables (plus FK neighbors), --session uses {DEFAULT_TOP_K} by "
+        "default, 0 to always send every table",
+    )
+    parser.add_argument(
+        "--session",
+        action="store_true",
+        help="Ask several questions in one askai session, reflecting the schema once",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="PATH",
+        help="Write a Chrome trace of where the time went to PATH and print a summary",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Tell the AI the estimated size of each table (cached for an hour)",
+    )
+    parser.add_argument(
+        "--json-schema",
+        action="store_true",
+        help="Send the full schema as indented json instead of the compact form",
+    )
     return parser.parse_args()
 
 
-def sanitize_db_url(db_url: str) -> str:
-    db_url = db_url.replace("?ssl-mode=REQUIRED", "")
-    db_url = db_url.replace("mysql://", "mysql+pymysql://")
-    return db_url
-
-
 def init() -> None:
+    import pymysql
+
     pymysql.install_as_MySQLdb()
 
 
 def run(
-    connection_string: str, table_names: list[str] | str, question: str | None = None
+    connection_string: str,
+    table_names: list[str] | str,
+    question: str | None = None,
+    *,
+    use_cache: bool = True,
+    refresh: bool = False,
+    prompt_budget: int | None = DEFAULT_TOKEN_BUDGET,
+    json_schema: bool = False,
+    top_k: int = DEFAULT_TOP_K,
+    prefetch: SchemaPrefetch | None = None,
+    session: bool = False,
+    stats: bool = False,
 ) -> int:
     """Return 0 for success."""
+    from aidb.db_dump_schema_json import db_dump_table_schema_json
+    from aidb.schema_index import load_schema_index
+    from aidb.schema_model import Catalog
+    from aidb.session import AskSession, run_session
+    from aidb.table_stats import load_table_stats
+
     if isinstance(table_names, str):
         if ("," in table_names) or ("*" in table_names):
             table_names = table_names.strip().split(",")
         else:
             table_names = [table_names]
+    table_names = [name.strip() for name in table_names if name.strip()]
+    tables: list[str] | None = None if table_names == ["*"] else table_names
 
     init()
 
@@ -74,21 +169,64 @@ def run(
         print("This tool will generate SQL queries for you to run on the database.")
 
         try:
-            schema = db_dump_table_schema_json(
-                connection_string=connection_string, tables=table_names
-            )
+            index: SchemaIndex | None = None
+            if tables is None and (question or session) and top_k > 0:
+                with span("schema.index"):
+                    index = prefetch.index() if prefetch is not None else None
+                    if index is None:
+                        index = load_schema_index(connection_string, refresh=refresh)
+            if index is not None and question and not session:
+                selected = index.select_tables(question, top_k)
+                if selected:
+                    print(
+                        f"Using {len(selected)} of {len(index.documents)} tables "
+                        f"relevant to the question: {', '.join(selected)}"
+                    )
+                    tables = selected
+            with span("schema.load") as s:
+                catalog = None
+                if prefetch is not None:
+                    # Only wait when the prefetch reflects exactly these tables.
+                    catalog = prefetch.schema(
+                        tables, wait=tables == prefetch.requested_tables
+                    )
+                    s.set(prefetched=int(catalog is not None))
+                    print(prefetch.report())
+                if catalog is None:
+                    catalog = Catalog.from_dict(
+                        db_dump_table_schema_json(
+                            connection_string=connection_string,
+                            tables=tables,
+                            use_cache=use_cache,
+                            refresh=refresh,
+                        )
+                    )
+                s.set(tables=len(catalog))
+            if stats:
+                table_stats = load_table_stats(connection_string, refresh=refresh)
+                for table in catalog:
+                    table.stats = table_stats.get(table.name)
             simple_schema_str = ""
-            table_schema = schema["tables"]
-            for table_name, table_info in table_schema.items():
-                column_schema = table_info["columns"]
-                simple_schema_str += f"{table_name}\n"
-                for column in column_schema:
-                    name = column["column_name"]
-                    data_type = column["data_type"]
-                    simple_schema_str += f"  {name}: {data_type}\n"
+            for table in catalog:
+                rows = table.estimated_rows
+                size = f" (~{format_row_count(rows)} rows)" if rows is not None else ""
+                simple_schema_str += f"{table.name}{size}\n"
+                for column in table.columns:
+                    simple_schema_str += f"  {column.name}: {column.data_type}\n"
                 simple_schema_str += "\n"
             print(f"\nSchema:\n{simple_schema_str}")
-            schema_str = json.dumps(schema, indent=2)
+            with span("prompt.render") as s:
+                if index is not None and session:
+                    # Sent per question, see AskSession.
+                    schema_str = f"{COMPACT_SCHEMA_LEGEND}\n{SESSION_PROMPT}"
+                elif json_schema:
+                    schema_str = json.dumps(catalog.to_dict(), indent=2)
+                else:
+                    schema_str = (
+                        f"{COMPACT_SCHEMA_LEGEND}\n\n"
+                        f"{render_compact_schema(catalog, max_tokens=prompt_budget or None)}"
+                    )
+                s.set(bytes=len(schema_str.encode("utf-8")))
         except ValueError as e:
             print(f"Error: {e}")
             return 1
@@ -106,18 +244,25 @@ def run(
         print(
             "\nWith the following prompt describe in natural language what you want to query."
         )
+        if session:
+            return run_session(
+                temp_file_path,
+                AskSession(catalog, index, top_k, prompt_budget or None),
+                first_question=question,
+            )
         cmd_list = ["askai", "--assistant-prompt-file", temp_file_path, "--check"]
         if question:
             cmd_list.append(question)
-        process = subprocess.Popen(cmd_list)
-        try:
-            process.wait()
-        except KeyboardInterrupt:
-            print("Process aborted by user.")
-            process.terminate()
-            process.wait()
-            time.sleep(1)
-            return 1
+        with span("askai"):
+            process = subprocess.Popen(cmd_list)
+            try:
+                process.wait()
+            except KeyboardInterrupt:
+                print("Process aborted by user.")
+                process.terminate()
+                process.wait()
+                time.sleep(1)
+                return 1
 
         if process.returncode != 0:
             print("An error occurred while running askai.")
@@ -144,22 +289,66 @@ def run(
 def main() -> int:
     """Return 0 for success."""
     args = create_args()
+    with profile_to(args.profile):
+        return _main(args)
+
 
+def _main(args: argparse.Namespace) -> int:
     if args.set:
-        store_connection_url(args.set)
+        store_connection_url(args.set, args.db)
         print(f"Connection string set to: {args.set}")
         return 0
 
-    connection_string = load_connection_url()
+    with span("keyring.load"):
+        connection_string = load_connection_url(args.db)
     if not connection_string:
         connection_string = getpass("Enter the database connection string: ")
-        store_connection_url(connection_string)
+        store_connection_url(connection_string, args.db)
+
+    from aidb.prefetch import SchemaPrefetch
+
+    # Only ask for the question before the tables were picked when asked to.
+    ask_question = bool(args.top_k) and not args.session
+    top_k = DEFAULT_TOP_K if args.top_k is None else args.top_k
+    init()
+    prefetch = SchemaPrefetch(
+        sanitize_db_url(connection_string),
+        use_cache=not args.no_cache,
+        refresh=args.refresh,
+        index=top_k > 0 and (ask_question or args.session),
+    ).start()
     table_names_str = input(
         "\nEnter the table names you want to ask\n"
         "You can list each table (comma seperated) or use '*' to ask about all the tables in the db:\n>>> "
     )
     table_names = table_names_str.strip().split(",")
-    return run(connection_string=connection_string, table_names=table_names)
+    prefetch.request(
+        None
+        if table_names_str.strip() == "*"
+        else [name.strip() for name in table_names if name.strip()]
+    )
+    question = None
+    if table_names_str.strip() == "*" and ask_question:
+        question = (
+            input(
+                "\nWhat do you want to ask? This picks the relevant tables, "
+                "leave blank to send all of them:\n>>> "
+            ).strip()
+            or None
+        )
+    return run(
+        connection_string=connection_string,
+        table_names=table_names,
+        question=question,
+        use_cache=not args.no_cache,
+        refresh=args.refresh,
+        prompt_budget=args.prompt_budget,
+        json_schema=args.json_schema,
+        top_k=top_k,
+        prefetch=prefetch,
+        session=args.session,
+        stats=args.stats,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,250 @@
+"""
+One catalog over many databases, reflected concurrently.
+
+Each source is a named connection profile (see secrets.store_connection_url)
+or a url. All sources are reflected at once on a thread pool, with at most
+per_host reflections against the same server so a dozen shards on two hosts
+don't open a dozen bulk information_schema scans on each. Each server has its
+own queue and only its next source is handed to the pool when one of its
+reflections finishes, so sources waiting on a busy server never hold a worker
+that another server could use. Every source goes through the normal
+per-database snapshot (db_refresh_schema_snapshot), and the merged result is
+cached as well:
+
+    {"sources": {"shard1": {"fingerprint": "...", "tables": {...}}, ...}}
+
+keyed by the set of urls. A later build only runs the cheap fingerprint query
+per source and reflects just the sources whose fingerprint changed. A source
+that fails keeps its last cached schema, marked with "error".
+
+merged_catalog() turns a build into one Catalog for callers that describe
+several databases at once. The aidb prompt stays single-database on purpose,
+the generated query runs over one connection and can't join across sources.
+"""
+
+import argparse
+import json
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+from sqlalchemy import make_url
+
+from aidb.db_dump_schema_json import db_refresh_schema_snapshot
+from aidb.db_engine import connect_timeout_args, get_engine, sanitize_db_url
+from aidb.profiling import profile_to, span
+from aidb.schema_cache import (
+    cache_key,
+    load_cached_entry,
+    schema_fingerprint,
+    store_cached_entry,
+)
+from aidb.schema_model import Catalog
+from aidb.secrets import list_profiles, load_connection_url
+
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 2
+
+
+def resolve_sources(names: list[str]) -> dict[str, str]:
+    """Connection urls by source name, names are profiles or "name=url"."""
+    out: dict[str, str] = {}
+    missing = []
+    for name in names:
+        if "=" in name:
+            name, url = name.split("=", 1)
+        else:
+            url = load_connection_url(name) or ""
+        if not url:
+            missing.append(name)
+        out[name] = sanitize_db_url(url)
+    if missing:
+        raise ValueError(f"No connection url stored for: {', '.join(missing)}")
+    return out
+
+
+def host_of(url: str) -> str:
+    """The server a url connects to, sources on the same one share a limit."""
+    parsed = make_url(url)
+    if parsed.host is None:
+        return parsed.get_backend_name()
+    return f"{parsed.host}:{parsed.port or ''}"
+
+
+def _catalog_key(sources: dict[str, str]) -> str:
+    urls = "\n".join(f"{name}={url}" for name, url in sorted(sources.items()))
+    return f"{cache_key(urls, None)}.catalog"
+
+
+def _reflect_source(
+    name: str,
+    url: str,
+    cached: dict[str, Any] | None,
+    refresh: bool,
+) -> dict[str, Any]:
+    with span("catalog.source", source=name) as s:
+        try:
+            engine = get_engine(url, connect_timeout_args(url))
+            fingerprint = schema_fingerprint(engine)
+            if (
+                not refresh
+                and cached is not None
+                and "error" not in cached
+                and fingerprint is not None
+                and cached.get("fingerprint") == fingerprint
+            ):
+                s.set(cache_hits=1)
+                return cached
+            _, schema = db_refresh_schema_snapshot(url, refresh=refresh)
+            s.set(tables=len(schema["tables"]))
+            return {"fingerprint": fingerprint, "tables": schema["tables"]}
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # One unreachable shard should not fail the rest.
+            print(f"Warning: could not reflect {name}: {e}", file=sys.stderr)
+            tables = cached["tables"] if cached is not None else {}
+            return {"fingerprint": None, "tables": tables, "error": str(e)}
+
+
+def build_catalog(
+    sources: dict[str, str],
+    refresh: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+) -> dict[str, Any]:
+    """Reflect every source concurrently and return the merged, cached catalog."""
+    key = _catalog_key(sources)
+    entry = None if refresh else load_cached_entry(key)
+    cached: dict[str, Any] = entry["sources"] if entry else {}
+    queues: dict[str, deque[str]] = {}
+    for name, url in sources.items():
+        queues.setdefault(host_of(url), deque()).append(name)
+    results: dict[str, dict[str, Any]] = {}
+    with span("catalog.build", sources=len(sources)):
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            running: dict[Future[dict[str, Any]], tuple[str, str]] = {}
+
+            def submit_next(host: str) -> None:
+                name = queues[host].popleft()
+                future = executor.submit(
+                    _reflect_source, name, sources[name], cached.get(name), refresh
+                )
+                running[future] = (host, name)
+
+            for host, queue in queues.items():
+                for _ in range(min(max(1, per_host), len(queue))):
+                    submit_next(host)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, name = running.pop(future)
+                    results[name] = future.result()
+                    if queues[host]:
+                        submit_next(host)
+    merged = {"sources": {name: results[name] for name in sources}}
+    if merged != entry:
+        store_cached_entry(key, merged)
+    return merged
+
+
+def merged_catalog(merged: dict[str, Any]) -> Catalog:
+    """All tables of a build_catalog result as one Catalog, named "source.table"."""
+    tables: dict[str, Any] = {}
+    for source, info in merged["sources"].items():
+        for name, table_info in info["tables"].items():
+            foreign_keys = [
+                {
+                    "column": fk["column"],
+                    "references": {
+                        **fk["references"],
+                        "table": f"{source}.{fk['references']['table']}",
+                    },
+                }
+                for fk in table_info["foreign_keys"]
+            ]
+            tables[f"{source}.{name}"] = {**table_info, "foreign_keys": foreign_keys}
+    return Catalog.from_dict({"tables": tables})
+
+
+def format_catalog_summary(merged: dict[str, Any]) -> str:
+    lines = []
+    for name, info in merged["sources"].items():
+        line = f"{name}: {len(info['tables'])} tables"
+        if "error" in info:
+            line += f" (stale, {info['error']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def create_args() -> argparse.Namespace:
+    """Create an argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Reflect several databases at once into one cached catalog."
+    )
+    parser.add_argument(
+        "--db",
+        action="append",
+        metavar="NAME",
+        help="Profile name (or NAME=URL) to include, repeatable, default all profiles.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore the cached catalog and reflect every source again.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Sources reflected at the same time.",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_PER_HOST,
+        help="Sources reflected at the same time on one server.",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        metavar="PATH",
+        help="Write the merged catalog as json to PATH.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        metavar="PATH",
+        help="Write a Chrome trace of where the time went to PATH and print a summary.",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Return 0 for success."""
+    args = create_args()
+    with profile_to(args.profile):
+        try:
+            sources = resolve_sources(args.db or list_profiles())
+            if not sources:
+                raise ValueError(
+                    "No profiles stored, add one with aidb --db NAME --set URL"
+                )
+            merged = build_catalog(
+                sources,
+                refresh=args.refresh,
+                workers=args.workers,
+                per_host=args.per_host,
+            )
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        print(format_catalog_summary(merged))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=2)
+                f.write("\n")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
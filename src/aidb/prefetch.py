@@ -0,0 +1,154 @@
+"""
+Background schema prefetch for the interactive CLI.
+
+As soon as the connection url is known a daemon thread connects and loads the
+table relevance index. Once the user has entered the table names (request()),
+it reflects those tables (through the on-disk cache) while the question is
+typed, including the conversion to a Catalog. run() takes what is ready and
+only waits when the prefetched result is exactly what it needs.
+"""
+
+import threading
+import time
+from typing import Any, Callable
+
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.db_engine import connect_timeout_args, get_engine
+from aidb.profiling import span
+from aidb.schema_index import SchemaIndex, load_schema_index
+from aidb.schema_model import Catalog
+
+_STAGES = ("connect", "index", "schema")
+
+
+class SchemaPrefetch:
+    """Connect, index and reflect in a background thread while input is pending."""
+
+    def __init__(
+        self,
+        connection_string: str,
+        use_cache: bool = True,
+        refresh: bool = False,
+        index: bool = True,
+    ) -> None:
+        self.connection_string = connection_string
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.with_index = index
+        self.durations: dict[str, float] = {}
+        self.error: BaseException | None = None
+        self.waited = 0.0
+        self._used: set[str] = set()
+        self._tables: list[str] | None = None
+        self._requested = threading.Event()
+        self._results: dict[str, Any] = {}
+        self._events = {stage: threading.Event() for stage in _STAGES}
+        self._thread = threading.Thread(
+            target=self._run, name="aidb-prefetch", daemon=True
+        )
+
+    def start(self) -> "SchemaPrefetch":
+        self._thread.start()
+        return self
+
+    def request(self, tables: list[str] | None) -> "SchemaPrefetch":
+        """Start reflecting tables (None for all) once connected and indexed."""
+        self._tables = tables
+        self._requested.set()
+        return self
+
+    @property
+    def requested_tables(self) -> list[str] | None:
+        return self._tables
+
+    def _stage(self, stage: str, func: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        try:
+            with span(f"prefetch.{stage}"):
+                self._results[stage] = func()
+            self.durations[stage] = time.perf_counter() - start
+        finally:
+            self._events[stage].set()
+
+    def _connect(self) -> None:
+        url = self.connection_string
+        with get_engine(url, connect_timeout_args(url)).connect():
+            pass
+
+    def _run(self) -> None:
+        try:
+            self._stage("connect", self._connect)
+            if self.with_index:
+                self._stage(
+                    "index",
+                    lambda: load_schema_index(
+                        self.connection_string, refresh=self.refresh
+                    ),
+                )
+            self._requested.wait()
+            self._stage(
+                "schema",
+                lambda: Catalog.from_dict(
+                    db_dump_table_schema_json(
+                        self.connection_string,
+                        self._tables,
+                        use_cache=self.use_cache,
+                        refresh=self.refresh,
+                    )
+                ),
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            # The caller redoes the work in the foreground and reports the error.
+            self.error = e
+        finally:
+            for event in self._events.values():
+                event.set()
+
+    def _get(self, stage: str, wait: bool) -> Any:
+        event = self._events[stage]
+        if not event.is_set():
+            if not wait:
+                return None
+            start = time.perf_counter()
+            event.wait()
+            self.waited += time.perf_counter() - start
+        result = self._results.get(stage)
+        if result is not None:
+            self._used.add(stage)
+        return result
+
+    def index(self, wait: bool = True) -> SchemaIndex | None:
+        """The relevance index, None if it failed or (without wait) isn't ready."""
+        return self._get("index", wait)
+
+    def schema(self, tables: list[str] | None, wait: bool = True) -> Catalog | None:
+        """Catalog of tables (None for all) cut from the prefetched dump.
+
+        None when it failed, (without wait) isn't ready, or the requested tables
+        don't cover tables.
+        """
+        if not self._requested.is_set():
+            return None
+        if self._tables is not None and (
+            tables is None or not set(tables) <= set(self._tables)
+        ):
+            return None
+        catalog = self._get("schema", wait)
+        if catalog is None or tables is None:
+            return catalog
+        return catalog.subset(tables)
+
+    def report(self) -> str:
+        """One line of timing: background work used, time waited and time hidden."""
+        # A warm connection pool helps whether or not anything else was used.
+        self._used.add("connect")
+        used = sum(self.durations.get(stage, 0.0) for stage in self._used)
+        stages = ", ".join(
+            f"{stage} {self.durations[stage]:.2f}s"
+            for stage in _STAGES
+            if stage in self._used and stage in self.durations
+        )
+        return (
+            f"Prefetch: {stages or 'nothing'} done in the background, "
+            f"waited {self.waited:.2f}s, {max(0.0, used - self.waited):.2f}s hidden"
+        )
@@ -0,0 +1,190 @@
+"""
+Lightweight tracing spans for finding where aidb spends its time.
+
+    with span("reflect", tables=3) as s:
+        ...
+        s.set(rows=len(rows))
+
+Spans are only recorded after enable(), until then span() hands back a shared
+no-op object so instrumented code pays about half a microsecond per span. Recorded
+spans can be written as a Chrome trace (chrome://tracing, ui.perfetto.dev) and
+summarized as a table.
+"""
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Iterator
+
+
+class _State:
+    __slots__ = ("enabled",)
+
+    def __init__(self) -> None:
+        self.enabled = False
+
+
+_STATE = _State()
+_events: list[dict[str, Any]] = []
+_thread_names: dict[int, str] = {}
+_lock = threading.Lock()
+_origin = time.perf_counter()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def set(self, **_args: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed region, set() attaches counts such as rows or bytes to it."""
+
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: dict[str, Any]) -> None:
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        end = time.perf_counter()
+        thread = threading.current_thread()
+        tid = thread.ident or 0
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = {
+            "name": self.name,
+            "cat": "aidb",
+            "ph": "X",
+            "ts": (self.start - _origin) * 1e6,
+            "dur": (end - self.start) * 1e6,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": self.args,
+        }
+        with _lock:
+            _events.append(event)
+            _thread_names[tid] = thread.name
+
+    def set(self, **args: Any) -> None:
+        self.args.update(args)
+
+
+def span(name: str, **args: Any) -> Span | _NullSpan:
+    """Time the enclosed block as name when profiling is enabled."""
+    if not _STATE.enabled:
+        return _NULL_SPAN
+    return Span(name, args)
+
+
+def enable() -> None:
+    _STATE.enabled = True
+
+
+def disable() -> None:
+    _STATE.enabled = False
+
+
+def is_enabled() -> bool:
+    return _STATE.enabled
+
+
+def events() -> list[dict[str, Any]]:
+    with _lock:
+        return list(_events)
+
+
+def reset() -> None:
+    with _lock:
+        _events.clear()
+        _thread_names.clear()
+
+
+def write_chrome_trace(path: str) -> None:
+    """Write the recorded spans in the Chrome trace event format."""
+    with _lock:
+        thread_names = dict(_thread_names)
+    names = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": {"name": name},
+        }
+        for tid, name in thread_names.items()
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"traceEvents": names + events(), "displayTimeUnit": "ms"},
+            f,
+            default=str,
+        )
+
+
+def summary() -> str:
+    """Per span name: count, total/mean/max time and summed numeric args."""
+    totals: dict[str, dict[str, Any]] = {}
+    for event in events():
+        entry = totals.setdefault(
+            event["name"], {"count": 0, "total": 0.0, "max": 0.0, "counters": {}}
+        )
+        entry["count"] += 1
+        entry["total"] += event["dur"] / 1000
+        entry["max"] = max(entry["max"], event["dur"] / 1000)
+        for key, value in event["args"].items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                entry["counters"][key] = entry["counters"].get(key, 0) + value
+    if not totals:
+        return "No spans recorded."
+    width = max(len(name) for name in totals)
+    lines = [
+        f"{'span':<{width}}  {'count':>6}  {'total ms':>10}  {'mean ms':>9}  {'max ms':>9}  counters"
+    ]
+    for name, entry in sorted(totals.items(), key=lambda item: -item[1]["total"]):
+        counters = ", ".join(
+            f"{key}={value:g}" for key, value in sorted(entry["counters"].items())
+        )
+        lines.append(
+            f"{name:<{width}}  {entry['count']:>6}  {entry['total']:>10.1f}"
+            f"  {entry['total'] / entry['count']:>9.2f}  {entry['max']:>9.1f}  {counters}".rstrip()
+        )
+    return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profile_to(path: str | None) -> Iterator[None]:
+    """Record spans for the block, then write a trace to path and a summary to stderr.
+
+    Does nothing when path is None.
+    """
+    if path is None:
+        yield
+        return
+    reset()
+    enable()
+    try:
+        yield
+    finally:
+        disable()
+        write_chrome_trace(path)
+        # stderr, stdout may carry the command's own output (a json schema).
+        print(f"\n{summary()}\nTrace written to {path}", file=sys.stderr)
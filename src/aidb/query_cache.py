@@ -0,0 +1,243 @@
+"""
+Opt-in result cache for query_kumquat.
+
+Results are keyed by database url, normalized SQL and parameters and expire
+after a per-entry TTL. The in-memory tier is an LRU bounded by the encoded size
+of the results, and an optional SQLite file keeps results across restarts.
+Results are stored as json (see row_codec) rather than pickled, so a writable
+cache file can't be used to run code, and expired rows are purged from it.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterator, Mapping, Sequence
+
+from aidb.row_codec import decode_rows, encode_rows
+
+DEFAULT_TTL = 5 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_LITERAL_RE = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\")")
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_TABLE_LIST_RE = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+((?:[`\"]?[\w.]+[`\"]?(?:\s+(?:AS\s+)?\w+)?\s*,\s*)*"
+    r"[`\"]?[\w.]+[`\"]?)",
+    re.IGNORECASE,
+)
+_TABLE_NAME_RE = re.compile(r"^[`\"]?(?:\w+[`\"]?\.[`\"]?)?(\w+)[`\"]?")
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    expires REAL NOT NULL,
+    tables TEXT NOT NULL,
+    payload BLOB NOT NULL
+);
+"""
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace outside string literals and drop a trailing ';'."""
+    parts = _LITERAL_RE.split(sql)
+    for i in range(0, len(parts), 2):
+        parts[i] = _WHITESPACE_RE.sub(" ", parts[i])
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def sql_shape(sql: str) -> str:
+    """sql normalized with string and number literals replaced by ?.
+
+    IN lists collapse to a single ?, so queries that only differ in their
+    constants share a shape.
+    """
+    shape = _LITERAL_RE.sub("?", normalize_sql(sql))
+    shape = _NUMBER_RE.sub("?", shape)
+    return _IN_LIST_RE.sub("(?)", shape)
+
+
+def mask_literals(sql: str) -> str:
+    """sql with string literals blanked out, same length so offsets still line up."""
+    return _LITERAL_RE.sub(lambda m: "_" * len(m.group()), sql)
+
+
+def referenced_tables(sql: str) -> frozenset[str]:
+    """Best-effort set of table names a statement reads or writes."""
+    code = "".join(_LITERAL_RE.split(sql)[::2])
+    tables = set()
+    for match in _TABLE_LIST_RE.finditer(code):
+        for item in match.group(1).split(","):
+            name = _TABLE_NAME_RE.match(item.strip())
+            if name:
+                tables.add(name.group(1).lower())
+    return frozenset(tables)
+
+
+def cache_key(db_url: str, sql: str, params: Mapping[str, Any] | None) -> str:
+    payload = json.dumps(
+        [db_url, normalize_sql(sql), sorted((params or {}).items())], default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """TTL + byte-bounded LRU cache of query results, optionally backed by SQLite."""
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        path: str | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, frozenset[str], bytes]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        if path is not None:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            with self._disk() as conn:
+                conn.executescript(_SCHEMA_SQL)
+                self._purge(conn, time.time())
+
+    def _purge(self, conn: sqlite3.Connection, now: float) -> None:
+        # At most once per ttl, it scans the whole file.
+        if now >= self._next_purge:
+            conn.execute("DELETE FROM results WHERE expires <= ?", (now,))
+            self._next_purge = now + self.ttl
+
+    @contextlib.contextmanager
+    def _disk(self) -> Iterator[sqlite3.Connection]:
+        assert self.path is not None
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def _remember(
+        self, key: str, expires: float, tables: frozenset[str], payload: bytes
+    ) -> None:
+        self._forget(key)
+        if len(payload) > self.max_bytes:
+            return
+        self._entries[key] = (expires, tables, payload)
+        self._bytes += len(payload)
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _forget(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    def get(
+        self, db_url: str, sql: str, params: Mapping[str, Any] | None = None
+    ) -> Sequence[Any] | None:
+        """Return the cached rows, or None on a miss."""
+        key = cache_key(db_url, sql, params)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                self._forget(key)
+                entry = None
+            if entry is None and self.path is not None:
+                with self._disk() as conn:
+                    row = conn.execute(
+                        "SELECT expires, tables, payload FROM results WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                if row is not None and row[0] > now:
+                    expires, tables, payload = row
+                    entry = (
+                        expires,
+                        frozenset(filter(None, tables.split(","))),
+                        payload,
+                    )
+                    self._remember(key, *entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key, last=True)
+            self.hits += 1
+            return decode_rows(json.loads(entry[2]))
+
+    def put(
+        self,
+        db_url: str,
+        sql: str,
+        params: Mapping[str, Any] | None,
+        rows: Sequence[Any],
+        ttl: float | None = None,
+    ) -> None:
+        """Store rows for a query, ttl overrides the cache's default for this entry.
+
+        Rows with values row_codec can't encode are not cached.
+        """
+        key = cache_key(db_url, sql, params)
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        tables = referenced_tables(sql)
+        try:
+            payload = json.dumps(encode_rows(rows)).encode("utf-8")
+        except TypeError:
+            return
+        with self._lock:
+            self._remember(key, expires, tables, payload)
+            if self.path is not None:
+                with self._disk() as conn:
+                    self._purge(conn, now)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                        (key, expires, "," + ",".join(sorted(tables)) + ",", payload),
+                    )
+
+    def invalidate_table(self, table: str) -> int:
+        """Drop every entry whose query references table, returns the count dropped."""
+        table = table.lower()
+        dropped = 0
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if table in v[1]]:
+                self._forget(key)
+                dropped += 1
+            if self.path is not None:
+                with self._disk() as conn:
+                    cursor = conn.execute(
+                        "DELETE FROM results WHERE instr(tables, ?) > 0",
+                        (f",{table},",),
+                    )
+                    dropped = max(dropped, cursor.rowcount)
+        return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self.path is not None:
+                with self._disk() as conn:
+                    conn.execute("DELETE FROM results")
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,473 @@
+"""
+EXPLAIN-based cost guard for generated SQL.
+
+Before a query runs its plan is fetched with EXPLAIN (EXPLAIN QUERY PLAN on
+SQLite) and checked for full table scans, full index scans and row estimates
+over a limit. Scans are only judged when the plan has a row estimate, SQLite
+has one once ANALYZE has filled sqlite_stat1. Plans are cached per query shape,
+the normalized SQL with literals replaced by ?, so asking the same question for
+another month doesn't EXPLAIN again. When a scanned table has a yrmo column
+that the query doesn't filter on, the report suggests the query with a yrmo
+range added.
+
+    guard = QueryGuard(reject=True)
+    rows = query_kumquat(db_url, sql, guard=guard)  # QueryRejectedError if costly
+
+or from the command line, to check a generated query without running it:
+
+    python -m aidb.query_guard "mysql+pymysql://..." "SELECT ..."
+"""
+
+import argparse
+import re
+import sys
+import threading
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+
+from sqlalchemy import Connection, inspect, text
+
+from aidb.db_engine import connect_timeout_args, get_engine
+from aidb.profiling import span
+from aidb.query_cache import mask_literals, normalize_sql, sql_shape
+from aidb.schema_model import Catalog
+from aidb.sql_validate import SqlValidator
+
+DEFAULT_MAX_ROWS = 1_000_000
+# Full scans of tables estimated below this many rows are not worth flagging.
+DEFAULT_MIN_SCAN_ROWS = 10_000
+DEFAULT_MAX_PLANS = 1024
+
+_ALIAS_RE = re.compile(
+    r"\b(?:FROM|JOIN)\s+[`\"]?(?:\w+[`\"]?\.[`\"]?)?(\w+)[`\"]?"
+    r"(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|ON|USING|GROUP|ORDER|LIMIT|HAVING|UNION|"
+    r"LEFT|RIGHT|INNER|OUTER|CROSS|NATURAL|STRAIGHT_JOIN)\b)(\w+))?",
+    re.IGNORECASE,
+)
+_WHERE_RE = re.compile(r"\bWHERE\b", re.IGNORECASE)
+_CLAUSE_START_RE = re.compile(
+    r"\b(?:GROUP\s+BY|ORDER\s+BY|HAVING|LIMIT|UNION|WINDOW)\b", re.IGNORECASE
+)
+_SQLITE_STEP_RE = re.compile(
+    r"^(SCAN|SEARCH)\s+(?:TABLE\s+)?(\w+)(?:\s+AS\s+\w+)?"
+    r"(?:\s+USING\s+(?:(COVERING\s+)?INDEX\s+(\w+)|(INTEGER PRIMARY KEY)))?"
+)
+_MYSQL_INDEX_ACCESS = {
+    "system",
+    "const",
+    "eq_ref",
+    "ref",
+    "fulltext",
+    "ref_or_null",
+    "index_merge",
+    "unique_subquery",
+    "index_subquery",
+    "range",
+}
+
+
+def _clause_end(masked: str, start: int) -> int:
+    """End of the clause starting at start: the next GROUP BY, ORDER BY, ... or
+    unbalanced ")" at the same nesting level."""
+    depth = 0
+    for i in range(start, len(masked)):
+        char = masked[i]
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            if depth == 0:
+                return i
+            depth -= 1
+        elif depth == 0 and _CLAUSE_START_RE.match(masked, i):
+            if i == 0 or not (masked[i - 1].isalnum() or masked[i - 1] == "_"):
+                return i
+    return len(masked)
+
+
+def table_aliases(sql: str) -> dict[str, str]:
+    """Map of alias (and table name) to table name for FROM and JOIN items."""
+    aliases = {}
+    for match in _ALIAS_RE.finditer(mask_literals(sql)):
+        table, alias = match.group(1), match.group(2)
+        aliases[table.lower()] = table
+        if alias:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+@dataclass
+class PlanStep:
+    """One table access of a plan.
+
+    access is "full_scan" (every row read), "index_scan" (every entry of an index
+    read) or "index" (a lookup or range on an index).
+    """
+
+    table: str
+    access: str
+    index: str | None = None
+    rows: int | None = None
+    detail: str = ""
+
+
+@dataclass
+class PlanIssue:
+    # "full_scan", "index_scan", "too_many_rows", or a sql_validate kind
+    kind: str
+    table: str | None
+    message: str
+
+
+@dataclass
+class PlanReport:
+    """What QueryGuard.check() found out about a query."""
+
+    sql: str
+    steps: list[PlanStep] = field(default_factory=list)
+    issues: list[PlanIssue] = field(default_factory=list)
+    estimated_rows: int | None = None
+    suggestion: str | None = None
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.issues
+
+    def summary(self) -> str:
+        if self.ok:
+            return "Plan OK."
+        lines = [f"- {issue.message}" for issue in self.issues]
+        if self.suggestion:
+            lines.append(f"Suggested query:\n{self.suggestion}")
+        return "Plan issues:\n" + "\n".join(lines)
+
+
+class QueryRejectedError(ValueError):
+    """Raised by a rejecting QueryGuard, report holds the plan and its issues."""
+
+    def __init__(self, report: PlanReport) -> None:
+        super().__init__(report.summary())
+        self.report = report
+
+
+class QueryPlanWarning(UserWarning):
+    """Issued by a non-rejecting QueryGuard for a plan with issues."""
+
+
+def _mysql_steps(
+    conn: Connection, sql: str, params: Mapping[str, Any] | None
+) -> list[PlanStep]:
+    steps = []
+    for row in conn.execute(text(f"EXPLAIN {sql}"), params).mappings():
+        table = row.get("table")
+        if not table or table.startswith("<"):
+            continue  # derived tables and unions are covered by their own rows
+        kind = row.get("type")
+        if kind == "ALL":
+            access = "full_scan"
+        elif kind == "index":
+            access = "index_scan"
+        elif kind in _MYSQL_INDEX_ACCESS:
+            access = "index"
+        else:
+            continue  # NULL: optimized away, no table read
+        rows = row.get("rows")
+        steps.append(
+            PlanStep(
+                table,
+                access,
+                index=row.get("key"),
+                rows=None if rows is None else int(rows),
+                detail=str(row.get("Extra") or ""),
+            )
+        )
+    return steps
+
+
+def _sqlite_row_counts(conn: Connection) -> dict[str, int]:
+    """Row counts by table from sqlite_stat1, empty until ANALYZE has run."""
+    has_stats = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+    ).first()
+    if has_stats is None:
+        return {}
+    counts: dict[str, int] = {}
+    for table, stat in conn.execute(text("SELECT tbl, stat FROM sqlite_stat1")):
+        # The first number of every entry is the table's row count.
+        rows = int(str(stat).split(" ", 1)[0])
+        counts[table.lower()] = max(rows, counts.get(table.lower(), 0))
+    return counts
+
+
+def _sqlite_steps(
+    conn: Connection, sql: str, params: Mapping[str, Any] | None
+) -> list[PlanStep]:
+    aliases = table_aliases(sql)
+    counts = _sqlite_row_counts(conn)
+    steps = []
+    for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params):
+        detail = row[-1]
+        match = _SQLITE_STEP_RE.match(detail)
+        if not match:
+            continue  # temp b-trees, co-routines, constant rows
+        verb, name, _, index, rowid = match.groups()
+        table = aliases.get(name.lower(), name)
+        if verb == "SEARCH":
+            access = "index"
+        elif index:
+            access = "index_scan"
+        else:
+            access = "full_scan"
+        steps.append(
+            PlanStep(
+                table,
+                access,
+                index=index or rowid,
+                rows=counts.get(table.lower()),
+                detail=detail,
+            )
+        )
+    return steps
+
+
+def add_yrmo_filter(sql: str, table: str) -> str:
+    """sql with "yrmo BETWEEN :yrmo_from AND :yrmo_to" added for table.
+
+    The column is qualified with the table's alias when the query joins several
+    tables. Best effort: the first WHERE clause outside string literals is
+    extended, or one is added before GROUP BY / ORDER BY / LIMIT.
+    """
+    sql = normalize_sql(sql)
+    aliases = table_aliases(sql)
+    qualifier = ""
+    if len(set(aliases.values())) > 1:
+        alias = next(
+            (a for a, t in aliases.items() if t == table and a != table.lower()),
+            table,
+        )
+        qualifier = f"{alias}."
+    predicate = f"{qualifier}yrmo BETWEEN :yrmo_from AND :yrmo_to"
+    masked = mask_literals(sql)
+    where = _WHERE_RE.search(masked)
+    if where:
+        end = _clause_end(masked, where.end())
+        condition = sql[where.end() : end].strip()
+        rest = sql[end:].strip()
+        head = f"{sql[: where.start()]}WHERE {predicate} AND ({condition})"
+        return f"{head} {rest}" if rest else head
+    clause = _CLAUSE_START_RE.search(masked)
+    if clause:
+        return (
+            f"{sql[: clause.start()].rstrip()} WHERE {predicate} {sql[clause.start():]}"
+        )
+    return f"{sql} WHERE {predicate}"
+
+
+class QueryGuard:
+    """Checks query plans before execution, see the module docstring.
+
+    With reject, check() raises QueryRejectedError for a plan with issues,
+    otherwise it issues a QueryPlanWarning and the query runs anyway. With a
+    catalog, validate() catches unknown tables and columns before connecting
+    and yrmo columns are looked up in it, without one the database is asked
+    once per table.
+    """
+
+    def __init__(
+        self,
+        max_rows: int | None = DEFAULT_MAX_ROWS,
+        min_scan_rows: int = DEFAULT_MIN_SCAN_ROWS,
+        reject: bool = False,
+        catalog: Catalog | None = None,
+        max_plans: int = DEFAULT_MAX_PLANS,
+    ) -> None:
+        self.max_rows = max_rows
+        self.min_scan_rows = min_scan_rows
+        self.reject = reject
+        self.catalog = catalog
+        self.max_plans = max_plans
+        self.hits = 0
+        self.misses = 0
+        self._plans: OrderedDict[tuple[str, str], list[PlanStep]] = OrderedDict()
+        self._yrmo_tables: dict[tuple[str, str], bool] = {}
+        self._validator: SqlValidator | None = None
+        self._lock = threading.Lock()
+
+    def _plan(
+        self,
+        conn: Connection,
+        db_url: str,
+        sql: str,
+        params: Mapping[str, Any] | None,
+    ) -> tuple[list[PlanStep], bool]:
+        key = (db_url, sql_shape(sql))
+        with self._lock:
+            steps = self._plans.get(key)
+            if steps is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return steps, True
+            self.misses += 1
+        with span("guard.explain"):
+            if conn.dialect.name == "mysql":
+                steps = _mysql_steps(conn, sql, params)
+            elif conn.dialect.name == "sqlite":
+                steps = _sqlite_steps(conn, sql, params)
+            else:
+                steps = []  # no plan format we understand, nothing is flagged
+        with self._lock:
+            self._plans[key] = steps
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return steps, False
+
+    def _has_yrmo(self, conn: Connection, db_url: str, table: str) -> bool:
+        if self.catalog is not None and table in self.catalog:
+            return any(
+                column.name.lower() == "yrmo" for column in self.catalog[table].columns
+            )
+        key = (db_url, table)
+        if key not in self._yrmo_tables:
+            columns = inspect(conn).get_columns(table)
+            self._yrmo_tables[key] = any(
+                column["name"].lower() == "yrmo" for column in columns
+            )
+        return self._yrmo_tables[key]
+
+    def review(
+        self,
+        conn: Connection,
+        db_url: str,
+        sql: str,
+        params: Mapping[str, Any] | None = None,
+    ) -> PlanReport:
+        """Plan and issues for sql, without raising or warning."""
+        if normalize_sql(sql).split(" ", 1)[0].upper() not in ("SELECT", "WITH"):
+            return PlanReport(sql)
+        steps, cached = self._plan(conn, db_url, sql, params)
+        report = PlanReport(sql, steps=steps, cached=cached)
+        known = [step.rows for step in steps if step.rows is not None]
+        if known:
+            estimate = 1
+            for rows in known:
+                estimate *= max(rows, 1)
+            report.estimated_rows = estimate
+        for step in steps:
+            # Without a row estimate (SQLite before ANALYZE) every small lookup
+            # table would be flagged, so only known sizes are judged.
+            if step.access == "index" or step.rows is None:
+                continue
+            if step.rows < self.min_scan_rows:
+                continue
+            size = f" (~{step.rows:,} rows)"
+            if step.access == "full_scan":
+                message = f"full table scan of {step.table}{size}, no index is used"
+            else:
+                message = f"full scan of index {step.index} on {step.table}{size}"
+            report.issues.append(PlanIssue(step.access, step.table, message))
+        if (
+            self.max_rows is not None
+            and report.estimated_rows is not None
+            and report.estimated_rows > self.max_rows
+        ):
+            report.issues.append(
+                PlanIssue(
+                    "too_many_rows",
+                    None,
+                    f"about {report.estimated_rows:,} rows examined, "
+                    f"more than the limit of {self.max_rows:,}",
+                )
+            )
+        if not report.ok and not re.search(r"\byrmo\b", sql, re.IGNORECASE):
+            scanned = [issue.table for issue in report.issues if issue.table]
+            table = next(
+                (name for name in scanned if self._has_yrmo(conn, db_url, name)),
+                None,
+            )
+            if table is not None:
+                report.suggestion = add_yrmo_filter(sql, table)
+        return report
+
+    def check(
+        self,
+        conn: Connection,
+        db_url: str,
+        sql: str,
+        params: Mapping[str, Any] | None = None,
+    ) -> PlanReport:
+        """review() sql, then reject or warn when the plan has issues."""
+        with span("guard.check") as s:
+            report = self.review(conn, db_url, sql, params)
+            s.set(issues=len(report.issues), cache_hits=int(report.cached))
+        self._enforce(report)
+        return report
+
+    def validate(self, sql: str) -> PlanReport:
+        """Check sql against the catalog offline, then reject or warn on errors.
+
+        Unknown tables and columns are found without a connection, see
+        sql_validate. Does nothing without a catalog.
+        """
+        report = PlanReport(sql)
+        if self.catalog is None:
+            return report
+        if self._validator is None:
+            self._validator = SqlValidator(self.catalog)
+        with span("guard.validate") as s:
+            report.issues = [
+                PlanIssue(issue.kind, None, issue.message)
+                for issue in self._validator.validate(sql)
+                if issue.severity == "error"
+            ]
+            s.set(issues=len(report.issues))
+        self._enforce(report)
+        return report
+
+    def _enforce(self, report: PlanReport) -> None:
+        if report.ok:
+            return
+        if self.reject:
+            raise QueryRejectedError(report)
+        warnings.warn(report.summary(), QueryPlanWarning, stacklevel=4)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "plans": len(self._plans)}
+
+
+def explain_query(
+    db_url: str,
+    sql: str,
+    params: Mapping[str, Any] | None = None,
+    guard: QueryGuard | None = None,
+) -> PlanReport:
+    """Review sql against db_url without running it."""
+    guard = guard or QueryGuard()
+    engine = get_engine(db_url, connect_timeout_args(db_url))
+    with engine.connect() as conn:
+        return guard.review(conn, db_url, sql, params)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Check the plan of a query without running it."
+    )
+    parser.add_argument("connection_string", type=str)
+    parser.add_argument("sql", type=str)
+    parser.add_argument("--max-rows", type=int, default=DEFAULT_MAX_ROWS)
+    args = parser.parse_args()
+    report = explain_query(
+        args.connection_string, args.sql, guard=QueryGuard(max_rows=args.max_rows)
+    )
+    for step in report.steps:
+        rows = f" rows={step.rows}" if step.rows is not None else ""
+        index = f" index={step.index}" if step.index else ""
+        print(f"{step.table}: {step.access}{index}{rows}")
+    print(report.summary())
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+"""
+Local per-yrmo row count rollups, kept up to date incrementally.
+
+"Count records and group by yrmo" is the most common question, and on a large
+table it is a full aggregate every time. A RollupStore keeps the per-yrmo counts
+of each table that has a yrmo column and a single integer primary key in a
+local SQLite file, together with the highest primary key counted so far.
+
+A refresh then only reads what can have changed:
+
+- rows above the high-water mark, grouped by yrmo (new inserts), and
+- the latest recent_months yrmo values, recounted through the yrmo index, since
+  those are the months still being updated.
+
+Deletes and yrmo changes in older months are only picked up by a full rebuild
+(refresh(full=True)). Matching queries,
+
+    SELECT yrmo, COUNT(*) FROM t [WHERE yrmo ...] GROUP BY yrmo [ORDER BY yrmo]
+    SELECT COUNT(*) FROM t [WHERE yrmo ...]
+
+are answered from the store by answer(), or by query_kumquat(rollups=store).
+"""
+
+import argparse
+import contextlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Iterator, Mapping
+
+from sqlalchemy import Connection, Row, inspect, text
+
+from aidb.db_engine import connect_timeout_args, get_engine
+from aidb.profiling import span
+from aidb.query_cache import normalize_sql
+from aidb.row_codec import make_rows
+from aidb.schema_cache import cache_dir, cache_key
+
+DEFAULT_RECENT_MONTHS = 2
+# Answers older than this trigger an incremental refresh first.
+DEFAULT_MAX_AGE = 5 * 60
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS counts (
+    source TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    yrmo INTEGER,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (source, tbl, yrmo)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    source TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    pk TEXT NOT NULL,
+    high_water INTEGER,
+    refreshed REAL NOT NULL,
+    PRIMARY KEY (source, tbl)
+);
+"""
+
+_VALUE = r"(:\w+|-?\d+)"
+_COUNT_RE = re.compile(
+    # COUNT(col) skips NULLs, only COUNT(*) and COUNT(1) count every row.
+    r"^SELECT (?:(?P<yrmo>yrmo)\s*,\s*)?(?P<count>COUNT\(\s*(?:\*|1)\s*\))"
+    r"(?:\s+(?:AS\s+)?(?P<alias>\w+))?"
+    r" FROM [`\"]?(?P<table>\w+)[`\"]?"
+    r"(?: WHERE (?P<where>.+?))?"
+    r"(?: GROUP BY yrmo)?"
+    r"(?: ORDER BY yrmo(?: (?P<order>ASC|DESC))?)?$",
+    re.IGNORECASE,
+)
+_CONDITION_RES = [
+    (re.compile(rf"^yrmo\s*=\s*{_VALUE}$", re.I), ("=",)),
+    (
+        re.compile(rf"^yrmo\s+BETWEEN\s+{_VALUE}\s+__AND__\s+{_VALUE}$", re.I),
+        (">=", "<="),
+    ),
+    (re.compile(rf"^yrmo\s*(>=|<=|>|<)\s*{_VALUE}$", re.I), None),
+]
+
+
+def default_rollup_path() -> str:
+    return os.path.join(cache_dir(), "rollups.sqlite")
+
+
+def _bound(value: str, params: Mapping[str, Any] | None) -> int | None:
+    if value.startswith(":"):
+        bound = (params or {}).get(value[1:])
+        try:
+            return None if bound is None else int(bound)
+        except (TypeError, ValueError):
+            return None  # "2024-01" and the like, left to the database
+    return int(value)
+
+
+def match_count_query(
+    sql: str, params: Mapping[str, Any] | None = None
+) -> tuple[str, bool, int | None, int | None, bool] | None:
+    """(table, grouped, yrmo_from, yrmo_to, descending) for a rollup-able count.
+
+    The yrmo range is inclusive, None for an open end. Returns None for any
+    other query.
+    """
+    match = _COUNT_RE.match(normalize_sql(sql))
+    if match is None:
+        return None
+    grouped = match.group("yrmo") is not None
+    if grouped != bool(re.search(r"GROUP BY yrmo", sql, re.IGNORECASE)):
+        return None
+    low: int | None = None
+    high: int | None = None
+    # The AND of a BETWEEN is not a conjunction.
+    where = re.sub(
+        r"(BETWEEN\s+\S+)\s+AND\s+",
+        r"\1 __AND__ ",
+        match.group("where") or "",
+        flags=re.I,
+    )
+    for condition in re.split(r"\s+AND\s+", where, flags=re.I):
+        condition = condition.strip().strip("()").strip()
+        if not condition:
+            continue
+        for pattern, operators in _CONDITION_RES:
+            found = pattern.match(condition)
+            if not found:
+                continue
+            groups = found.groups()
+            if operators is None:
+                operators, groups = (groups[0],), groups[1:]
+            for operator, value in zip(operators, groups):
+                bound = _bound(value, params)
+                if bound is None:
+                    return None
+                if operator in ("=", ">=", ">"):
+                    bound += operator == ">"
+                    low = bound if low is None else max(low, bound)
+                if operator in ("=", "<=", "<"):
+                    bound -= operator == "<"
+                    high = bound if high is None else min(high, bound)
+            break
+        else:
+            return None  # a condition the rollup can't answer
+    descending = (match.group("order") or "").upper() == "DESC"
+    return match.group("table"), grouped, low, high, descending
+
+
+class RollupStore:
+    """Per-yrmo counts for tables of one or more databases, in a SQLite file."""
+
+    def __init__(
+        self,
+        path: str | None = None,
+        recent_months: int = DEFAULT_RECENT_MONTHS,
+        max_age: float = DEFAULT_MAX_AGE,
+    ) -> None:
+        self.path = path or default_rollup_path()
+        self.recent_months = recent_months
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._db() as db:
+            db.executescript(_SCHEMA_SQL)
+
+    @contextlib.contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as db:
+            with db:
+                yield db
+
+    @staticmethod
+    def _primary_key(conn: Connection, table: str) -> str:
+        inspector = inspect(conn)
+        if table not in inspector.get_table_names():
+            raise ValueError(
+                f"Requested table(s) not available in the database: {table}"
+            )
+        columns = {c["name"].lower(): c for c in inspector.get_columns(table)}
+        if "yrmo" not in columns:
+            raise ValueError(f"Table {table} has no yrmo column to roll up")
+        pk = inspector.get_pk_constraint(table)["constrained_columns"]
+        if len(pk) != 1 or columns[pk[0].lower()]["type"].python_type is not int:
+            raise ValueError(
+                f"Table {table} needs a single integer primary key for incremental rollups"
+            )
+        return pk[0]
+
+    def _recent_months(self, source: str, table: str) -> list[int]:
+        with self._db() as db:
+            return [
+                row[0]
+                for row in db.execute(
+                    "SELECT yrmo FROM counts WHERE source = ? AND tbl = ?"
+                    " AND yrmo IS NOT NULL ORDER BY yrmo DESC LIMIT ?",
+                    (source, table, self.recent_months),
+                )
+            ]
+
+    @staticmethod
+    def _count(
+        conn: Connection, table: str, where: str, params: dict[str, Any]
+    ) -> list[tuple[int | None, int]]:
+        sql = f"SELECT yrmo, COUNT(*) FROM {table} WHERE {where} GROUP BY yrmo"
+        return [(row[0], row[1]) for row in conn.execute(text(sql), params)]
+
+    def refresh(self, db_url: str, table: str, full: bool = False) -> dict[str, int]:
+        """Bring the counts of table up to date, returns how many months changed.
+
+        The first refresh (or full) counts the whole table, later ones only the
+        new rows and the recent months.
+        """
+        source = cache_key(db_url, None)
+        engine = get_engine(db_url, connect_timeout_args(db_url))
+        quote = engine.dialect.identifier_preparer.quote
+        with self._lock, span("rollup.refresh", table=table) as s:
+            with self._db() as db:
+                mark = db.execute(
+                    "SELECT pk, high_water FROM watermarks WHERE source = ? AND tbl = ?",
+                    (source, table),
+                ).fetchone()
+            full = full or mark is None or mark[1] is None
+            replace: list[tuple[int | None, int]] = []
+            add: list[tuple[int | None, int]] = []
+            with engine.connect() as conn:
+                pk = self._primary_key(conn, table) if full else mark[0]
+                t, k = quote(table), quote(pk)
+                high_water = conn.execute(text(f"SELECT MAX({k}) FROM {t}")).scalar()
+                bounds: dict[str, Any] = {"hw": high_water}
+                if full:
+                    replace = self._count(conn, t, f"{k} <= :hw", bounds)
+                else:
+                    recent = self._recent_months(source, table)
+                    new_rows = f"{k} > :old AND {k} <= :hw"
+                    bounds["old"] = mark[1]
+                    if recent:
+                        # Recounted through the yrmo index, catches updates and deletes.
+                        bounds["since"] = min(recent)
+                        replace = self._count(
+                            conn, t, f"yrmo >= :since AND {k} <= :hw", bounds
+                        )
+                        seen = {yrmo for yrmo, _ in replace}
+                        replace += [(yrmo, 0) for yrmo in recent if yrmo not in seen]
+                        new_rows += " AND (yrmo < :since OR yrmo IS NULL)"
+                    add = self._count(conn, t, new_rows, bounds)
+            with self._db() as db:
+                if full:
+                    db.execute(
+                        "DELETE FROM counts WHERE source = ? AND tbl = ?",
+                        (source, table),
+                    )
+                db.executemany(
+                    "INSERT OR REPLACE INTO counts VALUES (?, ?, ?, ?)",
+                    [(source, table, yrmo, n) for yrmo, n in replace],
+                )
+                db.executemany(
+                    "INSERT INTO counts VALUES (?, ?, ?, ?) ON CONFLICT"
+                    " (source, tbl, yrmo) DO UPDATE SET n = n + excluded.n",
+                    [(source, table, yrmo, n) for yrmo, n in add],
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?)",
+                    (source, table, pk, high_water, time.time()),
+                )
+            s.set(months=len(replace) + len(add))
+        return {"replaced": len(replace), "added": len(add), "full": full}
+
+    def refreshed_at(self, db_url: str, table: str) -> float | None:
+        with self._db() as db:
+            row = db.execute(
+                "SELECT refreshed FROM watermarks WHERE source = ? AND tbl = ?",
+                (cache_key(db_url, None), table),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def counts(
+        self,
+        db_url: str,
+        table: str,
+        yrmo_from: int | None = None,
+        yrmo_to: int | None = None,
+    ) -> list[tuple[int | None, int]]:
+        """(yrmo, rows) in yrmo order, refreshing first when older than max_age."""
+        refreshed = self.refreshed_at(db_url, table)
+        if refreshed is None or time.time() - refreshed > self.max_age:
+            self.refresh(db_url, table)
+        sql = "SELECT yrmo, n FROM counts WHERE source = ? AND tbl = ? AND n > 0"
+        args: list[Any] = [cache_key(db_url, None), table]
+        if yrmo_from is not None:
+            sql += " AND yrmo >= ?"
+            args.append(yrmo_from)
+        if yrmo_to is not None:
+            sql += " AND yrmo <= ?"
+            args.append(yrmo_to)
+        with self._db() as db:
+            return db.execute(sql + " ORDER BY yrmo", args).fetchall()
+
+    def answer(
+        self, db_url: str, sql: str, params: Mapping[str, Any] | None = None
+    ) -> list[Row[Any]] | None:
+        """Rows sql would return from the rollup, None if it can't answer.
+
+        The columns are named like the database would name them, after the
+        COUNT's alias or its text.
+        """
+        matched = match_count_query(sql, params)
+        if matched is None:
+            return None
+        table, grouped, low, high, descending = matched
+        match = _COUNT_RE.match(normalize_sql(sql))
+        assert match is not None
+        columns = [match.group("alias") or match.group("count")]
+        if grouped:
+            columns.insert(0, match.group("yrmo"))
+        try:
+            with span("rollup.answer", table=table):
+                counts = self.counts(db_url, table, low, high)
+        except ValueError:
+            return None  # no yrmo column or primary key to keep it up to date
+        if not grouped:
+            return make_rows(columns, [(sum(n for _, n in counts),)])
+        return make_rows(columns, reversed(counts) if descending else counts)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Build or refresh the per-yrmo counts of a table and print them."
+    )
+    parser.add_argument("connection_string", type=str)
+    parser.add_argument("table", type=str)
+    parser.add_argument("--full", action="store_true", help="Recount everything")
+    args = parser.parse_args()
+    store = RollupStore()
+    try:
+        start = time.perf_counter()
+        result = store.refresh(args.connection_string, args.table, full=args.full)
+        elapsed = time.perf_counter() - start
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    for yrmo, rows in store.counts(args.connection_string, args.table):
+        print(f"{yrmo}\t{rows}")
+    kind = "full" if result["full"] else "incremental"
+    print(f"({kind} refresh in {elapsed * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
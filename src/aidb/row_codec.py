@@ -0,0 +1,89 @@
+"""
+JSON encoding of result rows that keeps the value types.
+
+Values json can't represent (datetimes, Decimal, bytes, ...) are written as
+{"$type": name, "value": ...} and decoded back to the same type, so results and
+keys stored on disk come back as they went in, without pickle. Rows are stored
+with their column names and decoded into sqlalchemy Rows, row.name and
+row._mapping work the same as on a fresh query result.
+"""
+
+import base64
+import datetime
+import decimal
+import uuid
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.engine import IteratorResult
+from sqlalchemy.engine.result import SimpleResultMetaData
+
+_ENCODERS: list[tuple[type | tuple[type, ...], str, Any]] = [
+    # datetime before date, it is a subclass.
+    (datetime.datetime, "datetime", lambda v: v.isoformat()),
+    (datetime.date, "date", lambda v: v.isoformat()),
+    (datetime.time, "time", lambda v: v.isoformat()),
+    (datetime.timedelta, "timedelta", lambda v: v.total_seconds()),
+    (decimal.Decimal, "decimal", str),
+    ((bytes, bytearray, memoryview), "bytes", lambda v: base64.b64encode(v).decode()),
+    (uuid.UUID, "uuid", str),
+]
+
+_DECODERS: dict[str, Any] = {
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "timedelta": lambda v: datetime.timedelta(seconds=v),
+    "decimal": decimal.Decimal,
+    "bytes": base64.b64decode,
+    "uuid": uuid.UUID,
+}
+
+
+def encode_value(value: Any) -> Any:
+    """A json-safe form of value, TypeError for types that can't round trip."""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        value = {key: encode_value(item) for key, item in value.items()}
+        return {"$type": "dict", "value": value}
+    for types, name, encode in _ENCODERS:
+        if isinstance(value, types):
+            return {"$type": name, "value": encode(value)}
+    raise TypeError(f"Can't encode {type(value).__name__} values")
+
+
+def decode_value(data: Any) -> Any:
+    if isinstance(data, list):
+        return [decode_value(item) for item in data]
+    if isinstance(data, dict):
+        if data["$type"] == "dict":
+            return {key: decode_value(item) for key, item in data["value"].items()}
+        return _DECODERS[data["$type"]](data["value"])
+    return data
+
+
+def make_rows(
+    columns: Sequence[str], values: Iterable[Sequence[Any]]
+) -> list[Row[Any]]:
+    """Rows with the given column names, like those of a query result."""
+    result: IteratorResult[Any] = IteratorResult(
+        SimpleResultMetaData(list(columns)), iter(tuple(row) for row in values)
+    )
+    return list(result.all())
+
+
+def encode_rows(rows: Sequence[Any]) -> dict[str, Any]:
+    """{"columns": [...] or None, "rows": [[...], ...]} for json.dumps."""
+    columns = list(rows[0]._fields) if rows and isinstance(rows[0], Row) else None
+    return {"columns": columns, "rows": [encode_value(list(row)) for row in rows]}
+
+
+def decode_rows(data: dict[str, Any]) -> list[Any]:
+    """Rows from encode_rows, plain tuples when they had no column names."""
+    values = [tuple(decode_value(row)) for row in data["rows"]]
+    if data["columns"] is None:
+        return values
+    return make_rows(data["columns"], values)
@@ -0,0 +1,141 @@
+"""
+On-disk cache for reflected schemas.
+
+Entries are keyed by a hash of the connection url and the requested table set and
+are only trusted while a cheap fingerprint query against the database still
+returns the value stored with them.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Any
+
+from sqlalchemy import Engine, text
+
+from aidb.db_engine import sanitize_db_url
+
+CACHE_DIR_ENV = "AIDB_CACHE_DIR"
+
+_MYSQL_FINGERPRINT_SQL = text("""
+    SELECT COUNT(*), MAX(CREATE_TIME), MAX(UPDATE_TIME)
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE()
+    """)
+
+_MYSQL_TABLE_FINGERPRINTS_SQL = text("""
+    SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+    ORDER BY TABLE_NAME
+    """)
+
+_SQLITE_TABLE_FINGERPRINTS_SQL = text("""
+    SELECT tbl_name, type, name, sql
+    FROM sqlite_master
+    WHERE type IN ('table', 'index') AND name NOT LIKE 'sqlite_%'
+    ORDER BY tbl_name, type DESC, name
+    """)
+
+
+def cache_dir() -> str:
+    """Directory holding the cache files, overridable with $AIDB_CACHE_DIR."""
+    path = os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        os.path.expanduser("~"), ".cache", "aidb"
+    )
+    return os.path.join(path, "schema")
+
+
+def cache_key(connection_string: str, tables: list[str] | None) -> str:
+    """Hash of the connection url and table set, the url itself is never stored.
+
+    The url is sanitized first, so mysql:// and mysql+pymysql:// spellings of
+    the same database share their entries.
+    """
+    table_set = "*" if tables is None else ",".join(sorted(set(tables)))
+    payload = f"{sanitize_db_url(connection_string)}\n{table_set}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def schema_fingerprint(engine: Engine) -> str | None:
+    """Return a value that changes whenever the schema changes, None if unsupported."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "mysql":
+            row = conn.execute(_MYSQL_FINGERPRINT_SQL).one()
+            return "|".join(str(value) for value in row)
+        if engine.dialect.name == "sqlite":
+            version = conn.execute(text("PRAGMA schema_version")).scalar()
+            return str(version)
+    return None
+
+
+def table_fingerprints(engine: Engine) -> dict[str, str] | None:
+    """Return a per-table fingerprint of every table's DDL, None if unsupported."""
+    out: dict[str, str] = {}
+    with engine.connect() as conn:
+        if engine.dialect.name == "mysql":
+            for name, create_time, update_time in conn.execute(
+                _MYSQL_TABLE_FINGERPRINTS_SQL
+            ):
+                out[name] = f"{create_time}|{update_time}"
+            return out
+        if engine.dialect.name == "sqlite":
+            ddl: dict[str, list[str]] = {}
+            for tbl_name, kind, name, sql in conn.execute(
+                _SQLITE_TABLE_FINGERPRINTS_SQL
+            ):
+                ddl.setdefault(tbl_name, []).append(f"{kind}:{name}:{sql}")
+            for name, statements in ddl.items():
+                digest = hashlib.sha256("\n".join(statements).encode("utf-8"))
+                out[name] = digest.hexdigest()
+            return out
+    return None
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(cache_dir(), f"{key}.json")
+
+
+def load_cached_entry(key: str) -> dict[str, Any] | None:
+    """Return the raw cache entry for key, or None if missing or unreadable."""
+    try:
+        with open(_cache_path(key), encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def store_cached_entry(key: str, entry: dict[str, Any]) -> None:
+    """Atomically write a cache entry, failures to write are not fatal."""
+    directory = cache_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError as e:
+        print(f"Warning: could not write schema cache: {e}", file=sys.stderr)
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, _cache_path(key))
+    except OSError as e:
+        print(f"Warning: could not write schema cache: {e}", file=sys.stderr)
+    finally:
+        # Left behind when writing failed, including a non-serializable entry.
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def store_cached_schema(
+    key: str,
+    fingerprint: str,
+    schema: dict[str, Any],
+    fingerprints: dict[str, str] | None = None,
+) -> None:
+    entry: dict[str, Any] = {"fingerprint": fingerprint, "schema": schema}
+    if fingerprints is not None:
+        entry["table_fingerprints"] = fingerprints
+    store_cached_entry(key, entry)
@@ -0,0 +1,78 @@
+"""
+Diff two schema dumps produced by db_dump_table_schema_json.
+"""
+
+from typing import Any
+
+_COLUMN_FIELDS = ("data_type", "is_nullable", "default", "is_primary_key", "comment")
+_TABLE_FIELDS = (
+    "primary_key",
+    "indexes",
+    "foreign_keys",
+    "check_constraints",
+    "table_comment",
+    "partitions",
+)
+
+
+def _diff_table(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    old_columns = {col["column_name"]: col for col in old["columns"]}
+    new_columns = {col["column_name"]: col for col in new["columns"]}
+    changed_columns = {}
+    for name in new_columns.keys() & old_columns.keys():
+        changes = {
+            field: [old_columns[name].get(field), new_columns[name].get(field)]
+            for field in _COLUMN_FIELDS
+            if old_columns[name].get(field) != new_columns[name].get(field)
+        }
+        if changes:
+            changed_columns[name] = changes
+    return {
+        "added_columns": [name for name in new_columns if name not in old_columns],
+        "removed_columns": [name for name in old_columns if name not in new_columns],
+        "changed_columns": dict(sorted(changed_columns.items())),
+        "changed_properties": [
+            field for field in _TABLE_FIELDS if old.get(field) != new.get(field)
+        ],
+    }
+
+
+def diff_schemas(old: dict[str, Any] | None, new: dict[str, Any]) -> dict[str, Any]:
+    """Return the added, removed and changed tables between two schema dumps."""
+    old_tables = old["tables"] if old else {}
+    new_tables = new["tables"]
+    changed_tables = {}
+    for name in sorted(new_tables.keys() & old_tables.keys()):
+        table_diff = _diff_table(old_tables[name], new_tables[name])
+        if any(table_diff.values()):
+            changed_tables[name] = table_diff
+    return {
+        "added_tables": sorted(name for name in new_tables if name not in old_tables),
+        "removed_tables": sorted(name for name in old_tables if name not in new_tables),
+        "changed_tables": changed_tables,
+    }
+
+
+def format_schema_diff(diff: dict[str, Any]) -> str:
+    """Render a diff from diff_schemas as human readable text."""
+    lines = []
+    for name in diff["added_tables"]:
+        lines.append(f"+ {name}")
+    for name in diff["removed_tables"]:
+        lines.append(f"- {name}")
+    for name, table_diff in diff["changed_tables"].items():
+        lines.append(f"~ {name}")
+        for column in table_diff["added_columns"]:
+            lines.append(f"    + {column}")
+        for column in table_diff["removed_columns"]:
+            lines.append(f"    - {column}")
+        for column, changes in table_diff["changed_columns"].items():
+            details = ", ".join(
+                f"{field}: {old!r} -> {new!r}" for field, (old, new) in changes.items()
+            )
+            lines.append(f"    ~ {column} ({details})")
+        for field in table_diff["changed_properties"]:
+            lines.append(f"    ~ {field}")
+    if not lines:
+        return "No schema changes."
+    return "\n".join(lines)
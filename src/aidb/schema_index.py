@@ -0,0 +1,263 @@
+"""
+Offline BM25 index over table names, column names and comments.
+
+Used to narrow '*' down to the tables a question is about before anything is
+reflected in full. The index only needs names and comments, which are read in
+one pass, and it is cached next to the schema cache and rebuilt per table when
+that table's fingerprint changes.
+"""
+
+# flake8: noqa: W503
+# SQLAlchemy is imported where it is used so the CLI can read DEFAULT_TOP_K
+# without paying for it.
+# pylint: disable=import-outside-toplevel
+
+from __future__ import annotations
+
+import math
+import re
+import sys
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Iterable
+
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+INDEX_VERSION = 1
+DEFAULT_TOP_K = 10
+
+# Standard BM25 parameters, table name terms count this many times over.
+_K1 = 1.2
+_B = 0.75
+_TABLE_NAME_WEIGHT = 3
+
+_MYSQL_DOCS_SQL = """
+    SELECT c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_COMMENT, t.TABLE_COMMENT
+    FROM information_schema.COLUMNS c
+    JOIN information_schema.TABLES t
+      ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+    WHERE c.TABLE_SCHEMA = DATABASE() AND t.TABLE_TYPE = 'BASE TABLE'
+    """
+
+_MYSQL_REFERENCES_SQL = """
+    SELECT DISTINCT TABLE_NAME, REFERENCED_TABLE_NAME
+    FROM information_schema.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL
+    """
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+_STOPWORDS = frozenset(
+    "a all an and any are as at be by count do does each for from get give have "
+    "how i in is it list many me much my of on or per show the their there to "
+    "was we were what when where which who with".split()
+)
+
+
+def tokenize(value: str | None) -> list[str]:
+    """Split identifiers and prose into lowercase terms, ignoring stopwords.
+
+    snake_case and camelCase are split and a plural "s" is dropped, so
+    "VideoViews" and "video_view" give the same terms.
+    """
+    terms = []
+    for word in _WORD_RE.findall(value or ""):
+        word = word.lower()
+        if word in _STOPWORDS:
+            continue
+        if word.endswith("ies") and len(word) > 4:
+            word = word[:-3] + "y"
+        elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _document(
+    name: str, texts: Iterable[str | None], references: Iterable[str]
+) -> dict[str, Any]:
+    terms = Counter(tokenize(name) * _TABLE_NAME_WEIGHT)
+    for value in texts:
+        terms.update(tokenize(value))
+    return {
+        "terms": dict(terms),
+        "length": sum(terms.values()),
+        "references": sorted(set(references) - {name}),
+    }
+
+
+def _mysql_documents(
+    engine: Engine, tables: list[str] | None
+) -> dict[str, dict[str, Any]]:
+    from sqlalchemy import bindparam, text
+
+    texts: dict[str, list[str | None]] = {}
+    references: dict[str, list[str]] = {}
+    docs_sql, references_sql = _MYSQL_DOCS_SQL, _MYSQL_REFERENCES_SQL
+    params: dict[str, Any] = {}
+    if tables is not None:
+        docs_sql += " AND c.TABLE_NAME IN :tables"
+        references_sql += " AND TABLE_NAME IN :tables"
+        params["tables"] = tables
+    docs_query, references_query = text(docs_sql), text(references_sql)
+    if tables is not None:
+        docs_query = docs_query.bindparams(bindparam("tables", expanding=True))
+        references_query = references_query.bindparams(
+            bindparam("tables", expanding=True)
+        )
+    with engine.connect() as conn:
+        for table, column, column_comment, table_comment in conn.execute(
+            docs_query, params
+        ):
+            entry = texts.setdefault(table, [table_comment])
+            entry += [column, column_comment]
+        for table, referenced in conn.execute(references_query, params):
+            references.setdefault(table, []).append(referenced)
+    return {
+        name: _document(name, values, references.get(name, []))
+        for name, values in texts.items()
+    }
+
+
+def _inspector_documents(
+    engine: Engine, tables: list[str] | None
+) -> dict[str, dict[str, Any]]:
+    from sqlalchemy import inspect
+
+    inspector = inspect(engine)
+    out = {}
+    for name in inspector.get_table_names() if tables is None else tables:
+        texts: list[str | None] = []
+        try:
+            texts.append(inspector.get_table_comment(name).get("text"))
+        except NotImplementedError:
+            pass
+        for column in inspector.get_columns(name):
+            texts += [column["name"], column.get("comment")]
+        references = [fk["referred_table"] for fk in inspector.get_foreign_keys(name)]
+        out[name] = _document(name, texts, references)
+    return out
+
+
+def _load_documents(
+    engine: Engine, tables: list[str] | None
+) -> dict[str, dict[str, Any]]:
+    from sqlalchemy import exc
+
+    if engine.dialect.name == "mysql":
+        try:
+            return _mysql_documents(engine, tables)
+        except exc.DBAPIError as e:
+            print(
+                f"Warning: information_schema scan failed ({e}), using inspector",
+                file=sys.stderr,
+            )
+    return _inspector_documents(engine, tables)
+
+
+class SchemaIndex:
+    """BM25 ranking of tables against a question."""
+
+    def __init__(self, documents: dict[str, dict[str, Any]]) -> None:
+        self.documents = documents
+        self._doc_freq: Counter[str] = Counter()
+        for doc in documents.values():
+            self._doc_freq.update(doc["terms"].keys())
+        lengths = [doc["length"] for doc in documents.values()]
+        self._avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    def search(self, question: str, k: int = DEFAULT_TOP_K) -> list[tuple[str, float]]:
+        """Return up to k (table, score) pairs with a positive score, best first."""
+        terms = set(tokenize(question))
+        count = len(self.documents)
+        scores = []
+        for name, doc in self.documents.items():
+            score = 0.0
+            norm = _K1 * (1 - _B + _B * doc["length"] / (self._avg_length or 1.0))
+            for term in terms:
+                tf = doc["terms"].get(term)
+                if not tf:
+                    continue
+                df = self._doc_freq[term]
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                score += idf * tf * (_K1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((name, score))
+        scores.sort(key=lambda item: (-item[1], item[0]))
+        return scores[:k]
+
+    def select_tables(self, question: str, k: int = DEFAULT_TOP_K) -> list[str]:
+        """Top k tables for question plus their FK neighbors, [] if nothing matched.
+
+        Tables a hit references are always added since they are needed for
+        joins, tables referencing a hit only when they matched the question too.
+        """
+        hits = self.search(question, k)
+        matched = {name for name, _ in self.search(question, len(self.documents))}
+        selected = [name for name, _ in hits]
+        seen = set(selected)
+        for name, _ in hits:
+            neighbors = [
+                other
+                for other in self.documents[name]["references"]
+                if other in self.documents
+            ]
+            neighbors += sorted(
+                other
+                for other, doc in self.documents.items()
+                if name in doc["references"] and other in matched
+            )
+            for other in neighbors:
+                if other not in seen:
+                    seen.add(other)
+                    selected.append(other)
+        return selected
+
+
+def _index_key(connection_string: str) -> str:
+    from aidb.schema_cache import cache_key
+
+    return f"{cache_key(connection_string, None)}.index"
+
+
+def load_schema_index(connection_string: str, refresh: bool = False) -> SchemaIndex:
+    """Load the cached index for a database, re-reading only tables that changed.
+
+    Without per-table fingerprints (dialects other than MySQL and SQLite) the
+    index is rebuilt on every call.
+    """
+    from aidb.db_engine import connect_timeout_args, get_engine
+    from aidb.schema_cache import (
+        load_cached_entry,
+        store_cached_entry,
+        table_fingerprints,
+    )
+
+    engine = get_engine(connection_string, connect_timeout_args(connection_string))
+    fingerprints = table_fingerprints(engine)
+    key = _index_key(connection_string)
+    entry = None if refresh or fingerprints is None else load_cached_entry(key)
+    if entry is None or entry.get("version") != INDEX_VERSION:
+        entry = {"version": INDEX_VERSION, "tables": {}}
+    documents: dict[str, dict[str, Any]] = entry["tables"]
+
+    if fingerprints is None:
+        documents = _load_documents(engine, None)
+    else:
+        removed = set(documents) - set(fingerprints)
+        for name in removed:
+            del documents[name]
+        changed = sorted(
+            name
+            for name, fingerprint in fingerprints.items()
+            if documents.get(name, {}).get("fingerprint") != fingerprint
+        )
+        if changed:
+            scope = None if len(changed) == len(fingerprints) else changed
+            for name, doc in _load_documents(engine, scope).items():
+                if name in fingerprints:
+                    doc["fingerprint"] = fingerprints[name]
+                    documents[name] = doc
+        if changed or removed:
+            store_cached_entry(key, {"version": INDEX_VERSION, "tables": documents})
+    return SchemaIndex(documents)
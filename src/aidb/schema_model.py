@@ -0,0 +1,245 @@
+"""
+Compact in-memory schema catalog.
+
+The dumps from db_dump_table_schema_json are nested dicts with a string per
+attribute per column, which is heavy for catalogs with 100k+ columns. Here each
+object uses __slots__, collections are tuples and type names, column names and
+defaults are interned, so a catalog shares one copy of "VARCHAR(255)" or "id".
+Catalog.from_dict() and to_dict() convert to and from the json shape.
+"""
+
+import sys
+from typing import Any, Iterator
+
+
+def _intern(value: str) -> str:
+    # Reflected names can be str subclasses (sqlalchemy's quoted_name), which
+    # sys.intern() refuses.
+    return sys.intern(str(value))
+
+
+def _intern_optional(value: str | None) -> str | None:
+    return None if value is None else _intern(value)
+
+
+class Column:
+    __slots__ = ("name", "data_type", "nullable", "default", "primary_key", "comment")
+
+    def __init__(
+        self,
+        name: str,
+        data_type: str,
+        *,
+        nullable: bool = True,
+        default: str | None = None,
+        primary_key: bool = False,
+        comment: str | None = None,
+    ) -> None:
+        self.name = _intern(name)
+        self.data_type = _intern(data_type)
+        self.nullable = nullable
+        self.default = _intern_optional(default)
+        self.primary_key = primary_key
+        self.comment = comment
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "column_name": self.name,
+            "data_type": self.data_type,
+            "is_nullable": "YES" if self.nullable else "NO",
+            "default": self.default,
+            "is_primary_key": self.primary_key,
+            "comment": self.comment,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Column":
+        return cls(
+            data["column_name"],
+            data["data_type"],
+            nullable=data["is_nullable"] == "YES",
+            default=data.get("default"),
+            primary_key=bool(data.get("is_primary_key")),
+            comment=data.get("comment"),
+        )
+
+    def __repr__(self) -> str:
+        return f"Column({self.name!r}, {self.data_type!r})"
+
+
+class Index:
+    __slots__ = ("name", "unique", "columns")
+
+    def __init__(
+        self, name: str | None, unique: bool, columns: tuple[str, ...]
+    ) -> None:
+        self.name = _intern_optional(name)
+        self.unique = unique
+        self.columns = tuple(_intern(column) for column in columns)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.name, "unique": self.unique, "columns": list(self.columns)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Index":
+        return cls(data["name"], bool(data["unique"]), tuple(data["columns"]))
+
+
+class ForeignKey:
+    __slots__ = ("column", "ref_table", "ref_column")
+
+    def __init__(self, column: str, ref_table: str, ref_column: str) -> None:
+        self.column = _intern(column)
+        self.ref_table = _intern(ref_table)
+        self.ref_column = _intern(ref_column)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "column": self.column,
+            "references": {"table": self.ref_table, "column": self.ref_column},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ForeignKey":
+        ref = data["references"]
+        return cls(data["column"], ref["table"], ref["column"])
+
+
+class Table:
+    __slots__ = (
+        "name",
+        "columns",
+        "primary_key",
+        "indexes",
+        "foreign_keys",
+        "check_constraints",
+        "comment",
+        "partitions",
+        "stats",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        columns: tuple[Column, ...],
+        *,
+        primary_key: tuple[str, ...] = (),
+        indexes: tuple[Index, ...] = (),
+        foreign_keys: tuple[ForeignKey, ...] = (),
+        check_constraints: tuple[tuple[str | None, str], ...] = (),
+        comment: str | None = None,
+        partitions: tuple[dict[str, Any], ...] = (),
+        stats: dict[str, Any] | None = None,
+    ) -> None:
+        self.name = _intern(name)
+        self.columns = columns
+        self.primary_key = tuple(_intern(column) for column in primary_key)
+        self.indexes = indexes
+        self.foreign_keys = foreign_keys
+        self.check_constraints = check_constraints
+        self.comment = comment
+        self.partitions = partitions
+        # Size estimates from table_stats, None unless they were asked for.
+        self.stats = stats
+
+    def column(self, name: str) -> Column | None:
+        return next((column for column in self.columns if column.name == name), None)
+
+    @property
+    def estimated_rows(self) -> int | None:
+        return None if self.stats is None else self.stats.get("rows")
+
+    def to_dict(self) -> dict[str, Any]:
+        out = {
+            "columns": [column.to_dict() for column in self.columns],
+            "primary_key": list(self.primary_key),
+            "indexes": [index.to_dict() for index in self.indexes],
+            "foreign_keys": [fk.to_dict() for fk in self.foreign_keys],
+            "check_constraints": [
+                {"name": name, "sqltext": sqltext}
+                for name, sqltext in self.check_constraints
+            ],
+            "table_comment": self.comment,
+            "partitions": list(self.partitions),
+        }
+        if self.stats is not None:
+            out["stats"] = self.stats
+        return out
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict[str, Any]) -> "Table":
+        return cls(
+            name,
+            tuple(Column.from_dict(column) for column in data["columns"]),
+            primary_key=tuple(data["primary_key"]),
+            indexes=tuple(Index.from_dict(index) for index in data["indexes"]),
+            foreign_keys=tuple(ForeignKey.from_dict(fk) for fk in data["foreign_keys"]),
+            check_constraints=tuple(
+                (check["name"], check["sqltext"])
+                for check in data.get("check_constraints") or ()
+            ),
+            comment=data.get("table_comment"),
+            partitions=tuple(data.get("partitions") or ()),
+            stats=data.get("stats"),
+        )
+
+    def __repr__(self) -> str:
+        return f"Table({self.name!r}, {len(self.columns)} columns)"
+
+
+class Catalog:
+    """Tables by name, in the order of the dump they came from."""
+
+    __slots__ = ("tables",)
+
+    def __init__(self, tables: dict[str, Table]) -> None:
+        self.tables = tables
+
+    def __getitem__(self, name: str) -> Table:
+        return self.tables[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.tables
+
+    def __iter__(self) -> Iterator[Table]:
+        return iter(self.tables.values())
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def subset(self, names: list[str]) -> "Catalog":
+        """names (and the tables their foreign keys reference) as a new catalog.
+
+        Ordered like db_dump_table_schema_json(tables=names): requested tables
+        first, then the referenced ones sorted by name.
+        """
+        missing_tables = [name for name in names if name not in self.tables]
+        if missing_tables:
+            raise ValueError(
+                f"Requested table(s) not available in the database: {', '.join(missing_tables)}"
+            )
+        requested = list(dict.fromkeys(names))
+        selected = set(requested)
+        pending = list(requested)
+        while pending:
+            for fk in self.tables[pending.pop()].foreign_keys:
+                if fk.ref_table in self.tables and fk.ref_table not in selected:
+                    selected.add(fk.ref_table)
+                    pending.append(fk.ref_table)
+        extra = sorted(selected - set(requested))
+        return Catalog({name: self.tables[name] for name in requested + extra})
+
+    def to_dict(self) -> dict[str, Any]:
+        """The db_dump_table_schema_json shape, safe to json.dumps."""
+        return {
+            "tables": {name: table.to_dict() for name, table in self.tables.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, schema: dict[str, Any]) -> "Catalog":
+        return cls(
+            {
+                name: Table.from_dict(name, data)
+                for name, data in schema["tables"].items()
+            }
+        )
@@ -0,0 +1,144 @@
+"""
+Compact, token-budgeted rendering of a schema dump for the AI prompt.
+
+One line per table in a DDL-like shorthand:
+
+    youtube(id INTEGER PK, url VARCHAR(255), yrmo INTEGER, user_id INTEGER) idx[yrmo] fk[user_id->users.id]
+
+When the rendering is over budget, detail is dropped in a fixed order, largest
+tables first at each step: comments, then the types of columns that are not keys,
+then those columns altogether, and finally whole tables, least connected first.
+Primary keys, indexes, foreign keys and yrmo columns are kept until the table
+itself goes.
+"""
+
+from typing import Any
+
+from aidb.schema_model import Catalog, Table
+
+# Rough average for English/SQL text with OpenAI tokenizers.
+BYTES_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 16_000
+
+COMPACT_SCHEMA_LEGEND = """The schema is one line per table:
+table(column TYPE, ...) idx[cols] uniq[cols] fk[col->table.column] ~N rows -- comment
+PK marks primary key columns, "+N cols" means N more columns were left out for
+brevity, "~N rows" is the estimated table size, and tables listed under "other
+tables" exist but were not described."""
+
+_LEVELS = 4  # full, no comments, untyped non-key columns, key columns only
+
+
+def format_row_count(rows: int) -> str:
+    """500000000 -> "500M", for prompts and listings."""
+    for size, suffix in ((10**9, "B"), (10**6, "M"), (10**3, "K")):
+        if rows >= size:
+            value = rows / size
+            return f"{value:.1f}{suffix}" if value < 10 else f"{value:.0f}{suffix}"
+    return str(rows)
+
+
+def _key_columns(table: Table) -> set[str]:
+    keys = set(table.primary_key)
+    keys.update(fk.column for fk in table.foreign_keys)
+    for index in table.indexes:
+        keys.update(index.columns)
+    keys.update(col.name for col in table.columns if col.name.lower() == "yrmo")
+    return keys
+
+
+def _render_table(table: Table, level: int) -> str:
+    keys = _key_columns(table)
+    primary_key = set(table.primary_key)
+    columns = []
+    omitted = 0
+    for col in table.columns:
+        is_key = col.name in keys
+        if level >= 3 and not is_key:
+            omitted += 1
+            continue
+        text = col.name
+        if level < 2 or is_key:
+            text += f" {col.data_type}"
+        if col.name in primary_key:
+            text += " PK"
+        if level == 0 and col.comment:
+            text += f" /* {col.comment} */"
+        columns.append(text)
+    if omitted:
+        columns.append(f"+{omitted} cols")
+    parts = [f"{table.name}({', '.join(columns)})"]
+    for index in table.indexes:
+        kind = "uniq" if index.unique else "idx"
+        parts.append(f"{kind}[{','.join(index.columns)}]")
+    for fk in table.foreign_keys:
+        parts.append(f"fk[{fk.column}->{fk.ref_table}.{fk.ref_column}]")
+    if table.estimated_rows is not None:
+        parts.append(f"~{format_row_count(table.estimated_rows)} rows")
+    if level == 0 and table.comment:
+        parts.append(f"-- {table.comment}")
+    return " ".join(parts)
+
+
+def _drop_order(catalog: Catalog) -> list[str]:
+    """Tables in the order they are dropped: fewest FK links, no yrmo, then name."""
+    links = dict.fromkeys(catalog.tables, 0)
+    for table in catalog:
+        for fk in table.foreign_keys:
+            links[table.name] += 1
+            if fk.ref_table in links:
+                links[fk.ref_table] += 1
+
+    def has_yrmo(name: str) -> bool:
+        return any(col.name.lower() == "yrmo" for col in catalog[name].columns)
+
+    return sorted(catalog.tables, key=lambda name: (links[name], has_yrmo(name), name))
+
+
+def render_compact_schema(
+    schema: Catalog | dict[str, Any],
+    max_tokens: int | None = DEFAULT_TOKEN_BUDGET,
+    max_bytes: int | None = None,
+) -> str:
+    """Render schema (a Catalog or a db_dump_table_schema_json dump) within a budget.
+
+    max_bytes wins over max_tokens when both are given, None for both means no
+    limit. Output is deterministic for a given schema and budget.
+    """
+    catalog = schema if isinstance(schema, Catalog) else Catalog.from_dict(schema)
+    if max_bytes is None and max_tokens is not None:
+        max_bytes = max_tokens * BYTES_PER_TOKEN
+
+    names = sorted(catalog.tables)
+    variants = {
+        name: [_render_table(catalog[name], level) for level in range(_LEVELS)]
+        for name in names
+    }
+    levels = dict.fromkeys(names, 0)
+    sizes = {name: len(variants[name][0].encode("utf-8")) + 1 for name in names}
+    total = sum(sizes.values())
+
+    if max_bytes is not None:
+        for level in range(1, _LEVELS):
+            if total <= max_bytes:
+                break
+            for name in sorted(names, key=lambda name: (-sizes[name], name)):
+                if total <= max_bytes:
+                    break
+                size = len(variants[name][level].encode("utf-8")) + 1
+                total += size - sizes[name]
+                sizes[name], levels[name] = size, level
+
+    dropped: list[str] = []
+    if max_bytes is not None and total > max_bytes:
+        for name in _drop_order(catalog):
+            if total <= max_bytes:
+                break
+            # Each dropped name still costs its length plus ", " in the footer.
+            total -= sizes.pop(name) - len(name.encode("utf-8")) - 2
+            dropped.append(name)
+
+    lines = [variants[name][levels[name]] for name in names if name in sizes]
+    if dropped:
+        lines.append(f"other tables: {', '.join(sorted(dropped))}")
+    return "\n".join(lines)
@@ -1,9 +1,47 @@
-import keyring
+# keyring pulls in its backends on import, only load it when it is used.
+# pylint: disable=import-outside-toplevel
 
+import json
 
-def load_connection_url() -> str | None:
-    return keyring.get_password("aidb", "connection_url")
+# keyring can't list entries, so the profile names are kept in an entry too.
+_PROFILES_KEY = "profiles"
 
 
-def store_connection_url(url: str) -> None:
-    keyring.set_password("aidb", "connection_url", url)
+def _profile_key(name: str | None) -> str:
+    return "connection_url" if name is None else f"profile:{name}"
+
+
+def load_connection_url(name: str | None = None) -> str | None:
+    """The default connection url, or the one of the named profile."""
+    import keyring
+
+    return keyring.get_password("aidb", _profile_key(name))
+
+
+def store_connection_url(url: str, name: str | None = None) -> None:
+    import keyring
+
+    keyring.set_password("aidb", _profile_key(name), url)
+    if name is not None and name not in list_profiles():
+        names = sorted([*list_profiles(), name])
+        keyring.set_password("aidb", _PROFILES_KEY, json.dumps(names))
+
+
+def list_profiles() -> list[str]:
+    """Names of the stored connection profiles."""
+    import keyring
+
+    stored = keyring.get_password("aidb", _PROFILES_KEY)
+    return json.loads(stored) if stored else []
+
+
+def delete_profile(name: str) -> None:
+    import keyring
+    from keyring.errors import PasswordDeleteError
+
+    try:
+        keyring.delete_password("aidb", _profile_key(name))
+    except PasswordDeleteError:
+        pass
+    names = [profile for profile in list_profiles() if profile != name]
+    keyring.set_password("aidb", _PROFILES_KEY, json.dumps(names))
@@ -0,0 +1,170 @@
+"""
+Multi-question session with askai's chat API.
+
+The schema is reflected once and askai's chat API is driven in this process,
+keeping the chat history between questions. When the session covers every
+table and a relevance index is available, each question is sent along with the
+compact schema of the tables picked for it. Rendered slices are cached, and a
+slice is only re-sent when it differs from the last one, since the earlier ones
+are still in the chat history.
+"""
+
+# advanced_askai pulls in openai, only load it when a session starts.
+# pylint: disable=import-outside-toplevel
+
+import time
+
+from aidb.profiling import span
+from aidb.schema_index import SchemaIndex
+from aidb.schema_model import Catalog
+from aidb.schema_prompt import render_compact_schema
+
+
+def _askai_api_key() -> str | None:
+    try:
+        from advanced_askai.util import get_authentication
+    except OSError:
+        # askai reads the login name when imported, which needs a terminal.
+        return None
+    return get_authentication()
+
+
+class AskaiChat:
+    """askai's chat API with the history of this session.
+
+    askai's own Chat class doesn't send its history along, so single_query()
+    gets the whole conversation each time, like askai's interactive mode does.
+    """
+
+    def __init__(
+        self,
+        prompt_file: str,
+        check: bool = True,
+        api_key: str | None = None,
+        model: str | None = None,
+    ) -> None:
+        from advanced_askai.chatgpt import get_max_tokens
+        from advanced_askai.constants import FAST_MODEL
+        from advanced_askai.types import ChatBotConfig
+
+        api_key = api_key or _askai_api_key()
+        if not api_key:
+            raise ValueError("No OpenAI key found, set one with askai --set-key")
+        with open(prompt_file, encoding="utf-8") as f:
+            assistant_prompt = f.read().strip()
+        model = model or FAST_MODEL
+        self.config = ChatBotConfig(
+            model=model,
+            api_key=api_key,
+            ai_assistant_prompt=assistant_prompt,
+            max_tokens=get_max_tokens(model),
+        )
+        self.check = check
+        self.history: list[str] = []
+
+    def ask(self, message: str) -> str:
+        """Answer message in the context of the earlier questions, streamed to stdout."""
+        from advanced_askai.api import single_query
+
+        # A new list each time, with check askai appends its checking turn to it.
+        response = single_query(
+            self.config, prompt=[*self.history, message], check=self.check
+        )
+        self.history += [message, response]
+        return response
+
+
+class AskSession:
+    """Builds the message for each question, reusing rendered schema slices."""
+
+    def __init__(
+        self,
+        catalog: Catalog,
+        index: SchemaIndex | None = None,
+        top_k: int = 0,
+        prompt_budget: int | None = None,
+    ) -> None:
+        self.catalog = catalog
+        self.index = index
+        self.top_k = top_k
+        self.prompt_budget = prompt_budget
+        self._slices: dict[tuple[str, ...], str] = {}
+        self._last_sent: tuple[str, ...] | None = None
+
+    def schema_slice(self, question: str) -> tuple[tuple[str, ...], str]:
+        """(tables, compact schema) for a question, served from cache when possible."""
+        assert self.index is not None
+        selected = self.index.select_tables(question, self.top_k)
+        key = tuple(selected) if selected else tuple(self.catalog.tables)
+        text = self._slices.get(key)
+        if text is None:
+            text = render_compact_schema(
+                self.catalog.subset(list(key)), max_tokens=self.prompt_budget
+            )
+            self._slices[key] = text
+        return key, text
+
+    def message(self, question: str) -> str:
+        """The text to send for question, with a schema slice if it is needed."""
+        if self.index is None or self.top_k <= 0:
+            return question
+        key, text = self.schema_slice(question)
+        if key == self._last_sent:
+            return question
+        self._last_sent = key
+        return f"Schema for this question:\n{text}\nQuestion: {question}"
+
+
+def run_session(
+    prompt_file: str,
+    session: AskSession,
+    first_question: str | None = None,
+    check: bool = True,
+    chat: AskaiChat | None = None,
+) -> int:
+    """Read questions until EOF or "exit" and answer them in one chat.
+
+    chat defaults to an AskaiChat on prompt_file.
+    """
+    from advanced_askai.chatgpt import (
+        ChatGPTAuthenticationError,
+        ChatGPTConnectionError,
+        ChatGPTRateLimitError,
+    )
+
+    try:
+        chat = chat or AskaiChat(prompt_file, check=check)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    question = first_question
+    try:
+        while True:
+            if not question:
+                try:
+                    question = input("\nQuestion (blank or 'exit' to quit):\n>>> ")
+                except EOFError:
+                    break
+                question = question.strip()
+                if not question or question.casefold() == "exit":
+                    break
+            start = time.perf_counter()
+            with span("session.prepare") as s:
+                message = session.message(question)
+                s.set(bytes=len(message.encode("utf-8")))
+            setup = time.perf_counter() - start
+            print(f"(prepared in {setup * 1000:.1f} ms)")
+            with span("askai.question"):
+                chat.ask(message)
+            question = None
+    except KeyboardInterrupt:
+        print("Session aborted by user.")
+        return 1
+    except (
+        ChatGPTAuthenticationError,
+        ChatGPTConnectionError,
+        ChatGPTRateLimitError,
+    ) as e:
+        print(f"Error from askai: {e}")
+        return 1
+    return 0
@@ -0,0 +1,500 @@
+"""
+Offline validation of generated SQL against a schema catalog.
+
+The SQL is tokenized (no database round trip, no parser dependency) and every
+table, alias and column it references is looked up in the catalog, so a
+hallucinated name is caught in microseconds rather than by a server error.
+Join conditions comparing two columns where neither side leads an index and no
+foreign key links them are reported as warnings.
+
+The checks are deliberately conservative: keywords, function names, aliases and
+columns of derived tables or CTEs are never flagged, and an unknown name the
+tokenizer can't place as a column (one that follows a modifier keyword rather
+than starting an expression) is only a warning, so a valid query should not be
+reported as broken even where the tokenizer can't tell what a name is.
+
+    python -m aidb.sql_validate "mysql+pymysql://..." "SELECT ..."
+
+uses the schema cached by an earlier aidb or db_dump_schema_json run.
+"""
+
+import argparse
+import difflib
+import re
+import sys
+from dataclasses import dataclass
+from typing import Any
+
+from aidb.schema_model import Catalog
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<space>\s+|--[^\n]*|\#[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*")
+    |(?P<quoted>`(?:[^`]|``)*`)
+    |(?P<param>:\w+|%\(\w+\)s|%s|\?)
+    |(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    |(?P<name>[A-Za-z_][\w$]*)
+    |(?P<op>:=|<=>|<>|!=|>=|<=|\|\||::|[-+*/%=<>(),.;!~^&|@\[\]{}])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Words that are never column names in generated SQL, including functions that
+# can be written without parentheses, date units and type names used in CAST().
+KEYWORDS = frozenset("""
+    ADD ALL ALTER AND ANY AS ASC BETWEEN BINARY BOOLEAN BOTH BY CASE CAST CHAR
+    CHARACTER CHARSET COLLATE CROSS CURRENT CURRENT_DATE CURRENT_TIME
+    CURRENT_TIMESTAMP CURRENT_USER DATE DATETIME DAY DAY_HOUR DAY_MINUTE
+    DAY_SECOND DECIMAL DELETE DESC DISTINCT DIV DOUBLE ELSE END ESCAPE EXCEPT
+    EXISTS EXPANSION FALSE FETCH FIRST FLOAT FOLLOWING FOR FORCE FROM FULL GROUP
+    HAVING HIGH_PRIORITY HOUR HOUR_MINUTE HOUR_SECOND IGNORE ILIKE IN INDEX
+    INNER INSERT INT INTEGER INTERSECT INTERVAL INTO IS JOIN JSON KEY LANGUAGE
+    LAST LATERAL LEADING LEFT LIKE LIMIT LOCALTIME LOCALTIMESTAMP LOCK
+    MICROSECOND MINUTE MINUTE_SECOND MOD MODE MONTH NATURAL NEXT NOT NULL NULLS
+    OF OFFSET ON ONLY OR ORDER OUTER OVER PARTITION PRECEDING QUARTER QUERY
+    RANGE RECURSIVE REGEXP REPLACE RIGHT RLIKE ROLLUP ROW ROWS SECOND SELECT
+    SEPARATOR SET SHARE SIGNED SOME SQL_BIG_RESULT SQL_BUFFER_RESULT
+    SQL_CALC_FOUND_ROWS SQL_NO_CACHE SQL_SMALL_RESULT STRAIGHT_JOIN TABLE TEXT
+    THEN TIME TIMESTAMP TO TRAILING TRUE UNBOUNDED UNION UNIQUE UNKNOWN UNSIGNED
+    UPDATE USE USING UTC_DATE UTC_TIME UTC_TIMESTAMP VALUES VARCHAR WEEK WHEN
+    WHERE WINDOW WITH XOR YEAR YEAR_MONTH
+    """.split())
+
+# MySQL modifiers written right after SELECT, STRAIGHT_JOIN there joins nothing.
+_SELECT_MODIFIERS = frozenset("""
+    HIGH_PRIORITY STRAIGHT_JOIN SQL_SMALL_RESULT SQL_BIG_RESULT SQL_BUFFER_RESULT
+    SQL_NO_CACHE SQL_CALC_FOUND_ROWS
+    """.split())
+# Index hints, the names in USE INDEX (ix) are indexes rather than columns.
+_INDEX_HINT_KEYWORDS = frozenset(("USE", "FORCE", "IGNORE"))
+
+# Keywords that end a FROM list or an ON condition at the same nesting level.
+_CLAUSE_KEYWORDS = frozenset("""
+    WHERE GROUP ORDER HAVING LIMIT UNION EXCEPT INTERSECT WINDOW JOIN ON USING
+    LEFT RIGHT INNER OUTER CROSS NATURAL STRAIGHT_JOIN SET VALUES SELECT FOR LOCK
+    """.split())
+_TABLE_KEYWORDS = frozenset(("FROM", "JOIN", "UPDATE", "INTO", "STRAIGHT_JOIN"))
+# Keywords a column reference can follow, after any other keyword (WITH ROLLUP,
+# IN BOOLEAN MODE, ...) an unknown name is more likely an unlisted modifier.
+_EXPRESSION_KEYWORDS = frozenset("""
+    SELECT WHERE AND OR NOT XOR ON BY HAVING WHEN THEN ELSE CASE DISTINCT BETWEEN
+    LIKE ILIKE REGEXP RLIKE IS DIV MOD SET ALL ANY SOME EXISTS
+    """.split()) | _SELECT_MODIFIERS
+# A name after these (or CHARACTER SET) is a character set or collation, as in
+# CONVERT(x USING utf8mb4), never a column.
+_CHARSET_KEYWORDS = frozenset(("USING", "COLLATE", "CHARSET"))
+
+
+@dataclass
+class SqlIssue:
+    kind: str  # "syntax", "unknown_table", "unknown_column" or "unindexed_join"
+    message: str
+    severity: str = "error"  # or "warning"
+
+
+@dataclass
+class _Token:
+    kind: str  # "name", "keyword", "string", "number", "param" or "op"
+    value: str
+    depth: int
+
+    def is_op(self, value: str) -> bool:
+        return self.kind == "op" and self.value == value
+
+    def is_keyword(self, *values: str) -> bool:
+        return self.kind == "keyword" and self.value.upper() in values
+
+
+def tokenize(sql: str) -> list[_Token]:
+    """Tokens of sql with their parenthesis depth, raises ValueError on garbage."""
+    tokens = []
+    depth = 0
+    pos = 0
+    while pos < len(sql):
+        match = _TOKEN_RE.match(sql, pos)
+        if match is None:
+            raise ValueError(f"Unexpected character {sql[pos]!r} at offset {pos}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "space":
+            continue
+        if kind == "quoted":
+            kind, value = "name", value[1:-1].replace("``", "`")
+        elif kind == "name" and value.upper() in KEYWORDS:
+            kind = "keyword"
+        elif kind == "op" and value == ")":
+            depth -= 1
+        assert kind is not None
+        tokens.append(_Token(kind, value, depth))
+        if kind == "op" and value == "(":
+            depth += 1
+    if depth != 0:
+        raise ValueError("Unbalanced parentheses")
+    return tokens
+
+
+def _query_scopes(tokens: list[_Token]) -> list[bool]:
+    """Per token, True when it is part of a query rather than of a function's
+    arguments, so the FROM of TRIM(LEADING 'x' FROM url) starts no table list."""
+    scopes = [True]
+    out = []
+    for i, token in enumerate(tokens):
+        if token.is_op(")"):
+            scopes.pop()
+        out.append(scopes[-1])
+        if token.is_op("("):
+            nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+            scopes.append(
+                nxt is not None
+                and (nxt.is_keyword("SELECT", "WITH") or nxt.is_op("(") and out[-1])
+            )
+    return out
+
+
+def _index_hint_end(tokens: list[_Token], i: int, defining: set[int]) -> int | None:
+    """Position after the index hint starting at i (USE INDEX FOR JOIN (ix, ...)),
+    None when there is none. The index names are added to defining."""
+    if not tokens[i].is_keyword(*_INDEX_HINT_KEYWORDS):
+        return None
+    j = i + 1
+    if j >= len(tokens) or not tokens[j].is_keyword("INDEX", "KEY"):
+        return None
+    j += 1
+    while j < len(tokens) and not tokens[j].is_op("("):
+        j += 1  # FOR JOIN, FOR ORDER BY, FOR GROUP BY
+    j += 1
+    while j < len(tokens) and not (
+        tokens[j].is_op(")") and tokens[j].depth == tokens[i].depth
+    ):
+        if tokens[j].kind == "name":
+            defining.add(j)
+        j += 1
+    return j + 1
+
+
+def _ends_expression(token: _Token | None) -> bool:
+    if token is None:
+        return False
+    if token.kind in ("name", "string", "number", "param"):
+        return True
+    return token.is_op(")") or token.is_op("*") or token.is_keyword("END")
+
+
+class SqlValidator:
+    """Validates statements against one catalog, lookups are precomputed."""
+
+    def __init__(self, catalog: Catalog | dict[str, Any]) -> None:
+        if not isinstance(catalog, Catalog):
+            catalog = Catalog.from_dict(catalog)
+        self.catalog = catalog
+        self._tables = {table.name.lower(): table.name for table in catalog}
+        self._columns = {
+            table.name.lower(): {column.name.lower() for column in table.columns}
+            for table in catalog
+        }
+        # Columns a lookup can use an index for: the first column of each index.
+        self._leading = {
+            table.name.lower(): {
+                columns[0].lower()
+                for columns in [table.primary_key]
+                + [index.columns for index in table.indexes]
+                if columns
+            }
+            for table in catalog
+        }
+        self._fks = {
+            (
+                table.name.lower(),
+                fk.column.lower(),
+                fk.ref_table.lower(),
+                fk.ref_column.lower(),
+            )
+            for table in catalog
+            for fk in table.foreign_keys
+        }
+
+    def _unknown_table(self, name: str) -> SqlIssue:
+        close = difflib.get_close_matches(name, list(self._tables.values()), n=1)
+        hint = f", did you mean {close[0]}?" if close else ""
+        return SqlIssue("unknown_table", f"unknown table {name}{hint}")
+
+    def _unknown_column(self, column: str, tables: list[str]) -> SqlIssue:
+        candidates = sorted(
+            {
+                c.name
+                for table in tables
+                for c in self.catalog[self._tables[table]].columns
+            }
+        )
+        close = difflib.get_close_matches(column, candidates, n=1)
+        hint = f", did you mean {close[0]}?" if close else ""
+        where = ", ".join(self._tables[table] for table in tables)
+        return SqlIssue("unknown_column", f"unknown column {column} in {where}{hint}")
+
+    def _sources(
+        self, tokens: list[_Token], issues: list[SqlIssue]
+    ) -> tuple[dict[str, str | None], set[int]]:
+        """Map of alias/table name (lowercase) to table, None for derived ones.
+
+        Also returns the positions of tokens that define a name rather than
+        reference a column.
+        """
+        sources: dict[str, str | None] = {}
+        defining: set[int] = set()
+        ctes: set[str] = set()
+        # CTE names: WITH name AS ( or , name (cols) AS (
+        with_seen = False
+        for i, token in enumerate(tokens):
+            if token.is_keyword("WITH"):
+                with_seen = True
+            if not with_seen or token.kind != "name" or i == 0:
+                continue
+            prev = tokens[i - 1]
+            if not (prev.is_keyword("WITH", "RECURSIVE") or prev.is_op(",")):
+                continue
+            j = i + 1
+            names = [i]
+            if j < len(tokens) and tokens[j].is_op("("):
+                while j < len(tokens) and not (
+                    tokens[j].is_op(")") and tokens[j].depth == token.depth
+                ):
+                    if tokens[j].kind == "name":
+                        names.append(j)
+                    j += 1
+                j += 1
+            if (
+                j + 1 < len(tokens)
+                and tokens[j].is_keyword("AS")
+                and tokens[j + 1].is_op("(")
+            ):
+                ctes.add(token.value.lower())
+                sources[token.value.lower()] = None
+                defining.update(names)
+
+        in_query = _query_scopes(tokens)
+        from_depth: int | None = None
+        i = 0
+        while i < len(tokens):
+            hint_end = _index_hint_end(tokens, i, defining)
+            if hint_end is not None:
+                i = hint_end
+                continue
+            token = tokens[i]
+            starts_item = (
+                in_query[i]
+                and token.kind == "keyword"
+                and token.value.upper() in _TABLE_KEYWORDS
+                # SELECT STRAIGHT_JOIN ... is a modifier, not a join.
+                and not (
+                    token.is_keyword("STRAIGHT_JOIN")
+                    and i > 0
+                    and tokens[i - 1].is_keyword(
+                        "SELECT", "DISTINCT", "ALL", *_SELECT_MODIFIERS
+                    )
+                )
+            )
+            if from_depth is not None and (
+                token.depth < from_depth
+                or token.depth == from_depth
+                and token.kind == "keyword"
+                and token.value.upper() in _CLAUSE_KEYWORDS
+            ):
+                from_depth = None
+            if token.is_keyword("FROM") and in_query[i]:
+                from_depth = token.depth
+            if (
+                from_depth is not None
+                and token.is_op(",")
+                and token.depth == from_depth
+            ):
+                starts_item = True
+            if not starts_item or i + 1 >= len(tokens):
+                i += 1
+                continue
+            i += 1
+            if tokens[i].is_op("("):
+                # Derived table: skip to its alias, the inside is scanned as usual.
+                depth = tokens[i].depth
+                j = i + 1
+                while j < len(tokens) and not (
+                    tokens[j].is_op(")") and tokens[j].depth == depth
+                ):
+                    j += 1
+                j += 1
+                if j < len(tokens) and tokens[j].is_keyword("AS"):
+                    j += 1
+                if j < len(tokens) and tokens[j].kind == "name":
+                    sources[tokens[j].value.lower()] = None
+                    defining.add(j)
+                continue
+            if tokens[i].kind != "name":
+                continue
+            start = i
+            # schema.table
+            while (
+                i + 2 < len(tokens)
+                and tokens[i + 1].is_op(".")
+                and tokens[i + 2].kind == "name"
+            ):
+                i += 2
+            defining.update(range(start, i + 1))
+            name = tokens[i].value
+            if name.lower() in ctes:
+                table: str | None = None
+            elif name.lower() in self._tables:
+                table = self._tables[name.lower()]
+            else:
+                issues.append(self._unknown_table(name))
+                table = None
+            sources[name.lower()] = table
+            j = i + 1
+            if j < len(tokens) and tokens[j].is_keyword("AS"):
+                j += 1
+            if j < len(tokens) and tokens[j].kind == "name":
+                sources[tokens[j].value.lower()] = table
+                defining.add(j)
+            i = j
+        return sources, defining
+
+    def _indexed(self, table: str, column: str) -> bool:
+        return column in self._leading.get(table, ())
+
+    def _check_join(
+        self, left: tuple[str, str], right: tuple[str, str], issues: list[SqlIssue]
+    ) -> None:
+        (t1, c1), (t2, c2) = left, right
+        if self._indexed(t1, c1) or self._indexed(t2, c2):
+            return
+        if (t1, c1, t2, c2) in self._fks or (t2, c2, t1, c1) in self._fks:
+            return
+        issues.append(
+            SqlIssue(
+                "unindexed_join",
+                f"join on {self._tables[t1]}.{c1} = {self._tables[t2]}.{c2}: "
+                "neither column is indexed or linked by a foreign key",
+                severity="warning",
+            )
+        )
+
+    def validate(self, sql: str) -> list[SqlIssue]:
+        """Problems found in sql, an empty list when it looks fine."""
+        try:
+            tokens = tokenize(sql)
+        except ValueError as e:
+            return [SqlIssue("syntax", str(e))]
+        issues: list[SqlIssue] = []
+        sources, defining = self._sources(tokens, issues)
+        real = sorted({t.lower() for t in sources.values() if t is not None})
+        # Unqualified names can only be checked when every source is known.
+        all_known = all(t is not None for t in sources.values())
+        aliases: set[str] = set()
+        # Name and whether it sits where a column reference starts.
+        unqualified: list[tuple[str, bool]] = []
+        qualified: dict[int, tuple[str, str]] = {}
+
+        for i, token in enumerate(tokens):
+            if token.kind != "name" or i in defining:
+                continue
+            prev = tokens[i - 1] if i else None
+            nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+            if prev is not None and (prev.is_op(".") or prev.is_op("@")):
+                continue
+            if prev is not None and (
+                prev.is_keyword(*_CHARSET_KEYWORDS)
+                or prev.is_keyword("SET")
+                and tokens[i - 2].is_keyword("CHARACTER")
+            ):
+                if nxt is None or not nxt.is_op("("):
+                    continue
+            if nxt is not None and nxt.is_op("("):
+                continue  # function call
+            if nxt is not None and nxt.is_op(".") and i + 2 < len(tokens):
+                column_token = tokens[i + 2]
+                if column_token.is_op("*") or column_token.kind not in (
+                    "name",
+                    "keyword",
+                ):
+                    continue
+                qualifier = token.value.lower()
+                if qualifier not in sources:
+                    issues.append(self._unknown_table(token.value))
+                    continue
+                table = sources[qualifier]
+                if table is None:
+                    continue
+                column = column_token.value.lower()
+                if column not in self._columns[table.lower()]:
+                    issues.append(
+                        self._unknown_column(column_token.value, [table.lower()])
+                    )
+                else:
+                    qualified[i] = (table.lower(), column)
+                continue
+            if prev is not None and (prev.is_keyword("AS") or _ends_expression(prev)):
+                aliases.add(token.value.lower())
+                continue
+            placed = (
+                prev is None
+                or prev.kind == "op"
+                or prev.is_keyword(*_EXPRESSION_KEYWORDS)
+            )
+            unqualified.append((token.value, placed))
+
+        if all_known and real:
+            columns = set().union(*(self._columns[table] for table in real))
+            for name, placed in unqualified:
+                lowered = name.lower()
+                if lowered in columns or lowered in aliases or lowered in sources:
+                    continue
+                issue = self._unknown_column(name, real)
+                if not placed:
+                    issue.severity = "warning"
+                issues.append(issue)
+
+        # Join conditions: a.x = b.y
+        for i, left in qualified.items():
+            j = i + 3
+            if j + 1 < len(tokens) and tokens[j].is_op("=") and j + 1 in qualified:
+                right = qualified[j + 1]
+                if left[0] != right[0]:
+                    self._check_join(left, right, issues)
+        return issues
+
+
+def validate_sql(sql: str, catalog: Catalog | dict[str, Any]) -> list[SqlIssue]:
+    """Problems found in sql against catalog, see SqlValidator."""
+    return SqlValidator(catalog).validate(sql)
+
+
+def main() -> int:
+    # Only the CLI needs the cache (and SQLAlchemy through it).
+    from aidb.schema_cache import (  # pylint: disable=import-outside-toplevel
+        cache_key,
+        load_cached_entry,
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Check generated SQL against the cached schema, offline."
+    )
+    parser.add_argument("connection_string", type=str)
+    parser.add_argument("sql", type=str)
+    args = parser.parse_args()
+    entry = load_cached_entry(cache_key(args.connection_string, None))
+    if not entry or not entry.get("schema"):
+        print(
+            "Error: no cached schema for this database, run aidb or "
+            "db_dump_schema_json with all tables first."
+        )
+        return 1
+    issues = validate_sql(args.sql, entry["schema"])
+    for issue in issues:
+        print(f"{issue.severity}: {issue.message}")
+    if not issues:
+        print("OK.")
+    return 1 if any(issue.severity == "error" for issue in issues) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Cheap table size statistics: estimated rows, data size and index cardinality.
+
+On MySQL everything comes from information_schema.TABLES and STATISTICS in two
+queries, the numbers are the optimizer's estimates and cost nothing to read.
+SQLite only has estimates after ANALYZE (sqlite_stat1), other dialects have
+none. Results are cached next to the schema for max_age seconds, since unlike
+the schema they drift with every insert and there is no cheap fingerprint.
+
+Per table:
+
+    {"rows": 500000000, "data_length": 81604378624, "index_length": 1234,
+     "index_cardinality": {"ix_youtube_yrmo": 96}}
+
+with None wherever the database has no estimate.
+"""
+
+import time
+from typing import Any
+
+from sqlalchemy import Connection, inspect, text
+
+from aidb.db_engine import connect_timeout_args, get_engine
+from aidb.db_kumquat import query_kumquat
+from aidb.profiling import span
+from aidb.schema_cache import cache_key, load_cached_entry, store_cached_entry
+
+DEFAULT_STATS_MAX_AGE = 60 * 60
+
+_MYSQL_TABLE_STATS_SQL = text("""
+    SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+    """)
+
+_MYSQL_INDEX_STATS_SQL = text("""
+    SELECT TABLE_NAME, INDEX_NAME, CARDINALITY
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+    ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """)
+
+_SQLITE_HAS_STAT1_SQL = text(
+    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+)
+_SQLITE_STAT1_SQL = text("SELECT tbl, idx, stat FROM sqlite_stat1")
+
+
+def _empty() -> dict[str, Any]:
+    return {
+        "rows": None,
+        "data_length": None,
+        "index_length": None,
+        "index_cardinality": {},
+    }
+
+
+def _as_int(value: Any) -> int | None:
+    return None if value is None else int(value)
+
+
+def _mysql_stats(conn: Connection) -> dict[str, dict[str, Any]]:
+    out: dict[str, dict[str, Any]] = {}
+    for name, rows, data_length, index_length in conn.execute(_MYSQL_TABLE_STATS_SQL):
+        out[name] = {
+            **_empty(),
+            "rows": _as_int(rows),
+            "data_length": _as_int(data_length),
+            "index_length": _as_int(index_length),
+        }
+    for name, index, cardinality in conn.execute(_MYSQL_INDEX_STATS_SQL):
+        if name in out:
+            # Rows come in SEQ_IN_INDEX order, the last one covers the whole key.
+            out[name]["index_cardinality"][index] = _as_int(cardinality)
+    return out
+
+
+def _sqlite_stats(conn: Connection) -> dict[str, dict[str, Any]]:
+    out = {name: _empty() for name in inspect(conn).get_table_names()}
+    if conn.execute(_SQLITE_HAS_STAT1_SQL).first() is None:
+        return out  # never ANALYZEd, no estimates
+    for table, index, stat in conn.execute(_SQLITE_STAT1_SQL):
+        if table not in out or not stat:
+            continue
+        # "rows avg-rows-per-key-prefix ...", the last average covers the full key.
+        numbers = [int(n) for n in stat.split() if n.isdigit()]
+        if not numbers:
+            continue
+        out[table]["rows"] = numbers[0]
+        if index and len(numbers) > 1:
+            out[table]["index_cardinality"][index] = numbers[0] // max(numbers[-1], 1)
+    return out
+
+
+def fetch_table_stats(conn: Connection) -> dict[str, dict[str, Any]]:
+    """Statistics for every table reachable through conn, {} if unsupported."""
+    if conn.dialect.name == "mysql":
+        return _mysql_stats(conn)
+    if conn.dialect.name == "sqlite":
+        return _sqlite_stats(conn)
+    return {}
+
+
+def load_table_stats(
+    connection_string: str,
+    refresh: bool = False,
+    max_age: float = DEFAULT_STATS_MAX_AGE,
+) -> dict[str, dict[str, Any]]:
+    """Statistics for every table, from the cache when younger than max_age."""
+    key = f"{cache_key(connection_string, None)}.stats"
+    with span("stats.load") as s:
+        entry = None if refresh else load_cached_entry(key)
+        if entry is not None and time.time() - entry.get("fetched", 0) < max_age:
+            s.set(cache_hits=1)
+            return entry["stats"]
+        engine = get_engine(connection_string, connect_timeout_args(connection_string))
+        with engine.connect() as conn:
+            stats = fetch_table_stats(conn)
+        s.set(tables=len(stats))
+    store_cached_entry(key, {"fetched": time.time(), "stats": stats})
+    return stats
+
+
+def attach_table_stats(
+    schema: dict[str, Any], stats: dict[str, dict[str, Any]]
+) -> dict[str, Any]:
+    """Add a "stats" entry to each table of a db_dump_table_schema_json dump."""
+    for name, table_info in schema["tables"].items():
+        table_info["stats"] = stats.get(name, _empty())
+    return schema
+
+
+def approximate_count(
+    connection_string: str,
+    table: str,
+    max_age: float = DEFAULT_STATS_MAX_AGE,
+    exact_fallback: bool = False,
+) -> int | None:
+    """Estimated row count of table without a COUNT(*) scan.
+
+    On InnoDB the estimate can be off by tens of percent, good enough for "how
+    big is it" but not for reports. None when there is no estimate, unless
+    exact_fallback runs a COUNT(*) instead.
+    """
+    stats = load_table_stats(connection_string, max_age=max_age).get(table)
+    if stats is not None and stats["rows"] is not None:
+        return stats["rows"]
+    if not exact_fallback:
+        return None
+    engine = get_engine(connection_string, connect_timeout_args(connection_string))
+    if table not in inspect(engine).get_table_names():
+        raise ValueError(f"Requested table(s) not available in the database: {table}")
+    quoted = engine.dialect.identifier_preparer.quote(table)
+    return int(query_kumquat(connection_string, f"SELECT COUNT(*) FROM {quoted}")[0][0])
@@ -0,0 +1,91 @@
+"""
+Unit test file.
+"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from typing import Any
+from unittest import mock
+
+from aidb import db_batch
+from aidb.db_batch import query_kumquat_batch, query_kumquat_batch_async
+from aidb.db_engine import dispose_all
+
+QUERIES: list[Any] = [
+    ("SELECT COUNT(*) FROM youtube WHERE yrmo = :yrmo", {"yrmo": 202401}),
+    "SELECT * FROM no_such_table",
+    ("SELECT COUNT(*) FROM youtube WHERE yrmo = :yrmo", {"yrmo": 202402}),
+]
+
+
+class DbBatchTester(unittest.TestCase):
+    """Tests for the concurrent batch executor."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER)")
+            conn.executemany(
+                "INSERT INTO youtube (yrmo) VALUES (?)",
+                [(202401,), (202401,), (202402,)],
+            )
+        self.url = f"sqlite:///{path}"
+
+    def tearDown(self) -> None:
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def check(self, results: list) -> None:
+        self.assertEqual([True, False, True], [result.ok for result in results])
+        self.assertEqual(2, results[0].rows[0][0])
+        self.assertEqual(1, results[2].rows[0][0])
+
+    def test_batch(self) -> None:
+        self.check(query_kumquat_batch(self.url, QUERIES, max_workers=2))
+
+    def test_batch_async(self) -> None:
+        self.check(asyncio.run(query_kumquat_batch_async(self.url, QUERIES)))
+
+    def check_timeouts(self, batch: Any) -> None:
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_query(_db_url: str, sql: str, **_kwargs: Any) -> list:
+            with lock:
+                running.append(sql)
+                peak.append(len(running))
+            time.sleep(0.3 if sql == "slow" else 0.0)
+            with lock:
+                running.remove(sql)
+            return [(sql,)]
+
+        with mock.patch.object(db_batch, "query_kumquat", side_effect=slow_query):
+            results = batch(
+                self.url, ["slow", "fast"], max_workers=1, query_timeout=0.05
+            )
+            time.sleep(0.4)  # let the slow statement finish
+        self.assertIsInstance(results[0].error, TimeoutError)
+        self.assertEqual([("fast",)], results[1].rows)
+        self.assertEqual(1, max(peak))
+
+    def test_batch_timeout(self) -> None:
+        self.check_timeouts(query_kumquat_batch)
+
+    def test_batch_async_timeout(self) -> None:
+        self.check_timeouts(
+            lambda *args, **kwargs: asyncio.run(
+                query_kumquat_batch_async(*args, **kwargs)
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Unit test file.
+"""
+
+import decimal
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from array import array
+
+from aidb import db_columnar
+from aidb.db_columnar import StringColumn, query_kumquat_columnar
+from aidb.db_engine import dispose_all
+
+
+class DbColumnarTester(unittest.TestCase):
+    """Tests for the columnar result mode."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute(
+                "CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER, score REAL, url TEXT)"
+            )
+            conn.executemany(
+                "INSERT INTO youtube (yrmo, score, url) VALUES (?, ?, ?)",
+                [(202401, 1.5, "a"), (None, 2.0, "bé"), (202402, 2, None)],
+            )
+        self.url = f"sqlite:///{path}"
+
+    def tearDown(self) -> None:
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_columnar(self) -> None:
+        result = query_kumquat_columnar(
+            self.url,
+            "SELECT id, yrmo, score, url FROM youtube WHERE id > :id ORDER BY id",
+            params={"id": 0},
+            batch_size=2,
+        )
+        self.assertEqual(3, result.num_rows)
+        self.assertEqual(array("q", [1, 2, 3]), result.columns["id"])
+        self.assertEqual(array("q", [202401, 0, 202402]), result.columns["yrmo"])
+        self.assertEqual(bytearray(b"\x00\x01\x00"), result.nulls["yrmo"])
+        self.assertEqual(array("d", [1.5, 2.0, 2.0]), result.columns["score"])
+        urls = result.columns["url"]
+        self.assertIsInstance(urls, StringColumn)
+        self.assertEqual(["a", "bé", ""], urls.to_list())
+        self.assertEqual(bytearray(b"\x00\x00\x01"), result.nulls["url"])
+
+    def test_decimals_stay_exact(self) -> None:
+        values = (
+            decimal.Decimal("0.10"),
+            None,
+            decimal.Decimal("12345678901234567.89"),
+        )
+        for type_code in (246, None):  # MySQL NEWDECIMAL, and inferred
+            builder = db_columnar._ColumnBuilder(  # pylint: disable=protected-access
+                type_code
+            )
+            builder.extend(values)
+            self.assertEqual(list(values), builder.finish())
+            lossy = db_columnar._ColumnBuilder(  # pylint: disable=protected-access
+                type_code, decimals_as_float=True
+            )
+            lossy.extend(values)
+            self.assertEqual(
+                array("d", [0.1, 0.0, 12345678901234568.0]), lossy.finish()
+            )
+
+    def test_unsigned_bigint_overflow_stays_exact(self) -> None:
+        builder = db_columnar._ColumnBuilder(None)  # pylint: disable=protected-access
+        builder.extend([1, None])
+        builder.extend([2**63 + 1, 3])
+        self.assertEqual([1, None, 2**63 + 1, 3], builder.finish())
+        floats = db_columnar._ColumnBuilder(None)  # pylint: disable=protected-access
+        floats.extend([1, 2])
+        floats.extend([2.5])
+        self.assertEqual(array("d", [1.0, 2.0, 2.5]), floats.finish())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+Unit test file.
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from aidb import db_dump_schema_json
+from aidb.db_dump_schema_json import (
+    db_dump_table_schema_json,
+    iter_table_schemas,
+    write_schema_json,
+    write_schema_ndjson,
+)
+from aidb.db_engine import dispose_all
+from aidb.db_reflect_mysql import mysql_type_string
+
+SCHEMA_SQL = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(64) NOT NULL);
+CREATE TABLE youtube (
+    id INTEGER PRIMARY KEY,
+    url VARCHAR(255),
+    yrmo INTEGER,
+    user_id INTEGER REFERENCES users(id)
+);
+CREATE INDEX ix_youtube_yrmo ON youtube (yrmo);
+"""
+
+
+def make_sqlite_db(directory: str) -> str:
+    path = os.path.join(directory, "test.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA_SQL)
+    return f"sqlite:///{path}"
+
+
+class DbDumpSchemaJsonTester(unittest.TestCase):
+    """Tests for db_dump_table_schema_json."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.url = make_sqlite_db(self.tmpdir)
+
+    def tearDown(self) -> None:
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_dump_shape(self) -> None:
+        schema = db_dump_table_schema_json(self.url, tables=["youtube"])
+        # users is pulled in through the foreign key.
+        self.assertEqual({"youtube", "users"}, set(schema["tables"]))
+        youtube = schema["tables"]["youtube"]
+        self.assertEqual(["id"], youtube["primary_key"])
+        self.assertEqual(
+            ["id", "url", "yrmo", "user_id"],
+            [col["column_name"] for col in youtube["columns"]],
+        )
+        self.assertEqual([["yrmo"]], [idx["columns"] for idx in youtube["indexes"]])
+        self.assertEqual(
+            [{"column": "user_id", "references": {"table": "users", "column": "id"}}],
+            youtube["foreign_keys"],
+        )
+
+    def test_parallel_matches_serial(self) -> None:
+        with sqlite3.connect(os.path.join(self.tmpdir, "test.db")) as conn:
+            for i in range(10):
+                conn.execute(f"CREATE TABLE t{i} (id INTEGER PRIMARY KEY, v TEXT)")
+        serial = db_dump_table_schema_json(self.url)
+        parallel = db_dump_table_schema_json(self.url, workers=4)
+        self.assertEqual(list(serial["tables"]), list(parallel["tables"]))
+        self.assertEqual(serial, parallel)
+
+    def test_parallel_reflects_fk_targets_once(self) -> None:
+        with sqlite3.connect(os.path.join(self.tmpdir, "test.db")) as conn:
+            for i in range(10):
+                conn.execute(
+                    f"CREATE TABLE t{i} (id INTEGER PRIMARY KEY,"
+                    " user_id INTEGER REFERENCES users(id))"
+                )
+        names = ["youtube"] + [f"t{i}" for i in range(10)]
+        real = db_dump_schema_json._reflect_chunk  # pylint: disable=protected-access
+        with mock.patch.object(
+            db_dump_schema_json, "_reflect_chunk", side_effect=real
+        ) as reflect_chunk:
+            parallel = db_dump_table_schema_json(self.url, names, workers=16)
+        reflected = [name for c in reflect_chunk.call_args_list for name in c.args[1]]
+        self.assertEqual(1, reflected.count("users"))
+        self.assertEqual(db_dump_table_schema_json(self.url, names), parallel)
+
+    def test_missing_table(self) -> None:
+        with self.assertRaises(ValueError):
+            db_dump_table_schema_json(self.url, tables=["nope"])
+
+    def test_stream_matches_dump(self) -> None:
+        for tables in (None, ["youtube"]):
+            out = io.StringIO()
+            write_schema_json(iter_table_schemas(self.url, tables, chunk_size=1), out)
+            expected = db_dump_table_schema_json(self.url, tables=tables)
+            self.assertEqual(json.dumps(expected, indent=2) + "\n", out.getvalue())
+        out = io.StringIO()
+        self.assertEqual(0, write_schema_json([], out))
+        self.assertEqual({"tables": {}}, json.loads(out.getvalue()))
+
+    def test_stream_clamps_chunk_size(self) -> None:
+        for chunk_size in (0, -3):
+            names = [name for name, _ in iter_table_schemas(self.url, None, chunk_size)]
+            self.assertEqual(["users", "youtube"], sorted(names), chunk_size)
+
+    def test_stream_reflects_each_table_once(self) -> None:
+        real = db_dump_schema_json._reflect_chunk  # pylint: disable=protected-access
+        with mock.patch.object(
+            db_dump_schema_json, "_reflect_chunk", side_effect=real
+        ) as reflect_chunk:
+            names = [name for name, _ in iter_table_schemas(self.url, chunk_size=1)]
+        reflected = [name for c in reflect_chunk.call_args_list for name in c.args[1]]
+        self.assertEqual(sorted(names), sorted(reflected))
+
+    def test_stream_error_goes_to_stderr(self) -> None:
+        args = argparse.Namespace(
+            connection_string=self.url,
+            tables="youtube",
+            diff=False,
+            no_cache=True,
+            stream=True,
+            ndjson=True,
+            chunk_size=1,
+            workers=None,
+            output=None,
+        )
+
+        def failing(*_args: object, **_kwargs: object) -> object:
+            yield "youtube", {}
+            raise ValueError("gone")
+
+        dump = db_dump_schema_json._dump  # pylint: disable=protected-access
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch.object(
+            db_dump_schema_json, "iter_table_schemas", failing
+        ), mock.patch("sys.stdout", stdout), mock.patch("sys.stderr", stderr):
+            self.assertEqual(1, dump(args))
+        self.assertNotIn("Error", stdout.getvalue())
+        self.assertIn("Error: gone", stderr.getvalue())
+
+    def test_stream_ndjson(self) -> None:
+        out = io.StringIO()
+        count = write_schema_ndjson(iter_table_schemas(self.url, ["youtube"]), out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(2, count)
+        self.assertEqual(["youtube", "users"], [row["table"] for row in rows])
+        self.assertEqual(["id"], rows[0]["primary_key"])
+        with self.assertRaises(ValueError):
+            list(iter_table_schemas(self.url, ["nope"]))
+
+    def test_mysql_type_string(self) -> None:
+        self.assertEqual("VARCHAR(255)", mysql_type_string("varchar(255)"))
+        self.assertEqual("INTEGER(11) UNSIGNED", mysql_type_string("int(11) unsigned"))
+        self.assertEqual("BIGINT", mysql_type_string("bigint"))
+        self.assertEqual(
+            "ENUM('active','Deleted')", mysql_type_string("enum('active','Deleted')")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Unit test file.
+"""
+
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from aidb.db_engine import dispose_all
+from aidb.db_export import export_table
+from aidb.schema_cache import CACHE_DIR_ENV
+
+
+class DbExportTester(unittest.TestCase):
+    """Tests for the keyset-partitioned export."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER)")
+            conn.executemany(
+                "INSERT INTO youtube (yrmo) VALUES (?)",
+                [(202401 + i % 3,) for i in range(100)],
+            )
+        self.url = f"sqlite:///{path}"
+        self.out_dir = os.path.join(self.tmpdir, "out")
+        self.env = mock.patch.dict(
+            os.environ, {CACHE_DIR_ENV: os.path.join(self.tmpdir, "cache")}
+        )
+        self.env.start()
+
+    def tearDown(self) -> None:
+        self.env.stop()
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def exported_ids(self) -> list[int]:
+        ids: list[int] = []
+        for path in glob.glob(os.path.join(self.out_dir, "youtube.p*.jsonl")):
+            with open(path, encoding="utf-8") as f:
+                ids.extend(json.loads(line)["id"] for line in f)
+        return sorted(ids)
+
+    def test_export(self) -> None:
+        manifest = export_table(
+            self.url, "youtube", self.out_dir, partitions=3, chunk_rows=10
+        )
+        self.assertEqual(3, len(manifest["partitions"]))
+        self.assertEqual(list(range(1, 101)), self.exported_ids())
+
+    def test_resume(self) -> None:
+        export_table(self.url, "youtube", self.out_dir, partitions=2, chunk_rows=10)
+        manifest_path = os.path.join(self.out_dir, "youtube.manifest.json")
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        # Pretend the first partition stopped after its first chunk.
+        part = manifest["partitions"][0]
+        part.update(done=False, last_key=10, chunks=1, rows=10)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        for path in glob.glob(os.path.join(self.out_dir, "youtube.p0000.c*")):
+            if not path.endswith("c000000.jsonl"):
+                os.remove(path)
+        manifest = export_table(
+            self.url, "youtube", self.out_dir, partitions=2, chunk_rows=10
+        )
+        self.assertEqual(50, manifest["partitions"][0]["rows"])
+        self.assertEqual(list(range(1, 101)), self.exported_ids())
+
+    def test_resume_non_integer_key(self) -> None:
+        with sqlite3.connect(os.path.join(self.tmpdir, "test.db")) as conn:
+            conn.execute("CREATE TABLE blobs (k BLOB PRIMARY KEY, v INTEGER)")
+            conn.executemany(
+                "INSERT INTO blobs VALUES (?, ?)",
+                [(bytes([i, 255]), i) for i in range(25)],
+            )
+        manifest = export_table(self.url, "blobs", self.out_dir, chunk_rows=10)
+        self.assertEqual(25, manifest["partitions"][0]["rows"])
+        manifest_path = os.path.join(self.out_dir, "blobs.manifest.json")
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.assertEqual("bytes", manifest["partitions"][0]["last_key"]["$type"])
+        # Pretend it stopped after the first chunk, whose last key is b"\x09\xff".
+        manifest["partitions"][0].update(
+            done=False, last_key={"$type": "bytes", "value": "Cf8="}, chunks=1, rows=10
+        )
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        manifest = export_table(self.url, "blobs", self.out_dir, chunk_rows=10)
+        self.assertEqual(25, manifest["partitions"][0]["rows"])
+        self.assertEqual(3, manifest["partitions"][0]["chunks"])
+
+    def test_no_resume_removes_old_chunks(self) -> None:
+        export_table(self.url, "youtube", self.out_dir, partitions=3, chunk_rows=10)
+        with sqlite3.connect(os.path.join(self.tmpdir, "test.db")) as conn:
+            conn.execute("DELETE FROM youtube WHERE id > 20")
+        export_table(
+            self.url,
+            "youtube",
+            self.out_dir,
+            partitions=1,
+            chunk_rows=10,
+            resume=False,
+        )
+        self.assertEqual(list(range(1, 21)), self.exported_ids())
+
+    def test_bytes_are_base64(self) -> None:
+        with sqlite3.connect(os.path.join(self.tmpdir, "test.db")) as conn:
+            conn.execute("CREATE TABLE blobs (id INTEGER PRIMARY KEY, v BLOB)")
+            conn.execute("INSERT INTO blobs VALUES (1, ?)", (b"\x09\xff",))
+        for fmt in ("csv", "jsonl"):
+            export_table(self.url, "blobs", self.out_dir, fmt=fmt, resume=False)
+            path = os.path.join(self.out_dir, f"blobs.p0000.c000000.{fmt}")
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+            self.assertIn("Cf8=", content, fmt)
+            self.assertNotIn("b'", content, fmt)
+
+
+if __name__ == "__main__":
+    unittest.main()
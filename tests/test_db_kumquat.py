@@ -0,0 +1,78 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from aidb.db_engine import connect_timeout_args, dispose_all, get_engine
+from aidb.db_kumquat import (
+    execute_many_kumquat,
+    query_kumquat,
+    query_kumquat_stream,
+)
+
+
+class DbKumquatTester(unittest.TestCase):
+    """Tests for query_kumquat and the shared engine registry."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER)")
+            conn.executemany(
+                "INSERT INTO youtube (yrmo) VALUES (?)",
+                [(202401,), (202401,), (202402,)],
+            )
+        self.url = f"sqlite:///{path}"
+
+    def tearDown(self) -> None:
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_query(self) -> None:
+        rows = query_kumquat(
+            self.url, "SELECT yrmo, COUNT(*) FROM youtube GROUP BY yrmo ORDER BY yrmo"
+        )
+        self.assertEqual([(202401, 2), (202402, 1)], [tuple(row) for row in rows])
+
+    def test_params_and_execute_many(self) -> None:
+        count = execute_many_kumquat(
+            self.url,
+            "INSERT INTO youtube (yrmo) VALUES (:yrmo)",
+            [{"yrmo": 202403}, {"yrmo": 202403}],
+        )
+        self.assertEqual(2, count)
+        rows = query_kumquat(
+            self.url,
+            "SELECT COUNT(*) FROM youtube WHERE yrmo = :yrmo",
+            params={"yrmo": 202403},
+        )
+        self.assertEqual(2, rows[0][0])
+
+    def test_stream(self) -> None:
+        batches = list(
+            query_kumquat_stream(self.url, "SELECT id FROM youtube", batch_size=2)
+        )
+        self.assertEqual([2, 1], [len(batch) for batch in batches])
+
+    def test_stream_early_exit(self) -> None:
+        stream = query_kumquat_stream(self.url, "SELECT id FROM youtube", batch_size=1)
+        self.assertEqual(1, len(next(stream)))
+        stream.close()
+        self.assertEqual(3, len(query_kumquat(self.url, "SELECT id FROM youtube")))
+
+    def test_engine_is_shared(self) -> None:
+        query_kumquat(self.url, "SELECT 1")
+        engine = get_engine(self.url, connect_timeout_args(self.url))
+        self.assertIs(engine, get_engine(self.url, connect_timeout_args(self.url)))
+        dispose_all()
+        self.assertIsNot(engine, get_engine(self.url, connect_timeout_args(self.url)))
+
+
+if __name__ == "__main__":
+    unittest.main()
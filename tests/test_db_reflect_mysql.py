@@ -0,0 +1,192 @@
+"""
+Unit test file.
+"""
+
+# The fake connection matches on the module's query objects.
+# pylint: disable=protected-access
+
+import unittest
+from typing import Any
+from unittest import mock
+
+from sqlalchemy import exc
+from sqlalchemy.dialects import mysql
+
+from aidb import db_dump_schema_json, db_reflect_mysql
+from aidb.db_reflect_mysql import mysql_type_string, reflect_mysql_schema
+
+# information_schema rows as MySQL returns them, by query.
+TABLES = [("orders", "Customer orders"), ("users", "")]
+COLUMNS = {
+    "orders": [
+        ("orders", "id", "int(11)", "NO", None, "PRI", "auto_increment", ""),
+        ("orders", "status", "enum('open','Shipped')", "NO", "open", "", "", ""),
+        ("orders", "user_id", "int(11) unsigned", "YES", None, "MUL", "", ""),
+        (
+            "orders",
+            "created",
+            "datetime",
+            "NO",
+            "CURRENT_TIMESTAMP",
+            "",
+            "DEFAULT_GENERATED",
+            "",
+        ),
+    ],
+    "users": [("users", "id", "int(11) unsigned", "NO", None, "PRI", "", "")],
+}
+STATISTICS = {
+    "orders": [
+        ("orders", "PRIMARY", 0, "id"),
+        ("orders", "ix_orders_user", 1, "user_id"),
+        ("orders", "ix_orders_user", 1, "status"),
+    ],
+    "users": [("users", "PRIMARY", 0, "id")],
+}
+KEY_COLUMN_USAGE = {
+    "orders": [
+        ("orders", "PRIMARY", "id", None, None),
+        ("orders", "fk_orders_user", "user_id", "users", "id"),
+    ],
+    "users": [("users", "PRIMARY", "id", None, None)],
+}
+
+
+class _Result(list):
+    def tuples(self) -> "_Result":
+        return self
+
+    def all(self) -> list[Any]:
+        return list(self)
+
+
+class FakeConnection:
+    """Answers the bulk queries from the tables above."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+        self.listings = 0
+        self.rolled_back = False
+
+    def execute(self, sql: Any, params: dict[str, Any] | None = None) -> _Result:
+        if sql is db_reflect_mysql._TABLES_SQL:
+            self.listings += 1
+            return _Result(TABLES)
+        if sql is db_reflect_mysql._CHECK_CONSTRAINTS_SQL:
+            raise exc.ProgrammingError("SELECT", {}, Exception("no CHECK_CONSTRAINTS"))
+        tables = params["tables"] if params else []
+        if sql is db_reflect_mysql._COLUMNS_SQL:
+            self.batches.append(list(tables))
+        by_query: dict[Any, Any] = {
+            db_reflect_mysql._COLUMNS_SQL: COLUMNS,
+            db_reflect_mysql._STATISTICS_SQL: STATISTICS,
+            db_reflect_mysql._KEY_COLUMN_USAGE_SQL: KEY_COLUMN_USAGE,
+        }
+        rows = by_query.get(sql, {})
+        return _Result(row for name in tables for row in rows.get(name, []))
+
+    def rollback(self) -> None:
+        self.rolled_back = True
+
+
+class ReflectMysqlTester(unittest.TestCase):
+    """Tests for the bulk information_schema reflection."""
+
+    def test_reflect_pulls_in_foreign_keys(self) -> None:
+        conn = FakeConnection()
+        out = reflect_mysql_schema(conn, ["orders"])  # type: ignore[arg-type]
+        self.assertEqual([["orders"], ["users"]], conn.batches)
+        self.assertTrue(conn.rolled_back)
+        orders = out["orders"]
+        self.assertEqual("Customer orders", orders["table_comment"])
+        self.assertIsNone(out["users"]["table_comment"])
+        self.assertEqual(["id"], orders["primary_key"])
+        columns = {column["column_name"]: column for column in orders["columns"]}
+        self.assertEqual("ENUM('open','Shipped')", columns["status"]["data_type"])
+        self.assertEqual("'open'", columns["status"]["default"])
+        self.assertEqual("CURRENT_TIMESTAMP", columns["created"]["default"])
+        self.assertEqual("INTEGER(11) UNSIGNED", columns["user_id"]["data_type"])
+        self.assertTrue(columns["id"]["is_primary_key"])
+        self.assertEqual(
+            [
+                {
+                    "name": "ix_orders_user",
+                    "unique": False,
+                    "columns": ["user_id", "status"],
+                }
+            ],
+            orders["indexes"],
+        )
+        self.assertEqual(
+            [{"column": "user_id", "references": {"table": "users", "column": "id"}}],
+            orders["foreign_keys"],
+        )
+
+    def test_reflect_all_and_missing(self) -> None:
+        conn = FakeConnection()
+        out = reflect_mysql_schema(conn)  # type: ignore[arg-type]
+        self.assertEqual(["orders", "users"], list(out))
+        self.assertEqual([["orders", "users"]], conn.batches)
+        with self.assertRaises(ValueError):
+            reflect_mysql_schema(FakeConnection(), ["nope"])  # type: ignore[arg-type]
+
+    def test_matches_sqlalchemy_rendering(self) -> None:
+        self.assertEqual(str(mysql.DECIMAL(10, 2)), mysql_type_string("decimal(10,2)"))
+        self.assertEqual("ENUM('a,b','c')", mysql_type_string("enum('a,b','c')"))
+        columns = [
+            # MariaDB reports string defaults quoted, MySQL does not.
+            ("users", "id", "int(11) unsigned", "NO", None, "PRI", "", ""),
+            ("users", "state", "varchar(8)", "NO", "'open'", "", "", ""),
+            ("users", "kind", "varchar(8)", "NO", "open", "", "", ""),
+        ]
+        keys = [
+            ("orders", "PRIMARY", "id", None, None),
+            ("orders", "a_user", "user_id", "users", "id"),
+            ("orders", "b_coupon", "coupon_id", "users", "id"),
+        ]
+        with mock.patch.dict(COLUMNS, {"users": columns}), mock.patch.dict(
+            KEY_COLUMN_USAGE, {"orders": keys}
+        ):
+            out = reflect_mysql_schema(
+                FakeConnection(), ["orders"]  # type: ignore[arg-type]
+            )
+        defaults = [column["default"] for column in out["users"]["columns"]]
+        self.assertEqual([None, "'open'", "'open'"], defaults)
+        self.assertEqual(
+            ["coupon_id", "user_id"],
+            [fk["column"] for fk in out["orders"]["foreign_keys"]],
+        )
+
+    def test_stream_lists_tables_once(self) -> None:
+        conn = FakeConnection()
+        engine = mock.MagicMock()
+        engine.dialect.name = "mysql"
+        engine.connect.return_value.__enter__.return_value = conn
+        with mock.patch("aidb.db_engine.get_engine", return_value=engine):
+            items = list(
+                db_dump_schema_json.iter_table_schemas(
+                    "mysql://u@h/db", None, chunk_size=1
+                )
+            )
+        self.assertEqual(["orders", "users"], [name for name, _ in items])
+        self.assertEqual(1, conn.listings)
+        # users comes in its own chunk, not again with the orders that reference it.
+        self.assertEqual([["orders"], ["users"]], conn.batches)
+
+    def test_unreachable_server_does_not_fall_back(self) -> None:
+        engine = mock.MagicMock()
+        engine.dialect.name = "mysql"
+        engine.connect.side_effect = exc.OperationalError(
+            "connect", {}, Exception("Can't connect to MySQL server")
+        )
+        with mock.patch(
+            "aidb.db_engine.get_engine", return_value=engine
+        ), mock.patch.object(db_dump_schema_json, "_reflect_sqlalchemy") as fallback:
+            with self.assertRaises(exc.OperationalError):
+                db_dump_schema_json.db_dump_table_schema_json("mysql://u@h/db")
+        fallback.assert_not_called()
+        self.assertEqual(1, engine.connect.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,12 +2,31 @@
 Unit test file.
 """
 
+import argparse
 import os
 import unittest
+from unittest import mock
+
+from aidb import main
 
 COMMAND = "aidb --help"
 
 
+def make_args(**kwargs) -> argparse.Namespace:
+    defaults = {
+        "set": None,
+        "db": None,
+        "refresh": False,
+        "no_cache": False,
+        "prompt_budget": 0,
+        "top_k": None,
+        "session": False,
+        "stats": False,
+        "json_schema": False,
+    }
+    return argparse.Namespace(**{**defaults, **kwargs})
+
+
 class MainTester(unittest.TestCase):
     """Main tester class."""
 
@@ -16,6 +35,34 @@ class MainTester(unittest.TestCase):
         rtn = os.system(COMMAND)
         self.assertEqual(0, rtn)
 
+    def test_sanitize_db_url_still_importable(self) -> None:
+        self.assertEqual(
+            "mysql+pymysql://u@h/db",
+            main.sanitize_db_url("mysql://u@h/db?ssl-mode=REQUIRED"),
+        )
+
+    def run_main(self, args: argparse.Namespace) -> tuple[int, mock.Mock]:
+        with mock.patch.object(
+            main, "load_connection_url", return_value="sqlite://"
+        ), mock.patch("aidb.prefetch.SchemaPrefetch"), mock.patch.object(
+            main, "input", create=True, side_effect=["*", "how many videos?"]
+        ) as prompt, mock.patch.object(
+            main, "run", return_value=0
+        ) as run:
+            self.assertEqual(0, main._main(args))  # pylint: disable=protected-access
+        return prompt.call_count, run
+
+    def test_star_asks_question_only_with_top_k(self) -> None:
+        prompts, run = self.run_main(make_args())
+        self.assertEqual(1, prompts)
+        self.assertIsNone(run.call_args.kwargs["question"])
+        self.assertEqual(main.DEFAULT_TOP_K, run.call_args.kwargs["top_k"])
+
+        prompts, run = self.run_main(make_args(top_k=5))
+        self.assertEqual(2, prompts)
+        self.assertEqual("how many videos?", run.call_args.kwargs["question"])
+        self.assertEqual(5, run.call_args.kwargs["top_k"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,137 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from aidb import multi_catalog
+from aidb.db_engine import dispose_all
+from aidb.multi_catalog import (
+    build_catalog,
+    host_of,
+    merged_catalog,
+    resolve_sources,
+)
+from aidb.schema_cache import CACHE_DIR_ENV
+
+
+class MultiCatalogTester(unittest.TestCase):
+    """Tests for reflecting several databases into one catalog."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.sources = {}
+        for name in ("shard1", "shard2"):
+            path = os.path.join(self.tmpdir, f"{name}.db")
+            with sqlite3.connect(path) as conn:
+                conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+                conn.execute(
+                    "CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER,"
+                    " user_id INTEGER REFERENCES users(id))"
+                )
+            self.sources[name] = f"sqlite:///{path}"
+        self.env = mock.patch.dict(
+            os.environ, {CACHE_DIR_ENV: os.path.join(self.tmpdir, "cache")}
+        )
+        self.env.start()
+
+    def tearDown(self) -> None:
+        dispose_all()
+        self.env.stop()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_build_and_merge(self) -> None:
+        merged = build_catalog(self.sources)
+        self.assertEqual(["shard1", "shard2"], sorted(merged["sources"]))
+        for info in merged["sources"].values():
+            self.assertIsNotNone(info["fingerprint"])
+            self.assertEqual({"users", "youtube"}, set(info["tables"]))
+        catalog = merged_catalog(merged)
+        self.assertIn("shard2.youtube", catalog)
+        (fk,) = catalog["shard2.youtube"].foreign_keys
+        self.assertEqual("shard2.users", fk.ref_table)
+
+    def test_only_changed_sources_are_reflected(self) -> None:
+        build_catalog(self.sources)
+        with sqlite3.connect(self.sources["shard2"][len("sqlite:///") :]) as conn:
+            conn.execute("CREATE TABLE extra (id INTEGER PRIMARY KEY)")
+        real = multi_catalog.db_refresh_schema_snapshot
+        with mock.patch.object(
+            multi_catalog, "db_refresh_schema_snapshot", side_effect=real
+        ) as refresh:
+            merged = build_catalog(self.sources)
+        self.assertEqual(
+            [self.sources["shard2"]], [c.args[0] for c in refresh.call_args_list]
+        )
+        self.assertIn("extra", merged["sources"]["shard2"]["tables"])
+        self.assertNotIn("extra", merged["sources"]["shard1"]["tables"])
+
+    def test_failed_source_keeps_cached_schema(self) -> None:
+        build_catalog(self.sources)
+        with mock.patch.object(
+            multi_catalog, "schema_fingerprint", side_effect=OSError("down")
+        ):
+            merged = build_catalog(self.sources)
+        self.assertEqual("down", merged["sources"]["shard1"]["error"])
+        self.assertEqual(
+            {"users", "youtube"}, set(merged["sources"]["shard1"]["tables"])
+        )
+
+    def test_per_host_limit(self) -> None:
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_fingerprint(_engine):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+            return "fingerprint"
+
+        sources = {f"s{i}": f"{self.sources['shard1']}?s={i}" for i in range(4)}
+        with mock.patch.object(
+            multi_catalog, "schema_fingerprint", side_effect=slow_fingerprint
+        ):
+            build_catalog(sources, workers=4, per_host=1)
+        self.assertEqual(1, max(peak))
+
+    def test_busy_host_does_not_block_others(self) -> None:
+        started = []
+
+        def slow_fingerprint(engine):
+            started.append(str(engine.url)[-2:])
+            time.sleep(0.05)
+            return "fingerprint"
+
+        # Three sources on a busy host ahead of one on another host.
+        sources = {f"a{i}": f"{self.sources['shard1']}?s=a{i}" for i in range(3)}
+        sources["b0"] = f"{self.sources['shard2']}?s=b0"
+        with mock.patch.object(
+            multi_catalog, "schema_fingerprint", side_effect=slow_fingerprint
+        ), mock.patch.object(multi_catalog, "host_of", side_effect=lambda url: url[-2]):
+            merged = build_catalog(sources, workers=2, per_host=1)
+        self.assertEqual(list(sources), list(merged["sources"]))
+        # b0 ran next to the first a source instead of waiting behind all of them.
+        self.assertIn("b0", started[:2])
+
+    def test_resolve_sources(self) -> None:
+        url = self.sources["shard1"]
+        self.assertEqual({"a": url}, resolve_sources([f"a={url}"]))
+        with mock.patch.object(multi_catalog, "load_connection_url", return_value=None):
+            with self.assertRaises(ValueError):
+                resolve_sources(["missing"])
+        self.assertEqual("db1:3306", host_of("mysql+pymysql://u:p@db1:3306/x"))
+
+
+if __name__ == "__main__":
+    unittest.main()
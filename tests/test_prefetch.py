@@ -0,0 +1,79 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.db_engine import dispose_all
+from aidb.prefetch import SchemaPrefetch
+from aidb.schema_cache import CACHE_DIR_ENV
+
+
+class PrefetchTester(unittest.TestCase):
+    """Tests for the background schema prefetch."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT);
+                CREATE TABLE videos (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER REFERENCES users(id),
+                    yrmo INTEGER
+                );
+                CREATE TABLE logs (id INTEGER PRIMARY KEY, message TEXT);
+                """)
+        self.url = f"sqlite:///{self.db_path}"
+        self.env = mock.patch.dict(
+            os.environ, {CACHE_DIR_ENV: os.path.join(self.tmpdir, "cache")}
+        )
+        self.env.start()
+
+    def tearDown(self) -> None:
+        dispose_all()
+        self.env.stop()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_subset_matches_direct_reflection(self) -> None:
+        prefetch = SchemaPrefetch(self.url).start().request(None)
+        catalog = prefetch.schema(["videos"])
+        assert catalog is not None
+        expected = db_dump_table_schema_json(self.url, tables=["videos"])
+        self.assertEqual(expected, catalog.to_dict())
+        self.assertEqual(["videos", "users"], list(catalog.tables))
+        self.assertEqual(3, len(prefetch.schema(None)))  # type: ignore[arg-type]
+        with self.assertRaises(ValueError):
+            prefetch.schema(["missing"])
+        self.assertIn("hidden", prefetch.report())
+        self.assertIsNone(prefetch.error)
+
+    def test_only_requested_tables_are_reflected(self) -> None:
+        prefetch = SchemaPrefetch(self.url).start()
+        self.assertIsNone(prefetch.schema(["videos"]))  # nothing requested yet
+        prefetch.request(["videos"])
+        catalog = prefetch.schema(["videos"])
+        assert catalog is not None
+        self.assertEqual(["videos", "users"], list(catalog.tables))
+        self.assertIsNone(prefetch.schema(None))
+        self.assertIsNone(prefetch.schema(["logs"]))
+
+    def test_failure_falls_back_to_none(self) -> None:
+        prefetch = (
+            SchemaPrefetch(f"sqlite:///{os.path.join(self.tmpdir, 'missing', 'x.db')}")
+            .start()
+            .request(None)
+        )
+        self.assertIsNone(prefetch.schema(None))
+        self.assertIsNotNone(prefetch.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+"""
+Unit test file.
+"""
+
+import unittest
+from unittest import mock
+
+from aidb.secrets import (
+    delete_profile,
+    list_profiles,
+    load_connection_url,
+    store_connection_url,
+)
+
+
+class ProfilesTester(unittest.TestCase):
+    """Tests for the named connection profiles, against an in-memory keyring."""
+
+    def test_profiles(self) -> None:
+        store: dict[tuple[str, str], str] = {}
+        with mock.patch(
+            "keyring.get_password", lambda service, key: store.get((service, key))
+        ), mock.patch(
+            "keyring.set_password",
+            lambda service, key, value: store.__setitem__((service, key), value),
+        ), mock.patch(
+            "keyring.delete_password", lambda service, key: store.pop((service, key))
+        ):
+            store_connection_url("sqlite:///a.db", "shard1")
+            store_connection_url("sqlite:///b.db", "replica")
+            self.assertEqual(["replica", "shard1"], list_profiles())
+            self.assertEqual("sqlite:///b.db", load_connection_url("replica"))
+            self.assertIsNone(load_connection_url())
+            delete_profile("replica")
+            self.assertEqual(["shard1"], list_profiles())
+            self.assertIsNone(load_connection_url("replica"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit test file.
+"""
+
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from aidb import profiling
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.db_engine import dispose_all
+from aidb.db_kumquat import query_kumquat
+
+
+class ProfilingTester(unittest.TestCase):
+    """Tests for the tracing spans."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER)")
+            conn.executemany(
+                "INSERT INTO youtube (yrmo) VALUES (?)", [(202401,), (202402,)]
+            )
+        self.url = f"sqlite:///{self.db_path}"
+        profiling.reset()
+
+    def tearDown(self) -> None:
+        profiling.disable()
+        profiling.reset()
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_disabled_records_nothing(self) -> None:
+        with profiling.span("noop", rows=1) as s:
+            s.set(rows=2)
+        query_kumquat(self.url, "SELECT * FROM youtube")
+        self.assertEqual([], profiling.events())
+
+    def test_profile_to_writes_trace(self) -> None:
+        trace_path = os.path.join(self.tmpdir, "trace.json")
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch("sys.stdout", stdout), mock.patch("sys.stderr", stderr):
+            with profiling.profile_to(trace_path):
+                query_kumquat(self.url, "SELECT * FROM youtube")
+                db_dump_table_schema_json(self.url, tables=["youtube"])
+        self.assertEqual("", stdout.getvalue())
+        self.assertIn(f"Trace written to {trace_path}", stderr.getvalue())
+        self.assertFalse(profiling.is_enabled())
+        with open(trace_path, encoding="utf-8") as f:
+            trace = json.load(f)
+        spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        by_name = {e["name"]: e for e in spans}
+        self.assertEqual(2, by_name["query_kumquat"]["args"]["rows"])
+        self.assertIn("db.connect", by_name)
+        self.assertIn("reflect.table", by_name)
+        self.assertEqual(1, by_name["db_dump_table_schema_json"]["args"]["tables"])
+        summary = profiling.summary()
+        self.assertIn("query_kumquat", summary)
+        self.assertIn("rows=2", summary)
+
+    def test_error_is_recorded(self) -> None:
+        profiling.enable()
+        with self.assertRaises(KeyError):
+            with profiling.span("fails"):
+                raise KeyError("x")
+        self.assertEqual("KeyError", profiling.events()[0]["args"]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Unit test file.
+"""
+
+import datetime
+import decimal
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from aidb.db_engine import dispose_all
+from aidb.db_kumquat import query_kumquat
+from aidb.query_cache import (
+    QueryCache,
+    mask_literals,
+    normalize_sql,
+    referenced_tables,
+    sql_shape,
+)
+
+COUNT_SQL = "SELECT yrmo, COUNT(*) FROM youtube GROUP BY yrmo"
+
+
+class QueryCacheTester(unittest.TestCase):
+    """Tests for QueryCache."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER)")
+            conn.execute("INSERT INTO youtube (yrmo) VALUES (202401)")
+        self.url = f"sqlite:///{path}"
+
+    def tearDown(self) -> None:
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_hit_and_invalidate(self) -> None:
+        cache = QueryCache()
+        first = query_kumquat(self.url, COUNT_SQL, cache=cache)
+        second = query_kumquat(self.url, f"  {COUNT_SQL}\n ;", cache=cache)
+        self.assertEqual([tuple(row) for row in first], [tuple(row) for row in second])
+        self.assertEqual(
+            {"hits": 1, "misses": 1}, {k: cache.stats()[k] for k in ("hits", "misses")}
+        )
+        self.assertEqual(1, cache.invalidate_table("youtube"))
+        self.assertIsNone(cache.get(self.url, COUNT_SQL))
+
+    def test_ttl_and_byte_bound(self) -> None:
+        cache = QueryCache(ttl=0.01, max_bytes=400)
+        cache.put(self.url, "SELECT 1", None, [(1,)])
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(self.url, "SELECT 1"))
+        cache.put(self.url, "SELECT 2", None, [("x" * 300,)], ttl=60)
+        cache.put(self.url, "SELECT 3", None, [("y" * 300,)], ttl=60)
+        self.assertIsNone(cache.get(self.url, "SELECT 2"))
+        self.assertIsNotNone(cache.get(self.url, "SELECT 3"))
+
+    def test_disk_tier_survives_restart(self) -> None:
+        path = os.path.join(self.tmpdir, "cache.sqlite")
+        QueryCache(path=path).put(self.url, COUNT_SQL, None, [(202401, 1)])
+        self.assertEqual([(202401, 1)], QueryCache(path=path).get(self.url, COUNT_SQL))
+
+    def test_disk_tier_keeps_rows_and_types(self) -> None:
+        path = os.path.join(self.tmpdir, "cache.sqlite")
+        sql = "SELECT id, yrmo FROM youtube"
+        rows = query_kumquat(self.url, sql, cache=QueryCache(path=path))
+        cached = QueryCache(path=path).get(self.url, sql)
+        assert cached is not None
+        self.assertEqual(rows[0].yrmo, cached[0].yrmo)
+        self.assertEqual(1, cached[0].id)
+
+        values = [
+            (
+                datetime.datetime(2024, 1, 2, 3, 4, 5),
+                datetime.date(2024, 1, 2),
+                decimal.Decimal("1.10"),
+                b"\x00\xff",
+                None,
+                {"tags": [decimal.Decimal("2")]},
+            )
+        ]
+        QueryCache(path=path).put(self.url, "SELECT v FROM t", None, values)
+        self.assertEqual(values, QueryCache(path=path).get(self.url, "SELECT v FROM t"))
+        with sqlite3.connect(path) as conn:
+            (payload,) = conn.execute("SELECT payload FROM results LIMIT 1").fetchone()
+        self.assertTrue(payload.startswith(b"{"))
+
+    def test_disk_tier_purges_expired(self) -> None:
+        path = os.path.join(self.tmpdir, "cache.sqlite")
+        QueryCache(path=path, ttl=0.01).put(self.url, "SELECT 1", None, [(1,)])
+        time.sleep(0.02)
+        QueryCache(path=path)
+        with sqlite3.connect(path) as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        self.assertEqual(0, count)
+
+    def test_helpers(self) -> None:
+        self.assertEqual(
+            "SELECT 'a  b' FROM t", normalize_sql("SELECT  'a  b'\nFROM t;")
+        )
+        self.assertEqual(
+            frozenset({"youtube", "youtube_details"}),
+            referenced_tables(
+                "SELECT * FROM youtube y LEFT JOIN db.youtube_details d ON y.id = d.id"
+            ),
+        )
+        self.assertEqual(
+            "SELECT * FROM t WHERE a = ? AND b IN (?) AND c = ?",
+            sql_shape("SELECT *  FROM t WHERE a = 'x' AND b IN (1, 2,3) AND c = 4.5;"),
+        )
+        self.assertEqual("SELECT ___ FROM t", mask_literals("SELECT 'a' FROM t"))
+
+
+if __name__ == "__main__":
+    unittest.main()
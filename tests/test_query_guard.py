@@ -0,0 +1,130 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import warnings
+
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.db_engine import dispose_all
+from aidb.db_kumquat import query_kumquat
+from aidb.query_guard import (
+    QueryGuard,
+    QueryPlanWarning,
+    QueryRejectedError,
+    add_yrmo_filter,
+    explain_query,
+)
+from aidb.schema_model import Catalog
+
+
+class QueryGuardTester(unittest.TestCase):
+    """Tests for the EXPLAIN-based query guard."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(path) as conn:
+            conn.executescript("""
+                CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT);
+                CREATE TABLE youtube (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT,
+                    yrmo INTEGER,
+                    user_id INTEGER REFERENCES users(id)
+                );
+                CREATE INDEX ix_youtube_yrmo ON youtube (yrmo);
+                INSERT INTO youtube (url, yrmo) VALUES ('a', 202401), ('b', 202402);
+                """)
+        self.url = f"sqlite:///{path}"
+
+    def tearDown(self) -> None:
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def analyze(self) -> None:
+        """Fill sqlite_stat1, the plans have row estimates from then on."""
+        with sqlite3.connect(os.path.join(self.tmpdir, "test.db")) as conn:
+            conn.execute("ANALYZE")
+
+    def test_full_scan_flagged_with_yrmo_suggestion(self) -> None:
+        indexed = explain_query(self.url, "SELECT * FROM youtube WHERE yrmo = 202401")
+        self.assertTrue(indexed.ok)
+        self.assertEqual("index", indexed.steps[0].access)
+        self.analyze()
+        report = explain_query(
+            self.url,
+            "SELECT * FROM youtube WHERE url = 'a'",
+            guard=QueryGuard(min_scan_rows=0),
+        )
+        self.assertEqual(["full_scan"], [issue.kind for issue in report.issues])
+        self.assertEqual(2, report.steps[0].rows)
+        self.assertEqual(
+            "SELECT * FROM youtube WHERE yrmo BETWEEN :yrmo_from AND :yrmo_to"
+            " AND (url = 'a')",
+            report.suggestion,
+        )
+
+    def test_scan_without_row_estimate_not_flagged(self) -> None:
+        report = explain_query(
+            self.url,
+            "SELECT * FROM youtube WHERE url = 'a'",
+            guard=QueryGuard(min_scan_rows=0),
+        )
+        self.assertEqual("full_scan", report.steps[0].access)
+        self.assertIsNone(report.steps[0].rows)
+        self.assertTrue(report.ok)
+
+    def test_plan_cached_per_shape(self) -> None:
+        guard = QueryGuard()
+        for month in (202401, 202402):
+            rows = query_kumquat(
+                self.url, f"SELECT * FROM youtube WHERE yrmo = {month}", guard=guard
+            )
+            self.assertEqual(1, len(rows))
+        self.assertEqual({"hits": 1, "misses": 1, "plans": 1}, guard.stats())
+
+    def test_reject_and_warn(self) -> None:
+        self.analyze()
+        sql = "SELECT y.url FROM youtube y JOIN users u ON u.id = y.user_id"
+        with self.assertRaises(QueryRejectedError) as ctx:
+            query_kumquat(self.url, sql, guard=QueryGuard(min_scan_rows=0, reject=True))
+        self.assertIn("y.yrmo BETWEEN", ctx.exception.report.suggestion or "")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            query_kumquat(self.url, sql, guard=QueryGuard(min_scan_rows=0))
+        self.assertTrue(any(w.category is QueryPlanWarning for w in caught))
+
+    def test_validate_before_connecting(self) -> None:
+        guard = QueryGuard(
+            reject=True, catalog=Catalog.from_dict(db_dump_table_schema_json(self.url))
+        )
+        bad_url = "sqlite:////nonexistent/dir/x.db"
+        with self.assertRaises(QueryRejectedError) as ctx:
+            query_kumquat(bad_url, "SELECT title FROM youtube", guard=guard)
+        self.assertEqual("unknown_column", ctx.exception.report.issues[0].kind)
+
+    def test_helpers(self) -> None:
+        self.assertEqual(
+            "SELECT yrmo, COUNT(*) FROM youtube"
+            " WHERE yrmo BETWEEN :yrmo_from AND :yrmo_to GROUP BY yrmo",
+            add_yrmo_filter(
+                "SELECT yrmo, COUNT(*) FROM youtube GROUP BY yrmo", "youtube"
+            ),
+        )
+        self.assertEqual(
+            "SELECT * FROM youtube WHERE yrmo BETWEEN :yrmo_from AND :yrmo_to"
+            " AND (COALESCE(url, 'x') = 'a' OR id > 3) LIMIT 5",
+            add_yrmo_filter(
+                "SELECT * FROM youtube WHERE COALESCE(url, 'x') = 'a' OR id > 3 LIMIT 5",
+                "youtube",
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
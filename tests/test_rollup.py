@@ -0,0 +1,117 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from aidb.db_engine import dispose_all
+from aidb.db_kumquat import query_kumquat
+from aidb.rollup import RollupStore, match_count_query
+
+GROUPED_SQL = "SELECT yrmo, COUNT(*) FROM youtube GROUP BY yrmo ORDER BY yrmo"
+
+
+class RollupTester(unittest.TestCase):
+    """Tests for the per-yrmo count rollups."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER, url TEXT);
+                CREATE INDEX ix_youtube_yrmo ON youtube (yrmo);
+                CREATE TABLE logs (id INTEGER PRIMARY KEY, message TEXT);
+                """)
+        self.insert([202401] * 3 + [202402] * 2 + [202403])
+        self.url = f"sqlite:///{self.db_path}"
+        self.store = RollupStore(os.path.join(self.tmpdir, "rollups.sqlite"))
+
+    def tearDown(self) -> None:
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def insert(self, months: list[int]) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT INTO youtube (yrmo, url) VALUES (?, 'x')",
+                [(month,) for month in months],
+            )
+
+    def direct(self, sql: str) -> list[tuple]:
+        return [tuple(row) for row in query_kumquat(self.url, sql)]
+
+    def test_incremental_refresh_matches_database(self) -> None:
+        self.assertTrue(self.store.refresh(self.url, "youtube")["full"])
+        self.insert([202403, 202404, 202401])
+        with sqlite3.connect(self.db_path) as conn:
+            # The latest months are recounted, so changes there are picked up.
+            conn.execute("DELETE FROM youtube WHERE id = 6")
+        result = self.store.refresh(self.url, "youtube")
+        self.assertFalse(result["full"])
+        self.assertEqual(
+            self.direct(GROUPED_SQL), self.store.answer(self.url, GROUPED_SQL)
+        )
+
+    def test_answers_matching_queries(self) -> None:
+        rows = query_kumquat(self.url, GROUPED_SQL, rollups=self.store)
+        self.assertEqual(self.direct(GROUPED_SQL), rows)
+        for sql, params in [
+            ("SELECT COUNT(*) FROM youtube WHERE yrmo BETWEEN 202401 AND 202402", None),
+            (
+                "SELECT yrmo, COUNT(*) AS n FROM youtube WHERE yrmo >= :m GROUP BY yrmo"
+                " ORDER BY yrmo DESC",
+                {"m": 202402},
+            ),
+            ("select count(1) from youtube where yrmo = 202403;", None),
+        ]:
+            self.assertEqual(
+                [tuple(r) for r in query_kumquat(self.url, sql, params=params)],
+                self.store.answer(self.url, sql, params),
+                sql,
+            )
+        self.assertIsNone(self.store.answer(self.url, "SELECT COUNT(*) FROM logs"))
+
+    def test_answer_rows_match_query_result(self) -> None:
+        for sql in [
+            GROUPED_SQL,
+            "SELECT yrmo, COUNT(*) AS n FROM youtube GROUP BY yrmo",
+            "SELECT COUNT(1) total FROM youtube",
+        ]:
+            expected = query_kumquat(self.url, sql)
+            rows = self.store.answer(self.url, sql)
+            assert rows is not None
+            self.assertEqual(expected[0]._fields, rows[0]._fields, sql)
+            self.assertEqual(
+                [r._asdict() for r in expected], [r._asdict() for r in rows]
+            )
+
+    def test_match_count_query(self) -> None:
+        self.assertEqual(
+            ("youtube", True, 202401, 202405, False),
+            match_count_query(
+                "SELECT yrmo, COUNT(*) FROM youtube WHERE yrmo > 202400 AND yrmo < 202406"
+                " GROUP BY yrmo"
+            ),
+        )
+        for sql in [
+            "SELECT yrmo, COUNT(*) FROM youtube WHERE url = 'x' GROUP BY yrmo",
+            "SELECT COUNT(*) FROM youtube GROUP BY yrmo",
+            "SELECT yrmo, SUM(views) FROM youtube GROUP BY yrmo",
+            "SELECT COUNT(*) FROM youtube WHERE yrmo = :m",  # unbound
+            "SELECT yrmo, COUNT(url) FROM youtube GROUP BY yrmo",  # skips NULLs
+        ]:
+            self.assertIsNone(match_count_query(sql), sql)
+        self.assertIsNone(
+            match_count_query(
+                "SELECT COUNT(*) FROM youtube WHERE yrmo = :m", {"m": "2024-01"}
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Unit test file.
+"""
+
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from typing import Any
+from unittest import mock
+
+from aidb import db_dump_schema_json
+from aidb.db_dump_schema_json import (
+    db_dump_table_schema_json,
+    db_refresh_schema_snapshot,
+)
+from aidb.db_engine import dispose_all
+from aidb.schema_cache import (
+    CACHE_DIR_ENV,
+    cache_dir,
+    cache_key,
+    load_cached_entry,
+    store_cached_entry,
+)
+from aidb.schema_diff import diff_schemas
+
+
+class SchemaCacheTester(unittest.TestCase):
+    """Tests for the on-disk schema cache."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER)")
+        self.url = f"sqlite:///{self.db_path}"
+        self.env = mock.patch.dict(
+            os.environ, {CACHE_DIR_ENV: os.path.join(self.tmpdir, "cache")}
+        )
+        self.env.start()
+
+    def tearDown(self) -> None:
+        dispose_all()
+        self.env.stop()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_warm_start_skips_reflection(self) -> None:
+        first = db_dump_table_schema_json(self.url, use_cache=True)
+        with mock.patch.object(db_dump_schema_json, "_reflect") as reflect:
+            second = db_dump_table_schema_json(self.url, use_cache=True)
+            reflect.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_schema_change_invalidates(self) -> None:
+        db_dump_table_schema_json(self.url, use_cache=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("ALTER TABLE youtube ADD COLUMN url TEXT")
+        schema = db_dump_table_schema_json(self.url, use_cache=True)
+        columns = schema["tables"]["youtube"]["columns"]
+        self.assertIn("url", [col["column_name"] for col in columns])
+
+    def test_incremental_refresh_and_diff(self) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY)")
+        db_dump_table_schema_json(self.url, use_cache=True)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("ALTER TABLE youtube ADD COLUMN url TEXT")
+            conn.execute("CREATE TABLE channels (id INTEGER PRIMARY KEY)")
+            conn.execute("DROP TABLE users")
+        reflect = mock.Mock(
+            wraps=db_dump_schema_json._reflect  # pylint: disable=protected-access
+        )
+        with mock.patch.object(db_dump_schema_json, "_reflect", reflect):
+            previous, current = db_refresh_schema_snapshot(self.url)
+        reflect.assert_called_once()
+        self.assertEqual(["channels", "youtube"], reflect.call_args.args[1])
+        diff = diff_schemas(previous, current)
+        self.assertEqual(["channels"], diff["added_tables"])
+        self.assertEqual(["users"], diff["removed_tables"])
+        self.assertEqual(["url"], diff["changed_tables"]["youtube"]["added_columns"])
+
+    def test_failed_write_leaves_no_temp_file(self) -> None:
+        with self.assertRaises(TypeError):
+            store_cached_entry("key", {"not_json": object()})
+        self.assertEqual([], os.listdir(cache_dir()))
+
+    def test_write_warning_goes_to_stderr(self) -> None:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch("os.makedirs", side_effect=OSError("read-only")), mock.patch(
+            "sys.stdout", stdout
+        ), mock.patch("sys.stderr", stderr):
+            store_cached_entry("key", {})
+        self.assertEqual("", stdout.getvalue())
+        self.assertIn("could not write schema cache: read-only", stderr.getvalue())
+
+    def test_key_ignores_url_spelling(self) -> None:
+        entry: dict[str, Any] = {"schema": {"tables": {}}}
+        store_cached_entry(cache_key("mysql://u@db1/x?ssl-mode=REQUIRED", None), entry)
+        for url in ("mysql+pymysql://u@db1/x", "mysql://u@db1/x"):
+            self.assertEqual(entry, load_cached_entry(cache_key(url, None)), url)
+        self.assertNotEqual(
+            cache_key("mysql://u@db1/x", None), cache_key("mysql://u@db2/x", None)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from aidb import schema_index
+from aidb.db_engine import dispose_all
+from aidb.schema_cache import CACHE_DIR_ENV
+from aidb.schema_index import load_schema_index, tokenize
+
+
+class SchemaIndexTester(unittest.TestCase):
+    """Tests for the table relevance index."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, country TEXT);
+                CREATE TABLE videos (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER REFERENCES users(id),
+                    title TEXT, yrmo INTEGER
+                );
+                CREATE TABLE video_views (
+                    id INTEGER PRIMARY KEY,
+                    video_id INTEGER REFERENCES videos(id),
+                    yrmo INTEGER, view_count INTEGER
+                );
+                CREATE TABLE invoices (id INTEGER PRIMARY KEY, amount REAL);
+                CREATE TABLE audit_log (id INTEGER PRIMARY KEY, message TEXT);
+                """)
+        self.url = f"sqlite:///{self.db_path}"
+        self.env = mock.patch.dict(
+            os.environ, {CACHE_DIR_ENV: os.path.join(self.tmpdir, "cache")}
+        )
+        self.env.start()
+
+    def tearDown(self) -> None:
+        dispose_all()
+        self.env.stop()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_tokenize(self) -> None:
+        self.assertEqual(["video", "view"], tokenize("VideoViews"))
+        self.assertEqual(["video", "view"], tokenize("video_view"))
+        self.assertEqual(["country"], tokenize("how many countries"))
+
+    def test_select_tables_with_neighbors(self) -> None:
+        index = load_schema_index(self.url)
+        selected = index.select_tables("video views per month", k=1)
+        # video_views wins, videos is pulled in as the table it references.
+        self.assertEqual(["video_views", "videos"], selected)
+        self.assertEqual([], index.select_tables("weather forecast"))
+
+    def test_incremental_update(self) -> None:
+        load_schema_index(self.url)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("ALTER TABLE invoices ADD COLUMN currency TEXT")
+            conn.execute("DROP TABLE audit_log")
+        dispose_all()
+        load = mock.Mock(
+            wraps=schema_index._load_documents  # pylint: disable=protected-access
+        )
+        with mock.patch.object(schema_index, "_load_documents", load):
+            index = load_schema_index(self.url)
+        load.assert_called_once()
+        self.assertEqual(["invoices"], load.call_args.args[1])
+        self.assertNotIn("audit_log", index.documents)
+        self.assertEqual(["invoices"], index.select_tables("currency"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.db_engine import dispose_all
+from aidb.schema_model import Catalog
+
+SCHEMA_SQL = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(64) NOT NULL);
+CREATE TABLE youtube (
+    id INTEGER PRIMARY KEY,
+    url VARCHAR(255) DEFAULT 'none',
+    yrmo INTEGER,
+    user_id INTEGER REFERENCES users(id)
+);
+CREATE INDEX ix_youtube_yrmo ON youtube (yrmo);
+"""
+
+
+class SchemaModelTester(unittest.TestCase):
+    """Tests for the slotted schema catalog."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(path) as conn:
+            conn.executescript(SCHEMA_SQL)
+        self.url = f"sqlite:///{path}"
+
+    def tearDown(self) -> None:
+        dispose_all()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_round_trip(self) -> None:
+        schema = db_dump_table_schema_json(self.url)
+        catalog = Catalog.from_dict(schema)
+        self.assertEqual(schema, catalog.to_dict())
+        youtube = catalog["youtube"]
+        self.assertEqual(("id",), youtube.primary_key)
+        self.assertEqual("users", youtube.foreign_keys[0].ref_table)
+        self.assertFalse(catalog["users"].column("name").nullable)  # type: ignore[union-attr]
+
+    def test_strings_are_shared(self) -> None:
+        # Built at runtime so the literals can't already be the same object.
+        catalog = Catalog.from_dict(
+            {
+                "tables": {
+                    name: {
+                        "columns": [
+                            {
+                                "column_name": "".join(["i", "d"]),
+                                "data_type": "".join(["INT", "EGER"]),
+                                "is_nullable": "NO",
+                            }
+                        ],
+                        "primary_key": ["id"],
+                        "indexes": [],
+                        "foreign_keys": [],
+                    }
+                    for name in ("a", "b")
+                }
+            }
+        )
+        first, second = (table.columns[0] for table in catalog)
+        self.assertIs(first.data_type, second.data_type)
+        self.assertIs(first.name, second.name)
+
+    def test_subset_follows_foreign_keys(self) -> None:
+        catalog = Catalog.from_dict(db_dump_table_schema_json(self.url))
+        expected = db_dump_table_schema_json(self.url, tables=["youtube"])
+        self.assertEqual(expected, catalog.subset(["youtube"]).to_dict())
+        with self.assertRaises(ValueError):
+            catalog.subset(["missing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
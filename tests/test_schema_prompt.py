@@ -0,0 +1,85 @@
+"""
+Unit test file.
+"""
+
+import unittest
+from typing import Any
+
+from aidb.schema_prompt import render_compact_schema
+
+
+def _column(name: str, data_type: str = "INTEGER") -> dict[str, Any]:
+    return {
+        "column_name": name,
+        "data_type": data_type,
+        "is_nullable": "YES",
+        "default": None,
+        "is_primary_key": name == "id",
+        "comment": None,
+    }
+
+
+def _table(columns: list[str], fks: list[tuple[str, str]] | None = None) -> dict:
+    return {
+        "columns": [_column("id"), _column("yrmo")]
+        + [_column(name, "VARCHAR(255)") for name in columns],
+        "primary_key": ["id"],
+        "indexes": [{"name": "ix_yrmo", "unique": False, "columns": ["yrmo"]}],
+        "foreign_keys": [
+            {"column": column, "references": {"table": target, "column": "id"}}
+            for column, target in fks or []
+        ],
+        "check_constraints": [],
+        "table_comment": "some table",
+        "partitions": [],
+    }
+
+
+SCHEMA = {
+    "tables": {
+        "users": _table(["name", "email"]),
+        "videos": _table(
+            [f"col_{i}" for i in range(30)] + ["user_id"], [("user_id", "users")]
+        ),
+        "logs": _table(["message"]),
+    }
+}
+
+
+class SchemaPromptTester(unittest.TestCase):
+    """Tests for the compact schema rendering."""
+
+    def test_full_rendering(self) -> None:
+        text = render_compact_schema(SCHEMA, max_tokens=None)
+        lines = text.splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertEqual(
+            "users(id INTEGER PK, yrmo INTEGER, name VARCHAR(255), email VARCHAR(255))"
+            " idx[yrmo] -- some table",
+            lines[1],
+        )
+        self.assertIn("fk[user_id->users.id]", lines[2])
+
+    def test_budget_degrades_deterministically(self) -> None:
+        full = render_compact_schema(SCHEMA, max_tokens=None)
+        budget = len(full) // 2
+        text = render_compact_schema(SCHEMA, max_bytes=budget)
+        self.assertLessEqual(len(text.encode("utf-8")), budget)
+        self.assertEqual(text, render_compact_schema(SCHEMA, max_bytes=budget))
+        # Comments and plain column types go first, key columns keep theirs.
+        self.assertNotIn("-- some table", text)
+        self.assertIn("col_0, col_1,", text)
+        self.assertIn("user_id VARCHAR(255)", text)
+        self.assertIn("fk[user_id->users.id]", text)
+
+    def test_tables_dropped_least_connected_first(self) -> None:
+        text = render_compact_schema(SCHEMA, max_bytes=200)
+        self.assertLessEqual(len(text.encode("utf-8")), 200)
+        self.assertIn("other tables: logs", text)
+        self.assertIn(
+            "videos(id INTEGER PK, yrmo INTEGER, user_id VARCHAR(255), +30 cols)", text
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from aidb.schema_index import SchemaIndex, _document
+from aidb.schema_model import Catalog
+from aidb.session import AskaiChat, AskSession, run_session
+
+
+def _table(references: list[str] | None = None) -> dict:
+    return {
+        "columns": [
+            {
+                "column_name": "id",
+                "data_type": "INTEGER",
+                "is_nullable": "NO",
+                "default": None,
+                "is_primary_key": True,
+                "comment": None,
+            }
+        ],
+        "primary_key": ["id"],
+        "indexes": [],
+        "foreign_keys": [
+            {"column": "id", "references": {"table": target, "column": "id"}}
+            for target in references or []
+        ],
+        "check_constraints": [],
+        "table_comment": None,
+        "partitions": [],
+    }
+
+
+SCHEMA = {
+    "tables": {
+        "users": _table(),
+        "videos": _table(["users"]),
+        "invoices": _table(),
+    }
+}
+
+
+class AskSessionTester(unittest.TestCase):
+    """Tests for the per-question messages of a session."""
+
+    def setUp(self) -> None:
+        index = SchemaIndex(
+            {
+                name: _document(
+                    name,
+                    [],
+                    [fk["references"]["table"] for fk in info["foreign_keys"]],
+                )
+                for name, info in SCHEMA["tables"].items()
+            }
+        )
+        self.session = AskSession(Catalog.from_dict(SCHEMA), index, top_k=1)
+
+    def test_slice_sent_only_when_it_changes(self) -> None:
+        first = self.session.message("top videos")
+        self.assertIn("videos(id INTEGER PK)", first)
+        self.assertIn("users(id INTEGER PK)", first)
+        self.assertNotIn("invoices", first)
+        self.assertEqual("videos last month", self.session.message("videos last month"))
+        self.assertIn("invoices(", self.session.message("unpaid invoices"))
+
+    def test_named_tables_send_question_only(self) -> None:
+        self.assertEqual(
+            "hello", AskSession(Catalog.from_dict(SCHEMA)).message("hello")
+        )
+
+
+class AskaiChatTester(unittest.TestCase):
+    """Tests the session loop against askai's chat API."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.prompt_file = os.path.join(self.tmpdir, "prompt.txt")
+        with open(self.prompt_file, "w", encoding="utf-8") as f:
+            f.write("You are an expert SQL engineer.\n")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_history_is_sent_with_each_question(self) -> None:
+        sent = []
+
+        def single_query(config, prompt, check):
+            self.assertTrue(check)
+            self.assertEqual(
+                "You are an expert SQL engineer.", config.ai_assistant_prompt
+            )
+            sent.append(list(prompt))
+            # Answers containing askai's ">>> " prompt used to confuse the old pipe.
+            return f">>> answer {len(sent)}"
+
+        chat = AskaiChat(self.prompt_file, api_key="sk-test")
+        with mock.patch("advanced_askai.api.single_query", side_effect=single_query):
+            chat.ask("first question")
+            chat.ask("second question")
+        self.assertEqual(
+            [
+                ["first question"],
+                ["first question", ">>> answer 1", "second question"],
+            ],
+            sent,
+        )
+
+    def test_run_session(self) -> None:
+        chat = mock.Mock(spec=AskaiChat)
+        session = AskSession(Catalog.from_dict(SCHEMA))
+        with mock.patch("builtins.input", side_effect=["second", "exit"]):
+            self.assertEqual(
+                0, run_session(self.prompt_file, session, "first", chat=chat)
+            )
+        self.assertEqual(
+            [mock.call("first"), mock.call("second")], chat.ask.call_args_list
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Unit test file.
+"""
+
+import io
+import unittest
+from unittest import mock
+
+from aidb.query_guard import QueryGuard
+from aidb.schema_cache import cache_key
+from aidb.schema_model import Catalog
+from aidb.sql_validate import SqlValidator, main, tokenize, validate_sql
+
+
+def _table(columns: list[str], indexes=(), fks=()) -> dict:
+    return {
+        "columns": [
+            {"column_name": name, "data_type": "INTEGER", "is_nullable": "YES"}
+            for name in columns
+        ],
+        "primary_key": ["id"],
+        "indexes": [
+            {"name": f"ix_{column}", "unique": False, "columns": [column]}
+            for column in indexes
+        ],
+        "foreign_keys": [
+            {"column": column, "references": {"table": table, "column": "id"}}
+            for column, table in fks
+        ],
+    }
+
+
+SCHEMA = {
+    "tables": {
+        "youtube": _table(
+            ["id", "url", "yrmo", "user_id", "views"],
+            indexes=["yrmo"],
+            fks=[("user_id", "users")],
+        ),
+        "users": _table(["id", "name", "email"]),
+    }
+}
+
+
+class SqlValidateTester(unittest.TestCase):
+    """Tests for the offline SQL validator."""
+
+    def setUp(self) -> None:
+        self.validator = SqlValidator(Catalog.from_dict(SCHEMA))
+
+    def kinds(self, sql: str) -> list[str]:
+        return [issue.kind for issue in self.validator.validate(sql)]
+
+    def test_valid_queries(self) -> None:
+        for sql in [
+            "SELECT yrmo, COUNT(*) AS cnt FROM youtube"
+            " WHERE yrmo BETWEEN 202401 AND 202403 GROUP BY yrmo ORDER BY cnt DESC",
+            "SELECT y.url, u.name FROM youtube y JOIN users u ON u.id = y.user_id",
+            "WITH t AS (SELECT yrmo, COUNT(*) c FROM youtube GROUP BY yrmo)"
+            " SELECT t.yrmo, c FROM t",
+            "SELECT x.a FROM (SELECT id a FROM youtube) x",
+            "SELECT COALESCE(url, 'x') FROM youtube, users"
+            " WHERE youtube.user_id = users.id LIMIT 10",
+            "SELECT CASE WHEN views > 10 THEN 'hi' ELSE 'lo' END bucket"
+            " FROM youtube ORDER BY bucket",
+            "SELECT `id` FROM youtube WHERE id IN"
+            " (SELECT user_id FROM youtube WHERE yrmo = :m) -- recent",
+            "SELECT CAST(views AS SIGNED) FROM youtube"
+            " WHERE yrmo >= DATE_FORMAT(CURRENT_DATE - INTERVAL 1 MONTH, '%Y%m')",
+            "SELECT yrmo, COUNT(*) FROM youtube GROUP BY yrmo WITH ROLLUP",
+            "SELECT id FROM youtube WHERE MATCH(url) AGAINST('cat' IN BOOLEAN MODE)",
+            "SELECT CONVERT(url USING utf8mb4) FROM youtube",
+            "SELECT TRIM(LEADING 'x' FROM url) FROM youtube",
+            "SELECT EXTRACT(YEAR FROM CURRENT_DATE), url FROM youtube",
+            "SELECT id, SUM(views) OVER (ORDER BY id"
+            " ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) FROM youtube",
+            "SELECT url FROM youtube ORDER BY views DESC NULLS LAST",
+            "SELECT HIGH_PRIORITY id FROM youtube",
+            "SELECT SQL_BUFFER_RESULT SQL_SMALL_RESULT id FROM youtube",
+            "SELECT SQL_BIG_RESULT yrmo, COUNT(*) FROM youtube GROUP BY yrmo",
+            "SELECT STRAIGHT_JOIN y.id FROM youtube y, users u WHERE u.id = y.user_id",
+            "SELECT id FROM youtube USE INDEX (ix_yrmo) WHERE yrmo = 202401",
+            "SELECT y.id FROM youtube y FORCE INDEX FOR JOIN (ix_yrmo, PRIMARY), users u"
+            " WHERE u.id = y.user_id",
+            "SELECT id FROM youtube IGNORE KEY (ix_yrmo)",
+            "SELECT @r := @r + 1 AS n, id FROM youtube, (SELECT @r := 0) init",
+        ]:
+            self.assertEqual([], self.validator.validate(sql), sql)
+
+    def test_unknown_names(self) -> None:
+        issues = validate_sql("SELECT * FROM youtub", SCHEMA)
+        self.assertEqual(["unknown_table"], [issue.kind for issue in issues])
+        self.assertIn("did you mean youtube", issues[0].message)
+        self.assertEqual(
+            ["unknown_column"], self.kinds("SELECT views_count FROM youtube")
+        )
+        self.assertEqual(
+            ["unknown_column"],
+            self.kinds(
+                "SELECT u.name FROM youtube y JOIN users u ON u.id = y.user_id"
+                " WHERE u.emial = 'x'"
+            ),
+        )
+        self.assertEqual(["unknown_table"], self.kinds("SELECT z.id FROM youtube y"))
+        self.assertEqual(["syntax"], self.kinds("SELECT (id FROM youtube"))
+
+    def test_unplaced_name_is_warning(self) -> None:
+        issues = self.validator.validate(
+            "SELECT id FROM youtube WHERE MATCH(url) AGAINST('cat' IN SOUNDEX MODE)"
+        )
+        self.assertEqual(["unknown_column"], [issue.kind for issue in issues])
+        self.assertEqual("warning", issues[0].severity)
+        issues = self.validator.validate("SELECT TRIM(LEADING 'x' FROM nope) FROM t")
+        self.assertEqual(["unknown_table"], [issue.kind for issue in issues])
+
+    def test_guard_accepts_mysql_modifiers(self) -> None:
+        guard = QueryGuard(reject=True, catalog=Catalog.from_dict(SCHEMA))
+        for sql in [
+            "SELECT STRAIGHT_JOIN y.id FROM youtube y, users u WHERE u.id = y.user_id",
+            "SELECT id FROM youtube FORCE INDEX (ix_yrmo) WHERE yrmo = 202401",
+            "SELECT @r := @r + 1 AS n FROM youtube",
+        ]:
+            self.assertTrue(guard.validate(sql).ok, sql)
+
+    def test_main_uses_sanitized_url(self) -> None:
+        argv = ["sql_validate", "mysql://u@h/db", "SELECT url FROM youtube"]
+        with mock.patch("sys.argv", argv), mock.patch(
+            "aidb.schema_cache.load_cached_entry", return_value={"schema": SCHEMA}
+        ) as load, mock.patch("sys.stdout", io.StringIO()):
+            self.assertEqual(0, main())
+        load.assert_called_once_with(cache_key("mysql+pymysql://u@h/db", None))
+
+    def test_unindexed_join(self) -> None:
+        issues = self.validator.validate(
+            "SELECT y.url FROM youtube y JOIN users u ON u.name = y.url"
+        )
+        self.assertEqual(["unindexed_join"], [issue.kind for issue in issues])
+        self.assertEqual("warning", issues[0].severity)
+
+    def test_tokenize_depth(self) -> None:
+        tokens = tokenize("SELECT (a) FROM t")
+        self.assertEqual([0, 0, 1, 0, 0, 0], [token.depth for token in tokens])
+
+
+if __name__ == "__main__":
+    unittest.main()
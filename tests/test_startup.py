@@ -0,0 +1,51 @@
+"""
+Unit test file.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+HEAVY_MODULES = ("sqlalchemy", "pymysql")
+
+# Prints the loaded modules on exit, after the CLI ran.
+_CODE = (
+    "import atexit, json, sys; "
+    "atexit.register(lambda: print(json.dumps(sorted(sys.modules)), file=sys.stderr)); "
+    "from aidb.main import main; "
+    "sys.argv = ['aidb'] + sys.argv[1:]; sys.exit(main())"
+)
+
+
+def loaded_modules(*args: str) -> set[str]:
+    """Run the aidb CLI with args, return the top-level packages it imported."""
+    env = {**os.environ, "PYTHON_KEYRING_BACKEND": "keyring.backends.null.Keyring"}
+    proc = subprocess.run(
+        [sys.executable, "-c", _CODE, *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    modules = json.loads(proc.stderr.splitlines()[-1])
+    return {name.split(".")[0] for name in modules}
+
+
+class StartupTester(unittest.TestCase):
+    """Keeps the CLI quick to start for commands that don't touch the database."""
+
+    def test_help(self) -> None:
+        modules = loaded_modules("--help")
+        for module in HEAVY_MODULES + ("keyring",):
+            self.assertNotIn(module, modules)
+
+    def test_set(self) -> None:
+        modules = loaded_modules("--set", "sqlite:///unused.db")
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
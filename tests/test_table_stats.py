@@ -0,0 +1,88 @@
+"""
+Unit test file.
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from aidb.db_dump_schema_json import db_dump_table_schema_json
+from aidb.db_engine import dispose_all
+from aidb.schema_cache import CACHE_DIR_ENV
+from aidb.schema_model import Catalog
+from aidb.schema_prompt import format_row_count, render_compact_schema
+from aidb.table_stats import approximate_count, load_table_stats
+
+
+class TableStatsTester(unittest.TestCase):
+    """Tests for the table size estimates."""
+
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "test.db")
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript("""
+                CREATE TABLE youtube (id INTEGER PRIMARY KEY, yrmo INTEGER);
+                CREATE INDEX ix_youtube_yrmo ON youtube (yrmo);
+                CREATE TABLE logs (id INTEGER PRIMARY KEY, message TEXT);
+                """)
+            conn.executemany(
+                "INSERT INTO youtube (yrmo) VALUES (?)",
+                [(202401 + i % 4,) for i in range(100)],
+            )
+        self.url = f"sqlite:///{self.db_path}"
+        self.env = mock.patch.dict(
+            os.environ, {CACHE_DIR_ENV: os.path.join(self.tmpdir, "cache")}
+        )
+        self.env.start()
+
+    def tearDown(self) -> None:
+        dispose_all()
+        self.env.stop()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def analyze(self) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("ANALYZE")
+
+    def test_estimates_after_analyze(self) -> None:
+        self.assertIsNone(load_table_stats(self.url)["youtube"]["rows"])
+        self.assertIsNone(approximate_count(self.url, "youtube"))
+        self.assertEqual(
+            100, approximate_count(self.url, "youtube", exact_fallback=True)
+        )
+        self.analyze()
+        # Still the cached "no estimate" until it expires or is refreshed.
+        self.assertIsNone(approximate_count(self.url, "youtube"))
+        stats = load_table_stats(self.url, refresh=True)
+        self.assertEqual(100, stats["youtube"]["rows"])
+        self.assertEqual(4, stats["youtube"]["index_cardinality"]["ix_youtube_yrmo"])
+        self.assertEqual(100, approximate_count(self.url, "youtube"))
+        with self.assertRaises(ValueError):
+            approximate_count(self.url, "missing", max_age=0, exact_fallback=True)
+
+    def test_stats_in_dump_and_prompt(self) -> None:
+        self.analyze()
+        schema = db_dump_table_schema_json(self.url, tables=["youtube"], stats=True)
+        self.assertEqual(100, schema["tables"]["youtube"]["stats"]["rows"])
+        catalog = Catalog.from_dict(schema)
+        self.assertEqual(schema, catalog.to_dict())
+        self.assertIn("~100 rows", render_compact_schema(catalog))
+        plain = db_dump_table_schema_json(self.url, tables=["youtube"])
+        self.assertNotIn("stats", plain["tables"]["youtube"])
+
+    def test_format_row_count(self) -> None:
+        self.assertEqual(
+            ["999", "1.5K", "12K", "500M", "2.1B"],
+            [
+                format_row_count(n)
+                for n in (999, 1_500, 12_345, 5 * 10**8, 2_100_000_000)
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()